@@ -0,0 +1,231 @@
+from __future__ import annotations
+import argparse, json, math, os, platform, sys, tempfile, time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ddx.config.fields import load_field_config, build_registry_from_field_config, index_registry
+from ddx.ingestion.discovery import DEFAULT_DISCOVERY_WORKERS
+from ddx.orchestrator import run_for_fields
+from ddx.storage.json_store import save_json_outputs
+from ddx.utils.cache import configure_cache
+from ddx.utils.stages import collect_stages
+
+_ROOT = Path(__file__).resolve().parents[2]
+
+# examples/ subdirectory -> doc_category of the fields benchmarked over it
+SUITE: Dict[str, List[str]] = {
+    "energy_bills": ["Existing Electrical System"],
+    "electrical_design": ["Electrical Design"],
+    "mechanical_design": ["Mechanical Design"],
+    "mounting_structures": ["Mounting Structures"],
+    "pv": ["Photovoltaic Modules"],
+    "inverters": ["Inverters"],
+    "scada_systems": ["SCADA Systems", "SCADA"],
+}
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted ``values``."""
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+def stage_summary(samples: Dict[str, List[float]]) -> Dict[str, Dict[str, Any]]:
+    """{stage: {count, total_seconds, mean, p50, p95, max}} from ``collect_stages`` samples."""
+    out = {}
+    for name in sorted(samples):
+        vals = sorted(samples[name])
+        if not vals:
+            continue
+        out[name] = {
+            "count": len(vals),
+            "total_seconds": round(sum(vals), 6),
+            "mean": round(sum(vals) / len(vals), 6),
+            "p50": round(_percentile(vals, 0.5), 6),
+            "p95": round(_percentile(vals, 0.95), 6),
+            "max": round(vals[-1], 6),
+        }
+    return out
+
+
+def peak_rss_mb() -> Optional[Dict[str, float]]:
+    """Peak resident set size of this process and of its finished children (PDF parse workers)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    # ru_maxrss is in bytes on macOS, KiB elsewhere
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale / 2**20, 1),
+    }
+
+
+def _suite_cases(registry: List[Dict[str, Any]], examples_dir: Path, names: Optional[List[str]]):
+    cases = []
+    for name, categories in SUITE.items():
+        if names and name not in names:
+            continue
+        docs_dir = examples_dir / name
+        fields = [r["_key"] for r in registry if r.get("Sections") in categories]
+        if docs_dir.is_dir() and fields:
+            cases.append({"name": name, "docs_dir": docs_dir, "fields": fields})
+    return cases
+
+
+def _run_case(case: Dict[str, Any], registry_idx: Dict[str, Dict[str, Any]], args, store_dir: Path,
+              run_id: str) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    out = run_for_fields(
+        registry_idx,
+        case["fields"],
+        case["docs_dir"],
+        provider=args.provider,
+        model=args.model,
+        progress=args.progress,
+        ocr=args.ocr,
+        ocr_lang=args.ocr_lang,
+        ocr_dpi=args.ocr_dpi,
+        map_workers=max(1, args.map_workers),
+        prompt_layout=args.prompt_layout,
+        ingest_workers=max(1, args.ingest_workers),
+        stage_timeouts={"parse": args.parse_timeout},
+    )
+    save_json_outputs(out, store_dir, "bench", run_id, {"bench_case": case["name"]})
+    wall = time.perf_counter() - t0
+    results = out["results"]
+    return {
+        "case": case["name"],
+        "docs": len((out.get("manifest") or {}).get("documents") or []),
+        "fields": len(results),
+        "llm_calls": out["llm_usage"]["calls"],
+        "failed_docs": sum(len(r.get("failed_docs") or []) for r in results),
+        "read_errors": len({d for r in results for d in r.get("read_errors") or {}}),
+        "wall_seconds": round(wall, 6),
+    }
+
+
+def _throughput(cases: List[Dict[str, Any]], wall: float) -> Dict[str, float]:
+    wall = wall or 1e-9
+    return {
+        "docs_per_second": round(sum(c["docs"] for c in cases) / wall, 3),
+        "fields_per_second": round(sum(c["fields"] for c in cases) / wall, 3),
+        "llm_calls_per_second": round(sum(c["llm_calls"] for c in cases) / wall, 3),
+    }
+
+
+def run_bench(args) -> Dict[str, Any]:
+    """Run the examples suite ``args.repeat`` times; returns the report."""
+    registry = build_registry_from_field_config(load_field_config(Path(args.field_config)))
+    registry_idx = index_registry(registry)
+    if args.docs_dir:
+        fields = args.fields or [r["_key"] for r in registry]
+        cases = [{"name": Path(args.docs_dir).name, "docs_dir": Path(args.docs_dir), "fields": fields}]
+    else:
+        cases = _suite_cases(registry, Path(args.examples_dir), args.cases)
+        if args.fields:
+            cases = [{**c, "fields": [f for f in c["fields"] if f in args.fields]} for c in cases]
+            cases = [c for c in cases if c["fields"]]
+    if not cases:
+        raise SystemExit("bench: nothing to run (no matching cases or fields)")
+
+    with tempfile.TemporaryDirectory(prefix="ddx-bench-") as tmp:
+        # A fresh cache directory per invocation, so the first repeat always reads cold
+        cache_dir = Path(args.cache_dir) if args.cache_dir else Path(tmp) / "cache"
+        configure_cache(cache_dir, enabled=not args.no_cache)
+        store_dir = Path(args.store_dir) if args.store_dir else Path(tmp) / "store"
+        runs = []
+        for n in range(1, max(1, args.repeat) + 1):
+            with collect_stages() as samples:
+                t0 = time.perf_counter()
+                case_stats = [_run_case(c, registry_idx, args, store_dir, f"{c['name']}-{n}") for c in cases]
+                wall = time.perf_counter() - t0
+            runs.append({
+                "repeat": n,
+                "wall_seconds": round(wall, 6),
+                "throughput": _throughput(case_stats, wall),
+                "stages": stage_summary(samples),
+                "cases": case_stats,
+            })
+
+    return {
+        "config": {
+            "provider": args.provider,
+            "mock_latency_ms": args.mock_latency_ms if args.provider == "mock" else None,
+            "map_workers": args.map_workers,
+            "ingest_workers": args.ingest_workers,
+            "prompt_layout": args.prompt_layout,
+            "ocr": args.ocr,
+            "ocr_dpi": args.ocr_dpi if args.ocr else None,
+            "parse_timeout": args.parse_timeout,
+            "cache": "off" if args.no_cache else (args.cache_dir or "fresh"),
+            "repeat": max(1, args.repeat),
+            "cases": [c["name"] for c in cases],
+        },
+        "env": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "runs": runs,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(
+        prog="ddx bench",
+        description="Run ingestion, prompt building, mapping, normalization, reduction and store "
+        "writes over examples/ against an offline LLM and report throughput, per-stage "
+        "latency and peak RSS as JSON. Peak RSS covers the whole process, so compare "
+        "configurations in separate invocations.",
+    )
+    ap.add_argument(
+        "--examples-dir",
+        default=str(_ROOT / "examples"),
+        help="Suite root; each known subdirectory is run with the fields of its category",
+    )
+    ap.add_argument("--cases", nargs="+", choices=sorted(SUITE), help="Suite subdirectories to run (default: all)")
+    ap.add_argument("--docs-dir", default=None, help="Benchmark this directory instead of the suite")
+    ap.add_argument("--fields", nargs="+", help="Restrict to these field keys")
+    ap.add_argument(
+        "--field-config",
+        default=str(_ROOT / "config" / "fields.json"),
+        help="Path to fields.json config",
+    )
+    ap.add_argument("--provider", default="mock", choices=["mock", "replay"], help="Offline LLM provider")
+    ap.add_argument("--model", default="", help="Model name recorded in requests (replay keys on it; default: the recordings' model)")
+    ap.add_argument("--mock-latency-ms", type=float, default=50.0, help="Mock provider latency per call")
+    ap.add_argument("--replay-dir", default=None, help="Recordings for --provider replay")
+    ap.add_argument("--map-workers", type=int, default=4, help="Concurrent map calls per field")
+    ap.add_argument("--ingest-workers", type=int, default=DEFAULT_DISCOVERY_WORKERS, help="Concurrent document reads")
+    ap.add_argument("--prompt-layout", default="field_first", choices=["field_first", "document_first"])
+    ap.add_argument("--ocr", action="store_true", help="Enable OCR fallback")
+    ap.add_argument("--ocr-lang", default="spa+eng", help="Tesseract languages")
+    ap.add_argument("--ocr-dpi", type=int, default=300, help="Render DPI for OCR")
+    ap.add_argument(
+        "--parse-timeout",
+        type=float,
+        default=0.0,
+        help="Parse PDFs in worker processes with this timeout (default 0: in-process, so OCR "
+        "pages are timed too)",
+    )
+    ap.add_argument("--repeat", type=int, default=1, help="Runs of the suite; the first reads a cold cache")
+    ap.add_argument("--no-cache", action="store_true", help="Disable the page-text cache")
+    ap.add_argument("--cache-dir", default=None, help="Reuse this cache directory (default: a fresh temporary one)")
+    ap.add_argument("--store-dir", default=None, help="Keep store writes here (default: a temporary directory)")
+    ap.add_argument("--out", default=None, help="Also write the JSON report to this file")
+    ap.add_argument("--progress", action="store_true", help="Show file reading / LLM progress")
+    args = ap.parse_args(argv)
+
+    if args.provider == "mock":
+        os.environ["DDX_MOCK_LATENCY_MS"] = str(args.mock_latency_ms)
+        os.environ.pop("DDX_MOCK_FAILURE_RATE", None)
+    if args.replay_dir:
+        os.environ["DDX_LLM_REPLAY_DIR"] = str(Path(args.replay_dir))
+
+    report = run_bench(args)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
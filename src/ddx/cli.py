@@ -1,14 +1,79 @@
 from __future__ import annotations
-import argparse, json
+import argparse, json, os, signal, sys, threading
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
 
 from ddx.config.fields import load_field_config, build_registry_from_field_config, index_registry
+from ddx.ingestion.discovery import manifest_summary
 from ddx.orchestrator import run_for_fields
-from ddx.storage.json_store import save_json_outputs
-from ddx.evaluator.brand_compliance import evaluate_brand_compliance, evaluate_inverter_compliance
+from ddx.storage.checkpoint import RunCheckpoint, checkpoint_path
+from ddx.storage.json_store import save_json_outputs, save_brand_evaluations
+from ddx.evaluator.brand_compliance import (
+    DEFAULT_BRAND_WORKERS,
+    evaluate_brand_compliance,
+    evaluate_brands_batch,
+    evaluate_inverter_compliance,
+)
+from ddx.evaluator.search import get_search_provider
+from ddx.utils.cache import configure_cache
+from ddx.utils.deadline import DEFAULT_STAGE_TIMEOUTS, Deadline
+from ddx.utils.profiling import RunProfiler
+from ddx.utils.stages import timed_stage
+from ddx.utils.trace import TRACE_FORMATS, start_tracing, stop_tracing
+
+# Settings that shape map outputs; a resumed run takes them from its checkpoint
+_RESUME_SETTINGS = (
+    "provider", "model", "model_tiers", "escalate_confidence", "prompt_layout",
+    "ocr", "ocr_lang", "ocr_dpi", "structured_output", "max_reasks",
+)
+
+
+def _restore_run_settings(ap: argparse.ArgumentParser, args: argparse.Namespace, settings: dict) -> None:
+    """Apply a checkpointed run's map settings to ``args``.
+
+    Options left at their default take the run's value; an option given with a different
+    value is an error, since checkpointed outputs would be reduced with ones made differently.
+    """
+    conflicts = []
+    for key in _RESUME_SETTINGS:
+        if settings.get(key) is None:
+            continue
+        dest = "no_structured_output" if key == "structured_output" else key
+        value = not settings[key] if key == "structured_output" else settings[key]
+        current = getattr(args, dest)
+        if current == value:
+            continue
+        if current == ap.get_default(dest):
+            setattr(args, dest, value)
+        else:
+            conflicts.append(f"--{dest.replace('_', '-')} {current!r} (the run used {value!r})")
+    if conflicts:
+        ap.error("--resume: settings differ from the checkpointed run: " + "; ".join(conflicts))
+
+
+@contextmanager
+def _cancel_on_interrupt(deadline: Deadline):
+    """First Ctrl-C cancels ``deadline`` so the run returns what it has; a second one aborts."""
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def cancel(signum, frame):
+        deadline.cancel()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        print("Cancelling run; press Ctrl-C again to abort without results.", file=sys.stderr)
+
+    previous = signal.signal(signal.SIGINT, cancel)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGINT, previous)
 
 
 def main():
+    if sys.argv[1:2] == ["bench"]:
+        from ddx.bench import main as bench_main
+        return bench_main(sys.argv[2:])
     ap = argparse.ArgumentParser()
     ap.add_argument(
         "--field-config",
@@ -16,13 +81,117 @@ def main():
         help="Path to fields.json config",
     )
     ap.add_argument(
-        "--docs-dir", default=None, help="Directory with source documents (.txt/.csv/.pdf/.kmz)"
+        "--docs-dir",
+        default=None,
+        help="Directory with source documents (.pdf/.docx/.xlsx/.txt/.csv/.kmz/.zip), "
+        "searched recursively",
+    )
+    ap.add_argument(
+        "--ingest-workers",
+        type=int,
+        default=8,
+        help="Concurrent directory scans, file hashes and document reads",
     )
     ap.add_argument("--fields", nargs="+", help="Field keys to extract")
 
     # LLM
-    ap.add_argument("--provider", default="openai", help="LLM provider (default: openai)")
+    ap.add_argument(
+        "--provider",
+        default="openai",
+        choices=["openai", "mock", "replay", "record"],
+        help="LLM provider: openai, mock (offline, synthetic), replay (serve recorded "
+        "responses) or record (call openai and record responses) (default: openai)",
+    )
     ap.add_argument("--model", default="", help="LLM model name override (else env LLM_MODEL)")
+    ap.add_argument(
+        "--model-tiers",
+        nargs="+",
+        default=None,
+        help="Map with a model cascade, cheapest first (e.g. gpt-4o-mini gpt-4o): documents "
+        "whose answer is low-confidence, partial or unverified are re-mapped with the next "
+        "model. Reduce calls use --model, else the last tier",
+    )
+    ap.add_argument(
+        "--escalate-confidence",
+        type=float,
+        default=0.75,
+        help="Answers below this confidence move to the next --model-tiers model",
+    )
+    ap.add_argument(
+        "--replay-dir",
+        default=None,
+        help="Recorded request/response directory for --provider replay/record "
+        "(else env DDX_LLM_REPLAY_DIR)",
+    )
+    ap.add_argument(
+        "--mock-latency-ms", type=float, default=None, help="Per-call latency for --provider mock"
+    )
+    ap.add_argument(
+        "--mock-failure-rate",
+        type=float,
+        default=None,
+        help="Fraction of --provider mock calls that fail (deterministic per request)",
+    )
+
+    # Map stage
+    ap.add_argument(
+        "--map-workers", type=int, default=1, help="Concurrent per-document LLM map calls"
+    )
+    ap.add_argument(
+        "--early-exit",
+        action="store_true",
+        help="For max_confidence fields with min_documents <= 1, map the most relevant "
+        "documents first and stop once one answer is confident and evidenced",
+    )
+    ap.add_argument(
+        "--early-exit-confidence",
+        type=float,
+        default=0.9,
+        help="Confidence a single-document answer needs to trigger --early-exit",
+    )
+
+    ap.add_argument(
+        "--batch",
+        action="store_true",
+        help="Submit all map requests of the run as one batch job (OpenAI Batch API, or a "
+        "file-based local batch for mock/replay providers), wait for it, then reduce",
+    )
+    ap.add_argument(
+        "--batch-dir",
+        default=None,
+        help="Where batch request/result JSONL files go "
+        "(default: <store-dir>/batches/<project-id>/<run-id>)",
+    )
+    ap.add_argument(
+        "--batch-poll-seconds",
+        type=float,
+        default=None,
+        help="Seconds between batch status polls (default: 60 for openai)",
+    )
+    ap.add_argument(
+        "--batch-timeout-hours", type=float, default=24.0, help="Give up waiting after this long"
+    )
+
+    ap.add_argument(
+        "--no-structured-output",
+        action="store_true",
+        help="Send plain json_object requests with lenient parsing instead of each field's "
+        "strict JSON Schema (for models without structured-output support)",
+    )
+    ap.add_argument(
+        "--max-reasks",
+        type=int,
+        default=1,
+        help="Re-ask a document at most this many times when its answer fails the schema",
+    )
+
+    ap.add_argument(
+        "--prompt-layout",
+        default="field_first",
+        choices=["field_first", "document_first"],
+        help="Map message order; document_first lets fields sharing a document reuse the "
+        "provider's cached prompt prefix",
+    )
 
     # OCR
     ap.add_argument(
@@ -31,6 +200,51 @@ def main():
     ap.add_argument("--ocr-lang", default="spa+eng", help="Tesseract languages (e.g., 'spa+eng')")
     ap.add_argument("--ocr-dpi", type=int, default=300, help="Render DPI for OCR")
 
+    # Timeouts
+    ap.add_argument(
+        "--deadline",
+        type=float,
+        default=None,
+        help="Wall-clock budget for the whole run in seconds; once reached no new field or "
+        "document is started and the run returns partial results with a per-field status",
+    )
+    ap.add_argument(
+        "--parse-timeout",
+        type=float,
+        default=DEFAULT_STAGE_TIMEOUTS["parse"],
+        help="Seconds per PDF parse, run in a worker process that is killed when it overruns "
+        "(0 parses in-process without a limit)",
+    )
+    ap.add_argument(
+        "--ocr-timeout",
+        type=float,
+        default=DEFAULT_STAGE_TIMEOUTS["ocr"],
+        help="Extra seconds per PDF parse when --ocr is on",
+    )
+    ap.add_argument(
+        "--llm-timeout",
+        type=float,
+        default=DEFAULT_STAGE_TIMEOUTS["llm"],
+        help="Seconds per LLM call (0 for the provider default)",
+    )
+
+    # Tracing / profiling
+    ap.add_argument(
+        "--trace",
+        choices=TRACE_FORMATS,
+        default=None,
+        help="Record spans for discovery, per-file ingestion, per-page OCR, per-document "
+        "mapping, each LLM call, normalization, reduce and storage, and write them next to the "
+        "run snapshot: <run_id>.trace.json (chrome: Perfetto / chrome://tracing) or "
+        "<run_id>.otel.json (OTLP/JSON)",
+    )
+    ap.add_argument(
+        "--profile",
+        action="store_true",
+        help="Run under cProfile and tracemalloc and write <run_id>.prof, <run_id>.profile.txt "
+        "and <run_id>.tracemalloc.txt next to the run snapshot",
+    )
+
     # Progress
     ap.add_argument(
         "--progress", action="store_true", help="Show file reading / OCR / LLM progress"
@@ -46,6 +260,23 @@ def main():
         "--project-id", default="default_project", help="Namespace for run/field snapshots"
     )
     ap.add_argument("--run-id", default=None, help="Optional run id; defaults to UTC timestamp")
+    ap.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        default=None,
+        help="Continue an interrupted run from its checkpoint "
+        "(<store-dir>/runs/<project-id>/<RUN_ID>.checkpoint.jsonl): finished fields and "
+        "mapped documents are reused, only the missing work runs. --fields defaults to the "
+        "run's fields",
+    )
+
+    # Cache
+    ap.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for content-hash caches (else env DDX_CACHE_DIR or ~/.cache/ddx)",
+    )
+    ap.add_argument("--no-cache", action="store_true", help="Disable in-process and disk caches")
 
     # Brand compliance flags
     ap.add_argument(
@@ -56,18 +287,102 @@ def main():
     ap.add_argument(
         "--inverter-brand", type=str, help="Evaluate inverter brand compliance (e.g., 'Sungrow')"
     )
+    ap.add_argument(
+        "--solar-panel-brands",
+        nargs="+",
+        help="Batch-evaluate several solar panel brands; results are written to the store",
+    )
+    ap.add_argument(
+        "--inverter-brands",
+        nargs="+",
+        help="Batch-evaluate several inverter brands; results are written to the store",
+    )
+    ap.add_argument(
+        "--search-provider",
+        default=None,
+        choices=["tavily", "local"],
+        help="Web search backend for brand checks (else env DDX_SEARCH_PROVIDER, default tavily)",
+    )
+    ap.add_argument(
+        "--search-dir",
+        default=None,
+        help="Directory of pre-fetched pages/PDFs for --search-provider local",
+    )
+    ap.add_argument(
+        "--brand-workers",
+        type=int,
+        default=DEFAULT_BRAND_WORKERS,
+        help="Max concurrent web search + analysis checks per brand evaluation",
+    )
 
     args = ap.parse_args()
+    configure_cache(Path(args.cache_dir) if args.cache_dir else None, enabled=not args.no_cache)
+    # Provider options travel through the environment so every LLMClient picks them up
+    if args.replay_dir:
+        os.environ["DDX_LLM_REPLAY_DIR"] = str(Path(args.replay_dir))
+    if args.mock_latency_ms is not None:
+        os.environ["DDX_MOCK_LATENCY_MS"] = str(args.mock_latency_ms)
+    if args.mock_failure_rate is not None:
+        os.environ["DDX_MOCK_FAILURE_RATE"] = str(args.mock_failure_rate)
+    if args.llm_timeout:
+        os.environ["DDX_LLM_TIMEOUT"] = str(args.llm_timeout)
+
+    brand_flags = (
+        args.solar_panel_brand, args.inverter_brand, args.solar_panel_brands, args.inverter_brands
+    )
+    search_provider = None
+    if any(brand_flags) and (args.search_provider or args.search_dir):
+        search_provider = get_search_provider(
+            args.search_provider or ("local" if args.search_dir else None),
+            Path(args.search_dir) if args.search_dir else None,
+        )
+
+    # Batch brand compliance over vendor lists
+    if args.solar_panel_brands or args.inverter_brands:
+        batch = evaluate_brands_batch(
+            args.solar_panel_brands,
+            args.inverter_brands,
+            max_workers=args.brand_workers,
+            search_provider=search_provider,
+            provider=args.provider,
+            model=args.model,
+        )
+        brand_meta = {
+            "project_id": args.project_id,
+            "solar_panel_brands": args.solar_panel_brands or [],
+            "inverter_brands": args.inverter_brands or [],
+            "brand_workers": args.brand_workers,
+            "search_provider": getattr(search_provider, "name", None) or "tavily",
+            "provider": args.provider,
+            "model": args.model,
+        }
+        stored_paths = save_brand_evaluations(
+            batch, Path(args.store_dir), args.project_id, args.run_id, brand_meta
+        )
+        print(json.dumps(stored_paths, indent=2))
+        return
 
     # Handle solar panel brand compliance
     if args.solar_panel_brand:
-        result = evaluate_brand_compliance(args.solar_panel_brand)
+        result = evaluate_brand_compliance(
+            args.solar_panel_brand,
+            max_workers=args.brand_workers,
+            search_provider=search_provider,
+            provider=args.provider,
+            model=args.model,
+        )
         print(json.dumps(result, indent=2))
         return
 
     # Handle inverter brand compliance
     if args.inverter_brand:
-        result = evaluate_inverter_compliance(args.inverter_brand)
+        result = evaluate_inverter_compliance(
+            args.inverter_brand,
+            max_workers=args.brand_workers,
+            search_provider=search_provider,
+            provider=args.provider,
+            model=args.model,
+        )
         print(json.dumps(result, indent=2))
         return
 
@@ -81,17 +396,39 @@ def main():
 
     docs_dir = Path(args.docs_dir) if args.docs_dir else None
 
-    out = run_for_fields(
-        registry_idx,
-        args.fields,
-        docs_dir,
-        provider=args.provider,
-        model=args.model,
-        progress=args.progress,
-        ocr=args.ocr,
-        ocr_lang=args.ocr_lang,
-        ocr_dpi=args.ocr_dpi,
-    )
+    # Pin the run id so the checkpoint, batch files and run snapshot share it
+    if args.resume:
+        args.run_id = args.resume
+    elif not args.run_id:
+        from datetime import datetime, timezone
+
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        args.run_id, n = stamp, 1
+        while checkpoint_path(store_dir, args.project_id, args.run_id).exists():
+            n += 1
+            args.run_id = f"{stamp}-{n}"
+    ckpt_path = checkpoint_path(store_dir, args.project_id, args.run_id)
+    if args.resume and not ckpt_path.exists():
+        ap.error(f"--resume: no checkpoint at {ckpt_path}")
+    if not args.resume and ckpt_path.exists():
+        ap.error(f"run {args.run_id} already has a checkpoint; pass --resume {args.run_id} or another --run-id")
+    checkpoint = RunCheckpoint(ckpt_path)
+    if checkpoint.run:
+        settings = checkpoint.run.get("settings") or {}
+        args.fields = args.fields or checkpoint.run.get("fields")
+        _restore_run_settings(ap, args, settings)
+        if docs_dir is None and settings.get("docs_dir"):
+            docs_dir = Path(settings["docs_dir"])
+    if not args.fields:
+        ap.error("--fields is required")
+
+    batch_dir = None
+    if args.batch:
+        batch_dir = (
+            Path(args.batch_dir)
+            if args.batch_dir
+            else store_dir / "batches" / args.project_id / args.run_id
+        )
 
     args_meta = {
         "project_id": args.project_id,
@@ -102,7 +439,69 @@ def main():
         "ocr": args.ocr,
         "ocr_lang": args.ocr_lang,
         "ocr_dpi": args.ocr_dpi,
+        "map_workers": args.map_workers,
+        "early_exit": args.early_exit,
+        "early_exit_confidence": args.early_exit_confidence,
+        "prompt_layout": args.prompt_layout,
+        "batch": args.batch,
+        "structured_output": not args.no_structured_output,
+        "max_reasks": args.max_reasks,
+        "ingest_workers": args.ingest_workers,
+        "model_tiers": args.model_tiers,
+        "escalate_confidence": args.escalate_confidence if args.model_tiers else None,
+        "deadline": args.deadline,
+        "parse_timeout": args.parse_timeout,
+        "ocr_timeout": args.ocr_timeout,
+        "llm_timeout": args.llm_timeout,
+        "trace": args.trace,
+        "profile": args.profile,
     }
-    stored_paths = save_json_outputs(out, store_dir, args.project_id, args.run_id, args_meta)
+    checkpoint.start(args.fields, args_meta)
+
+    deadline = Deadline(args.deadline)
+    profiler = RunProfiler() if args.profile else None
+    tracer = start_tracing() if args.trace else None
+    stored_paths = {}
+    try:
+        with _cancel_on_interrupt(deadline), profiler or nullcontext(), \
+                timed_stage("run", project=args.project_id, run_id=args.run_id):
+            out = run_for_fields(
+                registry_idx,
+                args.fields,
+                docs_dir,
+                provider=args.provider,
+                model=args.model,
+                progress=args.progress,
+                ocr=args.ocr,
+                ocr_lang=args.ocr_lang,
+                ocr_dpi=args.ocr_dpi,
+                map_workers=args.map_workers,
+                early_exit=args.early_exit,
+                early_exit_confidence=args.early_exit_confidence,
+                prompt_layout=args.prompt_layout,
+                batch_dir=batch_dir,
+                batch_poll_seconds=args.batch_poll_seconds,
+                batch_timeout_seconds=args.batch_timeout_hours * 3600.0,
+                structured_output=not args.no_structured_output,
+                max_reasks=max(0, args.max_reasks),
+                ingest_workers=max(1, args.ingest_workers),
+                model_tiers=args.model_tiers,
+                escalate_confidence=args.escalate_confidence,
+                checkpoint=checkpoint,
+                deadline=deadline,
+                stage_timeouts={"parse": args.parse_timeout, "ocr": args.ocr_timeout, "llm": args.llm_timeout},
+            )
+            stored_paths = save_json_outputs(out, store_dir, args.project_id, args.run_id, args_meta)
+    finally:
+        stop_tracing()
+        # Also written when the run fails or is aborted, next to where its snapshot would be
+        run_dir = store_dir / "runs" / args.project_id
+        if tracer is not None:
+            name = f"{args.run_id}.trace.json" if args.trace == "chrome" else f"{args.run_id}.otel.json"
+            stored_paths["trace"] = str(tracer.write(run_dir / name, args.trace))
+        if profiler is not None:
+            stored_paths.update(profiler.save(run_dir, args.run_id))
     out["stored_json"] = stored_paths
+    # The full manifest is on disk next to the run snapshot
+    out["manifest"] = manifest_summary(out["manifest"])
     print(json.dumps(out, indent=2))
@@ -1,53 +1,255 @@
 from __future__ import annotations
 import os
 import json
-from typing import Dict, Any, List, Optional
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Callable, Tuple
 from pathlib import Path
-from tavily import TavilyClient
 from ddx.llm.client import LLMClient
+from ddx.utils.cache import cache_get, cache_put
+from ddx.evaluator.content_filter import trim_raw_content
+from ddx.evaluator.search import SearchProvider, get_search_provider
 
 # os.environ["TAVILY_API_KEY"] = "your-tavily-api-key"
 # os.environ["OPENAI_API_KEY"] = "your-openai-api-key"
 
+# Certifications change rarely, so web searches and LLM analyses are reused for this long.
+BRAND_CACHE_TTL_DAYS = float(os.getenv("DDX_BRAND_CACHE_TTL_DAYS", "30"))
+# Upper bound on concurrent (search + analysis) checks per evaluation.
+DEFAULT_BRAND_WORKERS = int(os.getenv("DDX_BRAND_WORKERS", "5"))
+
+APPROVED_BRANDS = ["Trina Solar", "LONGi Solar", "JA Solar"]
+
+APPROVED_INVERTER_BRANDS = [
+    "Sungrow",
+    "Fronius",
+    "SolarEdge",
+    "Victron Energy",
+    "Deye",
+    "Solis",
+    "Huawei",
+]
+
+RATING_SCORES = {
+    "AAA": 1.0,
+    "AA": 1.0,
+    "A": 1.0,
+    "BBB": 0.75,
+    "BB": 0.75,
+    "B": 0.75,
+    "CCC": 0.5,
+    "not_listed": 0.0,
+}
+
 
 def _llm_client(provider: str, model: str):
     return LLMClient(provider=provider, model=model or None)
 
 
-def evaluate_brand_compliance(brand_name: str) -> Dict[str, Any]:
-    """
-    Evaluate solar panel brand compliance through web search and document analysis.
+def _search_provider(search_provider: Optional[SearchProvider] = None) -> SearchProvider:
+    # Tavily unless DDX_SEARCH_PROVIDER/--search-provider selects the offline local index
+    return search_provider or get_search_provider()
+
+
+def _cache_key(*parts: Any) -> str:
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _cache_fresh(entry: Any) -> bool:
+    if not isinstance(entry, dict) or "value" not in entry:
+        return False
+    age_days = (time.time() - float(entry.get("ts") or 0)) / 86400.0
+    return age_days <= BRAND_CACHE_TTL_DAYS
+
+
+def _search_cached(
+    searcher, query: str, max_results: int, *, brand: str, standard: str
+) -> Dict[str, Any]:
+    scope = getattr(searcher, "cache_scope", None) or getattr(searcher, "name", "")
+    key = _cache_key("search", scope, brand, standard, query, max_results)
+    hit = cache_get("brand_search", key)
+    if _cache_fresh(hit):
+        return hit["value"]
+    resp = searcher.search(
+        query=query,
+        search_depth="advanced",
+        max_results=max_results,
+        include_answer="advanced",
+        include_raw_content="text",
+    )
+    cache_put("brand_search", key, {"ts": time.time(), "value": resp})
+    return resp
+
+
+def _analyze_cached(
+    llm_client, messages: List[Dict[str, str]], *, brand: str, standard: str, url: str
+) -> Dict[str, Any]:
+    key = _cache_key("analysis", brand, standard, url, getattr(llm_client, "provider", ""),
+                     getattr(llm_client, "model", ""), messages)
+    hit = cache_get("brand_analysis", key)
+    if _cache_fresh(hit):
+        return hit["value"]
+    llm_response = llm_client.chat(messages, response_format={"type": "json_object"})
+    analysis = json.loads(llm_response)
+    cache_put("brand_analysis", key, {"ts": time.time(), "value": analysis})
+    return analysis
+
+
+def _raw_content(sr: Dict[str, Any]) -> str:
+    raw_content = sr.get("raw_content", "")
+    if not raw_content:
+        raw_content = sr.get("content", "")
+    return raw_content or ""
+
+
+def _analysis_content(sr: Dict[str, Any], brand: str, standard: str) -> str:
+    # Certificate PDFs and vendor pages can be huge; only windows around the brand,
+    # standard code, certificate numbers and dates are sent to the LLM.
+    return trim_raw_content(_raw_content(sr), brand, standard)
+
+
+def _pdf_then_url(
+    searcher,
+    llm_client,
+    *,
+    brand: str,
+    standard: str,
+    pdf_query: str,
+    url_query: str,
+    pdf_max_results: int,
+    url_max_results: int,
+    pdf_messages: Callable[[str, str], List[Dict[str, str]]],
+    url_messages: Callable[[str, str], List[Dict[str, str]]],
+    accept: Callable[[Dict[str, Any]], bool],
+    log: List[str],
+) -> Tuple[Optional[Dict[str, Any]], str, str, List[Tuple[str, str, int]]]:
+    """Search PDFs first, then regular URLs; return the first accepted LLM analysis.
+
+    Returns (analysis, url, search_type, searches) where searches is a list of
+    (search_type, query, results_count).
     """
+    searches: List[Tuple[str, str, int]] = []
+    steps = [
+        ("PDF", pdf_query, pdf_max_results, pdf_messages),
+        ("URL", url_query, url_max_results, url_messages),
+    ]
+    for search_type, query, max_results, build_messages in steps:
+        if search_type == "PDF":
+            log.append(f"  Step 1: Searching for PDF certificates...")
+        else:
+            log.append(f"  Step 2: No PDF evidence found. Searching regular URLs...")
+        resp = _search_cached(searcher, query, max_results, brand=brand, standard=standard)
+        results = resp.get("results", [])
+        searches.append((search_type, query, len(results)))
 
-    # Initialize Tavily
-    tavily_api_key = os.getenv("TAVILY_API_KEY")
-    if not tavily_api_key:
-        raise ValueError("TAVILY_API_KEY environment variable not set")
+        for sr in results:
+            url = sr.get("url", "")
+            if not url or url == "N/A":
+                continue
+            # PDF step only accepts PDFs; URL step skips them
+            if url.lower().endswith(".pdf") != (search_type == "PDF"):
+                continue
+            raw_content = _analysis_content(sr, brand, standard)
+            if not raw_content:
+                continue
 
-    tavily = TavilyClient(api_key=tavily_api_key)
-    llm_client = _llm_client(provider="openai", model=None)
+            log.append(f"    Analyzing {search_type}: {url}")
+            try:
+                analysis = _analyze_cached(
+                    llm_client,
+                    build_messages(url, raw_content),
+                    brand=brand,
+                    standard=standard,
+                    url=url,
+                )
+                if accept(analysis):
+                    return analysis, url, search_type, searches
+            except Exception as e:
+                log.append(f"    Error analyzing {search_type} {url}: {str(e)}")
+                continue
+    return None, "N/A", "not_found", searches
 
-    APPROVED_BRANDS = ["Trina Solar", "LONGi Solar", "JA Solar"]
 
-    # Initialize result structure
-    result = {
-        "brand": {
-            "name": brand_name,
-            "score": 1.0 if brand_name in APPROVED_BRANDS else 0.5,
-            "in_approved_list": brand_name in APPROVED_BRANDS,
-            "evidence": (
-                "In approved list" if brand_name in APPROVED_BRANDS else "Manually specified"
-            ),
-        },
-        "iec_certificates": {},
-        "factory_reports": {"score": 0.0, "evidence": "Not found", "weight": 0.10},
-        "bankability": {"score": 0.0, "evidence": "Not found", "weight": 0.10},
-        "overall_score": 0.0,
-        "web_searches_performed": [],
+def _iec_accept(analysis: Dict[str, Any]) -> bool:
+    return analysis.get("evidence_type") != "not_found" and analysis.get("confidence", 0) > 0.3
+
+
+def _bank_accept(analysis: Dict[str, Any]) -> bool:
+    return bool(analysis.get("tier_1_status") or analysis.get("rating") != "not_listed")
+
+
+def _iec_entry(
+    iec: Dict[str, Any], final_analysis: Optional[Dict[str, Any]], used_url: str, search_type: str
+) -> Dict[str, Any]:
+    if not final_analysis:
+        return {
+            "score": 0.0,
+            "description": iec["description"],
+            "mandatory": iec["mandatory"],
+            "weight": iec["weight"],
+            "evidence": "No evidence found in PDFs or web pages",
+            "source": "N/A",
+            "search_type": "not_found",
+            "confidence": 0.0,
+            "evidence_type": "not_found",
+        }
+
+    score = 0.0
+    if final_analysis.get("has_certification"):
+        score = 1.0
+        # Check if certificate is still valid (for PDFs)
+        if search_type == "PDF" and final_analysis.get("valid_until"):
+            try:
+                from datetime import datetime
+
+                expiry_date = datetime.strptime(final_analysis["valid_until"], "%Y-%m-%d")
+                if expiry_date < datetime.now():
+                    score = 0.5  # Expired certificate
+                    final_analysis = {**final_analysis, "evidence_type": "expired_certificate"}
+            except:
+                pass
+    elif final_analysis.get("evidence_type") == "commitment":
+        score = 0.5
+
+    entry = {
+        "score": score,
+        "description": iec["description"],
+        "mandatory": iec["mandatory"],
+        "weight": iec["weight"],
+        "evidence": final_analysis.get("key_evidence", "No evidence found"),
+        "source": used_url,
+        "search_type": search_type,
+        "confidence": final_analysis.get("confidence", 0.0),
+        "evidence_type": final_analysis.get("evidence_type"),
     }
 
-    # Define IEC standards to check
-    iec_standards = [
+    # Add PDF-specific fields if from PDF
+    if search_type == "PDF":
+        entry.update(
+            {
+                "certificate_number": final_analysis.get("certificate_number"),
+                "testing_lab": final_analysis.get("testing_lab"),
+                "product_models": final_analysis.get("product_models"),
+                "issue_date": final_analysis.get("issue_date"),
+                "valid_until": final_analysis.get("valid_until"),
+                "date_source": final_analysis.get("date_source"),
+            }
+        )
+    else:
+        # URL search results
+        entry.update(
+            {
+                "published_date": final_analysis.get("published_date"),
+                "date_source": final_analysis.get("date_source"),
+            }
+        )
+    return entry
+
+
+def _panel_iec_standards(brand_name: str) -> List[Dict[str, Any]]:
+    return [
         {
             "code": "IEC 61215",
             "description": "Outdoor durability & mechanical integrity",
@@ -90,538 +292,450 @@ def evaluate_brand_compliance(brand_name: str) -> Dict[str, Any]:
         },
     ]
 
-    # Search and evaluate each IEC standard with fallback strategy
-    for iec in iec_standards:
-        print(f"Searching for {iec['code']}...")
-
-        found_evidence = False
-        final_analysis = None
-        used_url = "N/A"
-        search_type = "not_found"
-
-        # STEP 1: First try searching for PDFs
-        print(f"  Step 1: Searching for PDF certificates...")
-        pdf_search_results = tavily.search(
-            query=iec["pdf_query"],
-            search_depth="advanced",
-            max_results=3,
-            include_answer="advanced",
-            include_raw_content="text",
-        )
 
-        result["web_searches_performed"].append(
-            {
-                "standard": iec["code"],
-                "query": iec["pdf_query"],
-                "search_type": "PDF",
-                "results_count": len(pdf_search_results.get("results", [])),
-            }
-        )
+def _inverter_iec_standards(inverter_brand: str) -> List[Dict[str, Any]]:
+    return [
+        {
+            "code": "IEC 62109",
+            "description": "Safety requirements for power converters used in photovoltaic systems",
+            "mandatory": True,
+            "weight": 0.10,
+            "pdf_query": f"IEC 62109 {inverter_brand} inverter safety certification filetype:pdf",
+            "url_query": f"Does {inverter_brand} inverter comply with IEC 62109 safety standard? -filetype:pdf",
+        },
+        {
+            "code": "IEC 61727",
+            "description": "Photovoltaic systems' interface with the grid (grid code compliance)",
+            "mandatory": True,
+            "weight": 0.10,
+            "pdf_query": f"IEC 61727 {inverter_brand} inverter grid code certification filetype:pdf",
+            "url_query": f"Does {inverter_brand} inverter comply with IEC 61727 grid code standard? -filetype:pdf",
+        },
+        {
+            "code": "IEC 62116",
+            "description": "Test procedure for anti-islanding protection measures",
+            "mandatory": True,
+            "weight": 0.10,
+            "pdf_query": f"IEC 62116 {inverter_brand} inverter anti-islanding test report filetype:pdf",
+            "url_query": f"Is {inverter_brand} inverter tested for IEC 62116 anti-islanding protection? -filetype:pdf",
+        },
+        {
+            "code": "IEC 61000",
+            "description": "Electromagnetic compatibility (EMC)",
+            "mandatory": True,
+            "weight": 0.10,
+            "pdf_query": f"IEC 61000 {inverter_brand} inverter EMC certification filetype:pdf",
+            "url_query": f"Does {inverter_brand} inverter comply with IEC 61000 EMC requirements? -filetype:pdf",
+        },
+    ]
 
-        # Try each PDF result
-        for sr in pdf_search_results.get("results", []):
-            url = sr.get("url", "")
-            if not url or url == "N/A":
-                continue
 
-            # Check if URL is actually a PDF
-            if not url.lower().endswith(".pdf"):
-                continue
+def _panel_pdf_messages(brand_name: str, iec: Dict[str, Any], url: str, raw_content: str):
+    analysis_prompt = f"""
+    Analyze the following PDF content to determine if {brand_name} has {iec['code']} certification.
+
+    Standard: {iec['code']} - {iec['description']}
+
+    Source PDF URL: {url}
+
+    PDF Content:
+    {raw_content}
+
+    IMPORTANT Instructions:
+    1. Look for certification details including:
+       - Certificate number
+       - Testing laboratory (TÜV, UL, SGS, Intertek, etc.)
+       - Product model/series covered
+       - Validity dates (issue date and expiry date)
+
+    2. For validity dates, look for:
+       - "Valid until", "Validity", "Expiry date", "Valid from... to..."
+       - Certificate issue date and duration
+       - Any expiration or renewal dates
+
+    3. Extract all dates in YYYY-MM-DD format
+
+    Return a JSON response with this exact structure:
+    {{
+        "has_certification": true/false,
+        "confidence": 0.0 to 1.0,
+        "evidence_type": "certificate"|"datasheet"|"test_report"|"not_found",
+        "certificate_number": "certificate number if found, or null",
+        "testing_lab": "name of testing laboratory if found, or null",
+        "product_models": "models/series covered if found, or null",
+        "key_evidence": "specific quote showing certification",
+        "issue_date": "YYYY-MM-DD format if found, or null",
+        "valid_until": "YYYY-MM-DD format if found, or null",
+        "date_source": "exact text where dates were found, or null"
+    }}
+    """
+    return [
+        {
+            "role": "system",
+            "content": "You are a technical compliance analyst specializing in solar panel certifications. Analyze PDF certificates carefully, extract all relevant details including validity dates. Return only valid JSON.",
+        },
+        {"role": "user", "content": analysis_prompt},
+    ]
 
-            raw_content = sr.get("raw_content", "")
-            if not raw_content:
-                raw_content = sr.get("content", "")
 
-            if not raw_content:
-                continue
+def _panel_url_messages(brand_name: str, iec: Dict[str, Any], url: str, raw_content: str):
+    analysis_prompt = f"""
+    Analyze the following content to determine if {brand_name} has {iec['code']} certification.
 
-            print(f"    Analyzing PDF: {url}")
-
-            # Analyze PDF content with LLM
-            analysis_prompt = f"""
-            Analyze the following PDF content to determine if {brand_name} has {iec['code']} certification.
-            
-            Standard: {iec['code']} - {iec['description']}
-            
-            Source PDF URL: {url}
-            
-            PDF Content:
-            {raw_content}
-            
-            IMPORTANT Instructions:
-            1. Look for certification details including:
-               - Certificate number
-               - Testing laboratory (TÜV, UL, SGS, Intertek, etc.)
-               - Product model/series covered
-               - Validity dates (issue date and expiry date)
-            
-            2. For validity dates, look for:
-               - "Valid until", "Validity", "Expiry date", "Valid from... to..."
-               - Certificate issue date and duration
-               - Any expiration or renewal dates
-            
-            3. Extract all dates in YYYY-MM-DD format
-            
-            Return a JSON response with this exact structure:
-            {{
-                "has_certification": true/false,
-                "confidence": 0.0 to 1.0,
-                "evidence_type": "certificate"|"datasheet"|"test_report"|"not_found",
-                "certificate_number": "certificate number if found, or null",
-                "testing_lab": "name of testing laboratory if found, or null",
-                "product_models": "models/series covered if found, or null",
-                "key_evidence": "specific quote showing certification",
-                "issue_date": "YYYY-MM-DD format if found, or null",
-                "valid_until": "YYYY-MM-DD format if found, or null",
-                "date_source": "exact text where dates were found, or null"
-            }}
-            """
-
-            messages = [
-                {
-                    "role": "system",
-                    "content": "You are a technical compliance analyst specializing in solar panel certifications. Analyze PDF certificates carefully, extract all relevant details including validity dates. Return only valid JSON.",
-                },
-                {"role": "user", "content": analysis_prompt},
-            ]
+    Standard: {iec['code']} - {iec['description']}
 
-            try:
-                llm_response = llm_client.chat(messages, response_format={"type": "json_object"})
-                analysis = json.loads(llm_response)
-
-                if (
-                    analysis.get("evidence_type") != "not_found"
-                    and analysis.get("confidence", 0) > 0.3
-                ):
-                    found_evidence = True
-                    final_analysis = analysis
-                    used_url = url
-                    search_type = "PDF"
-                    break
+    Source URL: {url}
 
-            except Exception as e:
-                print(f"    Error analyzing PDF {url}: {str(e)}")
-                continue
+    Content:
+    {raw_content}
 
-        # STEP 2: If no PDF evidence found, fallback to regular URL search
-        if not found_evidence:
-            print(f"  Step 2: No PDF evidence found. Searching regular URLs...")
-
-            url_search_results = tavily.search(
-                query=iec["url_query"],
-                search_depth="advanced",
-                max_results=2,
-                include_answer="advanced",
-                include_raw_content="text",
-            )
-
-            result["web_searches_performed"].append(
-                {
-                    "standard": iec["code"],
-                    "query": iec["url_query"],
-                    "search_type": "URL",
-                    "results_count": len(url_search_results.get("results", [])),
-                }
-            )
-
-            # Try each URL result
-            for sr in url_search_results.get("results", []):
-                url = sr.get("url", "")
-                if not url or url == "N/A":
-                    continue
-
-                # Skip PDFs in URL search
-                if url.lower().endswith(".pdf"):
-                    continue
-
-                raw_content = sr.get("raw_content", "")
-                if not raw_content:
-                    raw_content = sr.get("content", "")
-
-                if not raw_content:
-                    continue
-
-                print(f"    Analyzing URL: {url}")
-
-                # Analyze URL content with LLM
-                analysis_prompt = f"""
-                Analyze the following content to determine if {brand_name} has {iec['code']} certification.
-                
-                Standard: {iec['code']} - {iec['description']}
-                
-                Source URL: {url}
-                
-                Content:
-                {raw_content}
-                
-                IMPORTANT Instructions for date extraction:
-                1. Look for publication or update dates in ANY format, including:
-                   - "Feb 01, 2023 EST" or "February 1, 2023"
-                   - "Published: date", "Updated: date", "Posted: date"
-                   - Date in headers, footers, or metadata sections
-                   - Date formats like MM/DD/YYYY, DD/MM/YYYY, Month DD YYYY, etc.
-                2. Convert any found date to YYYY-MM-DD format
-                3. Look for certification evidence even if not in certificate form
-                
-                Return a JSON response with this exact structure:
-                {{
-                    "has_certification": true/false,
-                    "confidence": 0.0 to 1.0,
-                    "evidence_type": "certificate"|"datasheet"|"report"|"commitment"|"not_found",
-                    "key_evidence": "specific quote or reference from the content",
-                    "published_date": "YYYY-MM-DD format if found, or null",
-                    "date_source": "exact text where date was found, or null"
-                }}
-                """
-
-                messages = [
-                    {
-                        "role": "system",
-                        "content": "You are a technical compliance analyst. Analyze certification evidence carefully. Be thorough in extracting dates. Return only valid JSON.",
-                    },
-                    {"role": "user", "content": analysis_prompt},
-                ]
-
-                try:
-                    llm_response = llm_client.chat(
-                        messages, response_format={"type": "json_object"}
-                    )
-                    analysis = json.loads(llm_response)
-
-                    if (
-                        analysis.get("evidence_type") != "not_found"
-                        and analysis.get("confidence", 0) > 0.3
-                    ):
-                        found_evidence = True
-                        final_analysis = analysis
-                        used_url = url
-                        search_type = "URL"
-                        break
-
-                except Exception as e:
-                    print(f"    Error analyzing URL {url}: {str(e)}")
-                    continue
-
-        # STEP 3: Store results based on what was found
-        if found_evidence and final_analysis:
-            score = 0.0
-            if final_analysis.get("has_certification"):
-                score = 1.0
-                # Check if certificate is still valid (for PDFs)
-                if search_type == "PDF" and final_analysis.get("valid_until"):
-                    try:
-                        from datetime import datetime
-
-                        expiry_date = datetime.strptime(final_analysis["valid_until"], "%Y-%m-%d")
-                        if expiry_date < datetime.now():
-                            score = 0.5  # Expired certificate
-                            final_analysis["evidence_type"] = "expired_certificate"
-                    except:
-                        pass
-            elif final_analysis.get("evidence_type") == "commitment":
-                score = 0.5
-
-            result["iec_certificates"][iec["code"]] = {
-                "score": score,
-                "description": iec["description"],
-                "mandatory": iec["mandatory"],
-                "weight": iec["weight"],
-                "evidence": final_analysis.get("key_evidence", "No evidence found"),
-                "source": used_url,
-                "search_type": search_type,
-                "confidence": final_analysis.get("confidence", 0.0),
-                "evidence_type": final_analysis.get("evidence_type"),
-            }
+    IMPORTANT Instructions for date extraction:
+    1. Look for publication or update dates in ANY format, including:
+       - "Feb 01, 2023 EST" or "February 1, 2023"
+       - "Published: date", "Updated: date", "Posted: date"
+       - Date in headers, footers, or metadata sections
+       - Date formats like MM/DD/YYYY, DD/MM/YYYY, Month DD YYYY, etc.
+    2. Convert any found date to YYYY-MM-DD format
+    3. Look for certification evidence even if not in certificate form
 
-            # Add PDF-specific fields if from PDF
-            if search_type == "PDF":
-                result["iec_certificates"][iec["code"]].update(
-                    {
-                        "certificate_number": final_analysis.get("certificate_number"),
-                        "testing_lab": final_analysis.get("testing_lab"),
-                        "product_models": final_analysis.get("product_models"),
-                        "issue_date": final_analysis.get("issue_date"),
-                        "valid_until": final_analysis.get("valid_until"),
-                        "date_source": final_analysis.get("date_source"),
-                    }
-                )
-            else:
-                # URL search results
-                result["iec_certificates"][iec["code"]].update(
-                    {
-                        "published_date": final_analysis.get("published_date"),
-                        "date_source": final_analysis.get("date_source"),
-                    }
-                )
+    Return a JSON response with this exact structure:
+    {{
+        "has_certification": true/false,
+        "confidence": 0.0 to 1.0,
+        "evidence_type": "certificate"|"datasheet"|"report"|"commitment"|"not_found",
+        "key_evidence": "specific quote or reference from the content",
+        "published_date": "YYYY-MM-DD format if found, or null",
+        "date_source": "exact text where date was found, or null"
+    }}
+    """
+    return [
+        {
+            "role": "system",
+            "content": "You are a technical compliance analyst. Analyze certification evidence carefully. Be thorough in extracting dates. Return only valid JSON.",
+        },
+        {"role": "user", "content": analysis_prompt},
+    ]
 
-        else:
-            print(f"  No evidence found for {iec['code']} after PDF and URL searches")
-            result["iec_certificates"][iec["code"]] = {
-                "score": 0.0,
-                "description": iec["description"],
-                "mandatory": iec["mandatory"],
-                "weight": iec["weight"],
-                "evidence": "No evidence found in PDFs or web pages",
-                "source": "N/A",
-                "search_type": "not_found",
-                "confidence": 0.0,
-                "evidence_type": "not_found",
-            }
 
-    # Search for Bankability (Bloomberg Tier 1) with PDF fallback
-    print("Searching for Bankability...")
+def _inverter_pdf_messages(inverter_brand: str, iec: Dict[str, Any], url: str, raw_content: str):
+    analysis_prompt = f"""
+    Analyze the following PDF content to determine if {inverter_brand} inverter has {iec['code']} certification/compliance.
 
-    # First try PDF search for bankability
-    bankability_pdf_query = (
-        f"Bloomberg BNEF Tier 1 {brand_name} solar manufacturer list filetype:pdf"
-    )
-    bank_pdf_search = tavily.search(
-        query=bankability_pdf_query,
-        search_depth="advanced",
-        max_results=2,
-        include_answer="advanced",
-        include_raw_content="text",
-    )
+    Standard: {iec['code']} - {iec['description']}
+
+    Source PDF URL: {url}
+
+    PDF Content:
+    {raw_content}
 
-    result["web_searches_performed"].append(
+    IMPORTANT Instructions:
+    1. Look for certification details including:
+       - Certificate number
+       - Testing laboratory (TÜV, UL, SGS, Intertek, VDE, etc.)
+       - Product model/series covered
+       - Validity dates (issue date and expiry date)
+
+    2. Extract all dates in YYYY-MM-DD format
+
+    Return a JSON response with this exact structure:
+    {{
+        "has_certification": true/false,
+        "confidence": 0.0 to 1.0,
+        "evidence_type": "certificate"|"datasheet"|"test_report"|"not_found",
+        "certificate_number": "certificate number if found, or null",
+        "testing_lab": "name of testing laboratory if found, or null",
+        "product_models": "models/series covered if found, or null",
+        "key_evidence": "specific quote showing certification",
+        "issue_date": "YYYY-MM-DD format if found, or null",
+        "valid_until": "YYYY-MM-DD format if found, or null",
+        "date_source": "exact text where dates were found, or null"
+    }}
+    """
+    return [
         {
-            "type": "bankability_pdf",
-            "query": bankability_pdf_query,
-            "results_count": len(bank_pdf_search.get("results", [])),
-        }
-    )
+            "role": "system",
+            "content": "You are a technical compliance analyst specializing in solar inverter certifications. Analyze PDF certificates carefully. Return only valid JSON.",
+        },
+        {"role": "user", "content": analysis_prompt},
+    ]
 
-    found_bank = False
-    bank_search_type = "not_found"
-
-    # Try PDF results first
-    for sr in bank_pdf_search.get("results", []):
-        url = sr.get("url", "")
-        if not url or url == "N/A" or not url.lower().endswith(".pdf"):
-            continue
-
-        raw_content = sr.get("raw_content", "")
-        if not raw_content:
-            raw_content = sr.get("content", "")
-
-        if not raw_content:
-            continue
-
-        print(f"  Analyzing PDF content from: {url}")
-
-        bank_prompt = f"""
-        Analyze {brand_name}'s bankability and Bloomberg BNEF Tier 1 status from this PDF document.
-        
-        Source PDF URL: {url}
-        
-        Content:
-        {raw_content}
-        
-        IMPORTANT: Extract document date and validity period if mentioned.
-        
-        Return JSON:
-        {{
-            "tier_1_status": true/false,
-            "rating": "AAA"|"AA"|"A"|"BBB"|"BB"|"B"|"CCC"|"not_listed",
-            "evidence": "specific quote about tier 1 status or rating",
-            "published_date": "YYYY-MM-DD format if found, or null",
-            "valid_until": "YYYY-MM-DD format if found, or null",
-            "date_source": "exact text where date was found, or null"
-        }}
-        """
-
-        messages = [
-            {
-                "role": "system",
-                "content": "Analyze solar manufacturer bankability from PDF documents. Extract dates and validity periods. Return only valid JSON.",
-            },
-            {"role": "user", "content": bank_prompt},
-        ]
 
-        try:
-            llm_response = llm_client.chat(messages, response_format={"type": "json_object"})
-            bank_analysis = json.loads(llm_response)
-
-            if bank_analysis.get("tier_1_status") or bank_analysis.get("rating") != "not_listed":
-                rating_scores = {
-                    "AAA": 1.0,
-                    "AA": 1.0,
-                    "A": 1.0,
-                    "BBB": 0.75,
-                    "BB": 0.75,
-                    "B": 0.75,
-                    "CCC": 0.5,
-                    "not_listed": 0.0,
-                }
-
-                result["bankability"] = {
-                    "score": rating_scores.get(bank_analysis.get("rating", "not_listed"), 0.0),
-                    "tier_1": bank_analysis.get("tier_1_status", False),
-                    "rating": bank_analysis.get("rating", "not_listed"),
-                    "evidence": bank_analysis.get("evidence", "No evidence found"),
-                    "source": url,
-                    "search_type": "PDF",
-                    "published_date": bank_analysis.get("published_date"),
-                    "valid_until": bank_analysis.get("valid_until"),
-                    "date_source": bank_analysis.get("date_source"),
-                    "weight": 0.10,
-                }
-                found_bank = True
-                bank_search_type = "PDF"
-                break
+def _inverter_url_messages(inverter_brand: str, iec: Dict[str, Any], url: str, raw_content: str):
+    analysis_prompt = f"""
+    Analyze the following content to determine if {inverter_brand} inverter has {iec['code']} certification/compliance.
 
-        except Exception as e:
-            print(f"  Error analyzing PDF {url}: {str(e)}")
-            continue
-
-    # If no PDF evidence, try regular URL search
-    if not found_bank:
-        print("  No PDF evidence found. Searching regular URLs for bankability...")
-
-        bankability_url_query = f"Is {brand_name} listed as a Bloomberg Tier 1 solar manufacturer or equivalent? Provide latest Bloomberg New Energy Finance BNEF report. -filetype:pdf"
-        bank_url_search = tavily.search(
-            query=bankability_url_query,
-            search_depth="advanced",
-            max_results=2,
-            include_answer="advanced",
-            include_raw_content="text",
-        )
+    Standard: {iec['code']} - {iec['description']}
 
-        result["web_searches_performed"].append(
-            {
-                "type": "bankability_url",
-                "query": bankability_url_query,
-                "results_count": len(bank_url_search.get("results", [])),
-            }
-        )
+    Source URL: {url}
 
-        for sr in bank_url_search.get("results", []):
-            url = sr.get("url", "")
-            if not url or url == "N/A" or url.lower().endswith(".pdf"):
-                continue
+    Content:
+    {raw_content}
 
-            raw_content = sr.get("raw_content", "")
-            if not raw_content:
-                raw_content = sr.get("content", "")
+    IMPORTANT: Extract publication dates in ANY format and convert to YYYY-MM-DD.
 
-            if not raw_content:
-                continue
+    Return a JSON response with this exact structure:
+    {{
+        "has_certification": true/false,
+        "confidence": 0.0 to 1.0,
+        "evidence_type": "certificate"|"datasheet"|"report"|"commitment"|"not_found",
+        "key_evidence": "specific quote or reference from the content",
+        "published_date": "YYYY-MM-DD format if found, or null",
+        "date_source": "exact text where date was found, or null"
+    }}
+    """
+    return [
+        {
+            "role": "system",
+            "content": "You are a technical compliance analyst specializing in inverter certifications. Return only valid JSON.",
+        },
+        {"role": "user", "content": analysis_prompt},
+    ]
 
-            print(f"  Analyzing URL content from: {url}")
-
-            bank_prompt = f"""
-            Analyze {brand_name}'s bankability and Bloomberg BNEF Tier 1 status.
-            
-            Source URL: {url}
-            
-            Content:
-            {raw_content}
-            
-            IMPORTANT: Extract publication date in ANY format.
-            
-            Return JSON:
-            {{
-                "tier_1_status": true/false,
-                "rating": "AAA"|"AA"|"A"|"BBB"|"BB"|"B"|"CCC"|"not_listed",
-                "evidence": "specific quote about tier 1 status or rating",
-                "published_date": "YYYY-MM-DD format if found, or null",
-                "date_source": "exact text where date was found, or null"
-            }}
-            """
-
-            messages = [
-                {
-                    "role": "system",
-                    "content": "Analyze solar manufacturer bankability. Extract dates in any format. Return only valid JSON.",
-                },
-                {"role": "user", "content": bank_prompt},
-            ]
 
-            try:
-                llm_response = llm_client.chat(messages, response_format={"type": "json_object"})
-                bank_analysis = json.loads(llm_response)
-
-                if (
-                    bank_analysis.get("tier_1_status")
-                    or bank_analysis.get("rating") != "not_listed"
-                ):
-                    rating_scores = {
-                        "AAA": 1.0,
-                        "AA": 1.0,
-                        "A": 1.0,
-                        "BBB": 0.75,
-                        "BB": 0.75,
-                        "B": 0.75,
-                        "CCC": 0.5,
-                        "not_listed": 0.0,
-                    }
-
-                    result["bankability"] = {
-                        "score": rating_scores.get(bank_analysis.get("rating", "not_listed"), 0.0),
-                        "tier_1": bank_analysis.get("tier_1_status", False),
-                        "rating": bank_analysis.get("rating", "not_listed"),
-                        "evidence": bank_analysis.get("evidence", "No evidence found"),
-                        "source": url,
-                        "search_type": "URL",
-                        "published_date": bank_analysis.get("published_date"),
-                        "date_source": bank_analysis.get("date_source"),
-                        "weight": 0.10,
-                    }
-                    found_bank = True
-                    bank_search_type = "URL"
-                    break
+def _bank_pdf_messages(brand_name: str, url: str, raw_content: str):
+    bank_prompt = f"""
+    Analyze {brand_name}'s bankability and Bloomberg BNEF Tier 1 status from this PDF document.
 
-            except Exception as e:
-                print(f"  Error analyzing URL {url}: {str(e)}")
-                continue
+    Source PDF URL: {url}
 
-    if not found_bank:
-        result["bankability"]["search_type"] = "not_found"
-        result["bankability"]["published_date"] = None
-        result["bankability"]["date_source"] = None
+    Content:
+    {raw_content}
 
-    # Calculate overall weighted score
-    total_score = 0.0
-    total_weight = 0.0
+    IMPORTANT: Extract document date and validity period if mentioned.
 
-    for iec_code, iec_data in result["iec_certificates"].items():
-        total_score += iec_data["score"] * iec_data["weight"]
-        total_weight += iec_data["weight"]
+    Return JSON:
+    {{
+        "tier_1_status": true/false,
+        "rating": "AAA"|"AA"|"A"|"BBB"|"BB"|"B"|"CCC"|"not_listed",
+        "evidence": "specific quote about tier 1 status or rating",
+        "published_date": "YYYY-MM-DD format if found, or null",
+        "valid_until": "YYYY-MM-DD format if found, or null",
+        "date_source": "exact text where date was found, or null"
+    }}
+    """
+    return [
+        {
+            "role": "system",
+            "content": "Analyze solar manufacturer bankability from PDF documents. Extract dates and validity periods. Return only valid JSON.",
+        },
+        {"role": "user", "content": bank_prompt},
+    ]
 
-    total_score += result["bankability"]["score"] * result["bankability"]["weight"]
-    total_weight += result["bankability"]["weight"]
 
-    # result["overall_score"] = total_score / total_weight if total_weight > 0 else 0.0
-    # result["total_weight"] = total_weight
+def _bank_url_messages(brand_name: str, url: str, raw_content: str):
+    bank_prompt = f"""
+    Analyze {brand_name}'s bankability and Bloomberg BNEF Tier 1 status.
 
-    return result
+    Source URL: {url}
 
+    Content:
+    {raw_content}
 
-def evaluate_inverter_compliance(inverter_brand: str) -> Dict[str, Any]:
+    IMPORTANT: Extract publication date in ANY format.
+
+    Return JSON:
+    {{
+        "tier_1_status": true/false,
+        "rating": "AAA"|"AA"|"A"|"BBB"|"BB"|"B"|"CCC"|"not_listed",
+        "evidence": "specific quote about tier 1 status or rating",
+        "published_date": "YYYY-MM-DD format if found, or null",
+        "date_source": "exact text where date was found, or null"
+    }}
     """
-    Evaluate solar inverter brand compliance through web search and document analysis.
+    return [
+        {
+            "role": "system",
+            "content": "Analyze solar manufacturer bankability. Extract dates in any format. Return only valid JSON.",
+        },
+        {"role": "user", "content": bank_prompt},
+    ]
+
+
+def _check_iec(searcher, llm_client, brand: str, iec: Dict[str, Any], kind: str) -> Dict[str, Any]:
+    """Run the PDF-then-URL search for one (brand, IEC standard) pair."""
+    if kind == "inverter":
+        log = [f"Searching for inverter {iec['code']} compliance..."]
+        pdf_messages, url_messages = _inverter_pdf_messages, _inverter_url_messages
+    else:
+        log = [f"Searching for {iec['code']}..."]
+        pdf_messages, url_messages = _panel_pdf_messages, _panel_url_messages
+
+    analysis, url, search_type, searches = _pdf_then_url(
+        searcher,
+        llm_client,
+        brand=brand,
+        standard=iec["code"],
+        pdf_query=iec["pdf_query"],
+        url_query=iec["url_query"],
+        pdf_max_results=3,
+        url_max_results=2,
+        pdf_messages=lambda u, c: pdf_messages(brand, iec, u, c),
+        url_messages=lambda u, c: url_messages(brand, iec, u, c),
+        accept=_iec_accept,
+        log=log,
+    )
+    if not analysis:
+        log.append(f"  No evidence found for {iec['code']} after PDF and URL searches")
+    return {
+        "code": iec["code"],
+        "entry": _iec_entry(iec, analysis, url, search_type),
+        "searches": [
+            {"standard": iec["code"], "query": q, "search_type": st, "results_count": n}
+            for st, q, n in searches
+        ],
+        "log": log,
+    }
+
+
+def _mentions(brand: str, text: str) -> bool:
+    return brand.lower() in (text or "").lower()
+
+
+def _check_bankability(
+    searcher, llm_client, brand_name: str, shared: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Search for Bloomberg Tier 1 / bankability evidence, PDFs first.
+
+    ``shared`` is a brand-agnostic Tier 1 list search (see ``_shared_bankability_search``);
+    any of its PDFs that mention the brand are analyzed before running per-brand searches.
     """
+    log = ["Searching for Bankability..."]
+    pdf_query = f"Bloomberg BNEF Tier 1 {brand_name} solar manufacturer list filetype:pdf"
+    url_query = f"Is {brand_name} listed as a Bloomberg Tier 1 solar manufacturer or equivalent? Provide latest Bloomberg New Energy Finance BNEF report. -filetype:pdf"
+
+    analysis, url, search_type, searches = None, "N/A", "not_found", []
+    shared_searches: List[Dict[str, Any]] = []
+    if shared:
+        hits = [
+            sr
+            for sr in shared.get("results", [])
+            if (sr.get("url") or "").lower().endswith(".pdf")
+            and _mentions(brand_name, _raw_content(sr))
+        ]
+        shared_searches.append(
+            {"type": "bankability_shared_pdf", "query": shared.get("query"), "results_count": len(hits)}
+        )
+        for sr in hits:
+            log.append(f"  Analyzing shared PDF content from: {sr['url']}")
+            try:
+                cand = _analyze_cached(
+                    llm_client,
+                    _bank_pdf_messages(
+                        brand_name, sr["url"], _analysis_content(sr, brand_name, "bankability")
+                    ),
+                    brand=brand_name,
+                    standard="bankability",
+                    url=sr["url"],
+                )
+            except Exception as e:
+                log.append(f"  Error analyzing PDF {sr['url']}: {str(e)}")
+                continue
+            if _bank_accept(cand):
+                analysis, url, search_type = cand, sr["url"], "PDF"
+                break
 
-    # Initialize Tavily
-    tavily_api_key = os.getenv("TAVILY_API_KEY")
-    if not tavily_api_key:
-        raise ValueError("TAVILY_API_KEY environment variable not set")
-
-    tavily = TavilyClient(api_key=tavily_api_key)
-    llm_client = _llm_client(provider="openai", model=None)
-
-    APPROVED_INVERTER_BRANDS = [
-        "Sungrow",
-        "Fronius",
-        "SolarEdge",
-        "Victron Energy",
-        "Deye",
-        "Solis",
-        "Huawei",
-    ]
+    if not analysis:
+        analysis, url, search_type, searches = _pdf_then_url(
+            searcher,
+            llm_client,
+            brand=brand_name,
+            standard="bankability",
+            pdf_query=pdf_query,
+            url_query=url_query,
+            pdf_max_results=2,
+            url_max_results=2,
+            pdf_messages=lambda u, c: _bank_pdf_messages(brand_name, u, c),
+            url_messages=lambda u, c: _bank_url_messages(brand_name, u, c),
+            accept=_bank_accept,
+            log=log,
+        )
+
+    if analysis:
+        entry = {
+            "score": RATING_SCORES.get(analysis.get("rating", "not_listed"), 0.0),
+            "tier_1": analysis.get("tier_1_status", False),
+            "rating": analysis.get("rating", "not_listed"),
+            "evidence": analysis.get("evidence", "No evidence found"),
+            "source": url,
+            "search_type": search_type,
+            "published_date": analysis.get("published_date"),
+        }
+        if search_type == "PDF":
+            entry["valid_until"] = analysis.get("valid_until")
+        entry["date_source"] = analysis.get("date_source")
+        entry["weight"] = 0.10
+    else:
+        entry = _bank_not_found_entry()
+
+    return {
+        "code": "bankability",
+        "entry": entry,
+        "searches": shared_searches
+        + [
+            {"type": f"bankability_{st.lower()}", "query": q, "results_count": n}
+            for st, q, n in searches
+        ],
+        "log": log,
+    }
+
+
+def _bank_not_found_entry() -> Dict[str, Any]:
+    return {
+        "score": 0.0,
+        "evidence": "Not found",
+        "weight": 0.10,
+        "search_type": "not_found",
+        "published_date": None,
+        "date_source": None,
+    }
+
+
+def _failed_check(code: str, entry: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+    """A check that raised (search or LLM outage), scored as not found and flagged with the error."""
+    msg = f"{type(error).__name__}: {error}"
+    return {
+        "code": code,
+        "entry": {**entry, "error": msg},
+        "searches": [],
+        "log": [f"  {code} check failed: {msg}"],
+        "error": msg,
+    }
+
+
+def _run_checks(jobs: List[Callable[[], Dict[str, Any]]], max_workers: int) -> List[Dict[str, Any]]:
+    """Run independent checks on a bounded pool; results keep submission order."""
+    workers = max(1, min(max_workers, len(jobs) or 1))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(job) for job in jobs]
+        outs = [f.result() for f in futures]
+    for out in outs:
+        for line in out.get("log") or []:
+            print(line)
+    return outs
+
+
+def _new_panel_result(brand_name: str) -> Dict[str, Any]:
+    # Initialize result structure
+    return {
+        "brand": {
+            "name": brand_name,
+            "score": 1.0 if brand_name in APPROVED_BRANDS else 0.5,
+            "in_approved_list": brand_name in APPROVED_BRANDS,
+            "evidence": (
+                "In approved list" if brand_name in APPROVED_BRANDS else "Manually specified"
+            ),
+        },
+        "iec_certificates": {},
+        "factory_reports": {"score": 0.0, "evidence": "Not found", "weight": 0.10},
+        "bankability": {"score": 0.0, "evidence": "Not found", "weight": 0.10},
+        "overall_score": 0.0,
+        "web_searches_performed": [],
+    }
 
+
+def _new_inverter_result(inverter_brand: str) -> Dict[str, Any]:
     # Initialize result structure
-    result = {
+    return {
         "inverter_brand": {
             "name": inverter_brand,
             "score": 1.0 if inverter_brand in APPROVED_INVERTER_BRANDS else 0.5,
@@ -637,325 +751,160 @@ def evaluate_inverter_compliance(inverter_brand: str) -> Dict[str, Any]:
         "web_searches_performed": [],
     }
 
-    # Define IEC inverter standards with both PDF and URL queries
-    iec_inverter_standards = [
-        {
-            "code": "IEC 62109",
-            "description": "Safety requirements for power converters used in photovoltaic systems",
-            "mandatory": True,
-            "weight": 0.10,
-            "pdf_query": f"IEC 62109 {inverter_brand} inverter safety certification filetype:pdf",
-            "url_query": f"Does {inverter_brand} inverter comply with IEC 62109 safety standard? -filetype:pdf",
-        },
-        {
-            "code": "IEC 61727",
-            "description": "Photovoltaic systems' interface with the grid (grid code compliance)",
-            "mandatory": True,
-            "weight": 0.10,
-            "pdf_query": f"IEC 61727 {inverter_brand} inverter grid code certification filetype:pdf",
-            "url_query": f"Does {inverter_brand} inverter comply with IEC 61727 grid code standard? -filetype:pdf",
-        },
-        {
-            "code": "IEC 62116",
-            "description": "Test procedure for anti-islanding protection measures",
-            "mandatory": True,
-            "weight": 0.10,
-            "pdf_query": f"IEC 62116 {inverter_brand} inverter anti-islanding test report filetype:pdf",
-            "url_query": f"Is {inverter_brand} inverter tested for IEC 62116 anti-islanding protection? -filetype:pdf",
-        },
-        {
-            "code": "IEC 61000",
-            "description": "Electromagnetic compatibility (EMC)",
-            "mandatory": True,
-            "weight": 0.10,
-            "pdf_query": f"IEC 61000 {inverter_brand} inverter EMC certification filetype:pdf",
-            "url_query": f"Does {inverter_brand} inverter comply with IEC 61000 EMC requirements? -filetype:pdf",
-        },
-    ]
 
-    # Search and evaluate each IEC inverter standard with fallback
-    for iec in iec_inverter_standards:
-        print(f"Searching for inverter {iec['code']} compliance...")
-
-        found_evidence = False
-        final_analysis = None
-        used_url = "N/A"
-        search_type = "not_found"
-
-        # STEP 1: First try searching for PDFs
-        print(f"  Step 1: Searching for PDF certificates...")
-        pdf_search_results = tavily.search(
-            query=iec["pdf_query"],
-            search_depth="advanced",
-            max_results=3,
-            include_answer="advanced",
-            include_raw_content="text",
-        )
+def _apply_check(result: Dict[str, Any], out: Dict[str, Any]) -> None:
+    result["web_searches_performed"].extend(out["searches"])
+    if out.get("error"):
+        result.setdefault("errors", []).append({"check": out["code"], "error": out["error"]})
+    if out["code"] == "bankability":
+        result["bankability"] = out["entry"]
+    elif "iec_inverter_certificates" in result:
+        result["iec_inverter_certificates"][out["code"]] = out["entry"]
+    else:
+        result["iec_certificates"][out["code"]] = out["entry"]
+
+
+def evaluate_brand_compliance(
+    brand_name: str,
+    max_workers: int = DEFAULT_BRAND_WORKERS,
+    search_provider: Optional[SearchProvider] = None,
+    provider: str = "openai",
+    model: str = "",
+) -> Dict[str, Any]:
+    """
+    Evaluate solar panel brand compliance through web search and document analysis.
 
-        result["web_searches_performed"].append(
-            {
-                "standard": iec["code"],
-                "query": iec["pdf_query"],
-                "search_type": "PDF",
-                "results_count": len(pdf_search_results.get("results", [])),
-            }
-        )
+    ``provider``/``model`` select the analysis LLM (see ``LLMClient``); with ``mock`` or
+    ``replay`` and a local search provider the evaluation runs fully offline.
+    """
 
-        # Try each PDF result
-        for sr in pdf_search_results.get("results", []):
-            url = sr.get("url", "")
-            if not url or url == "N/A":
-                continue
+    searcher = _search_provider(search_provider)
+    llm_client = _llm_client(provider=provider, model=model)
 
-            # Check if URL is actually a PDF
-            if not url.lower().endswith(".pdf"):
-                continue
+    result = _new_panel_result(brand_name)
 
-            raw_content = sr.get("raw_content", "")
-            if not raw_content:
-                raw_content = sr.get("content", "")
+    # Each IEC standard and the bankability lookup are independent checks
+    jobs: List[Callable[[], Dict[str, Any]]] = [
+        (lambda iec=iec: _check_iec(searcher, llm_client, brand_name, iec, "panel"))
+        for iec in _panel_iec_standards(brand_name)
+    ]
+    jobs.append(lambda: _check_bankability(searcher, llm_client, brand_name))
 
-            if not raw_content:
-                continue
+    for out in _run_checks(jobs, max_workers):
+        _apply_check(result, out)
 
-            print(f"    Analyzing PDF: {url}")
-
-            # Analyze PDF content with LLM
-            analysis_prompt = f"""
-            Analyze the following PDF content to determine if {inverter_brand} inverter has {iec['code']} certification/compliance.
-            
-            Standard: {iec['code']} - {iec['description']}
-            
-            Source PDF URL: {url}
-            
-            PDF Content:
-            {raw_content}
-            
-            IMPORTANT Instructions:
-            1. Look for certification details including:
-               - Certificate number
-               - Testing laboratory (TÜV, UL, SGS, Intertek, VDE, etc.)
-               - Product model/series covered
-               - Validity dates (issue date and expiry date)
-            
-            2. Extract all dates in YYYY-MM-DD format
-            
-            Return a JSON response with this exact structure:
-            {{
-                "has_certification": true/false,
-                "confidence": 0.0 to 1.0,
-                "evidence_type": "certificate"|"datasheet"|"test_report"|"not_found",
-                "certificate_number": "certificate number if found, or null",
-                "testing_lab": "name of testing laboratory if found, or null",
-                "product_models": "models/series covered if found, or null",
-                "key_evidence": "specific quote showing certification",
-                "issue_date": "YYYY-MM-DD format if found, or null",
-                "valid_until": "YYYY-MM-DD format if found, or null",
-                "date_source": "exact text where dates were found, or null"
-            }}
-            """
-
-            messages = [
-                {
-                    "role": "system",
-                    "content": "You are a technical compliance analyst specializing in solar inverter certifications. Analyze PDF certificates carefully. Return only valid JSON.",
-                },
-                {"role": "user", "content": analysis_prompt},
-            ]
+    return result
 
-            try:
-                llm_response = llm_client.chat(messages, response_format={"type": "json_object"})
-                analysis = json.loads(llm_response)
-
-                if (
-                    analysis.get("evidence_type") != "not_found"
-                    and analysis.get("confidence", 0) > 0.3
-                ):
-                    found_evidence = True
-                    final_analysis = analysis
-                    used_url = url
-                    search_type = "PDF"
-                    break
 
-            except Exception as e:
-                print(f"    Error analyzing PDF {url}: {str(e)}")
-                continue
+def evaluate_inverter_compliance(
+    inverter_brand: str,
+    max_workers: int = DEFAULT_BRAND_WORKERS,
+    search_provider: Optional[SearchProvider] = None,
+    provider: str = "openai",
+    model: str = "",
+) -> Dict[str, Any]:
+    """
+    Evaluate solar inverter brand compliance through web search and document analysis.
+    """
 
-        # STEP 2: If no PDF evidence found, fallback to regular URL search
-        if not found_evidence:
-            print(f"  Step 2: No PDF evidence found. Searching regular URLs...")
-
-            url_search_results = tavily.search(
-                query=iec["url_query"],
-                search_depth="advanced",
-                max_results=2,
-                include_answer="advanced",
-                include_raw_content="text",
-            )
-
-            result["web_searches_performed"].append(
-                {
-                    "standard": iec["code"],
-                    "query": iec["url_query"],
-                    "search_type": "URL",
-                    "results_count": len(url_search_results.get("results", [])),
-                }
-            )
-
-            # Try each URL result
-            for sr in url_search_results.get("results", []):
-                url = sr.get("url", "")
-                if not url or url == "N/A":
-                    continue
-
-                # Skip PDFs in URL search
-                if url.lower().endswith(".pdf"):
-                    continue
-
-                raw_content = sr.get("raw_content", "")
-                if not raw_content:
-                    raw_content = sr.get("content", "")
-
-                if not raw_content:
-                    continue
-
-                print(f"    Analyzing URL: {url}")
-
-                # Analyze URL content with LLM
-                analysis_prompt = f"""
-                Analyze the following content to determine if {inverter_brand} inverter has {iec['code']} certification/compliance.
-                
-                Standard: {iec['code']} - {iec['description']}
-                
-                Source URL: {url}
-                
-                Content:
-                {raw_content}
-                
-                IMPORTANT: Extract publication dates in ANY format and convert to YYYY-MM-DD.
-                
-                Return a JSON response with this exact structure:
-                {{
-                    "has_certification": true/false,
-                    "confidence": 0.0 to 1.0,
-                    "evidence_type": "certificate"|"datasheet"|"report"|"commitment"|"not_found",
-                    "key_evidence": "specific quote or reference from the content",
-                    "published_date": "YYYY-MM-DD format if found, or null",
-                    "date_source": "exact text where date was found, or null"
-                }}
-                """
-
-                messages = [
-                    {
-                        "role": "system",
-                        "content": "You are a technical compliance analyst specializing in inverter certifications. Return only valid JSON.",
-                    },
-                    {"role": "user", "content": analysis_prompt},
-                ]
-
-                try:
-                    llm_response = llm_client.chat(
-                        messages, response_format={"type": "json_object"}
-                    )
-                    analysis = json.loads(llm_response)
-
-                    if (
-                        analysis.get("evidence_type") != "not_found"
-                        and analysis.get("confidence", 0) > 0.3
-                    ):
-                        found_evidence = True
-                        final_analysis = analysis
-                        used_url = url
-                        search_type = "URL"
-                        break
-
-                except Exception as e:
-                    print(f"    Error analyzing URL {url}: {str(e)}")
-                    continue
-
-        # STEP 3: Store results based on what was found
-        if found_evidence and final_analysis:
-            score = 0.0
-            if final_analysis.get("has_certification"):
-                score = 1.0
-                # Check if certificate is still valid (for PDFs)
-                if search_type == "PDF" and final_analysis.get("valid_until"):
-                    try:
-                        from datetime import datetime
-
-                        expiry_date = datetime.strptime(final_analysis["valid_until"], "%Y-%m-%d")
-                        if expiry_date < datetime.now():
-                            score = 0.5  # Expired certificate
-                            final_analysis["evidence_type"] = "expired_certificate"
-                    except:
-                        pass
-            elif final_analysis.get("evidence_type") == "commitment":
-                score = 0.5
-
-            result["iec_inverter_certificates"][iec["code"]] = {
-                "score": score,
-                "description": iec["description"],
-                "mandatory": iec["mandatory"],
-                "weight": iec["weight"],
-                "evidence": final_analysis.get("key_evidence", "No evidence found"),
-                "source": used_url,
-                "search_type": search_type,
-                "confidence": final_analysis.get("confidence", 0.0),
-                "evidence_type": final_analysis.get("evidence_type"),
-            }
+    searcher = _search_provider(search_provider)
+    llm_client = _llm_client(provider=provider, model=model)
 
-            # Add PDF-specific fields if from PDF
-            if search_type == "PDF":
-                result["iec_inverter_certificates"][iec["code"]].update(
-                    {
-                        "certificate_number": final_analysis.get("certificate_number"),
-                        "testing_lab": final_analysis.get("testing_lab"),
-                        "product_models": final_analysis.get("product_models"),
-                        "issue_date": final_analysis.get("issue_date"),
-                        "valid_until": final_analysis.get("valid_until"),
-                        "date_source": final_analysis.get("date_source"),
-                    }
-                )
-            else:
-                # URL search results
-                result["iec_inverter_certificates"][iec["code"]].update(
-                    {
-                        "published_date": final_analysis.get("published_date"),
-                        "date_source": final_analysis.get("date_source"),
-                    }
-                )
+    result = _new_inverter_result(inverter_brand)
 
-        else:
-            print(f"  No evidence found for {iec['code']} after PDF and URL searches")
-            result["iec_inverter_certificates"][iec["code"]] = {
-                "score": 0.0,
-                "description": iec["description"],
-                "mandatory": iec["mandatory"],
-                "weight": iec["weight"],
-                "evidence": "No evidence found in PDFs or web pages",
-                "source": "N/A",
-                "search_type": "not_found",
-                "confidence": 0.0,
-                "evidence_type": "not_found",
-            }
+    jobs: List[Callable[[], Dict[str, Any]]] = [
+        (lambda iec=iec: _check_iec(searcher, llm_client, inverter_brand, iec, "inverter"))
+        for iec in _inverter_iec_standards(inverter_brand)
+    ]
+
+    for out in _run_checks(jobs, max_workers):
+        _apply_check(result, out)
 
-    # Calculate overall weighted score
-    total_score = 0.0
-    total_weight = 0.0
+    return result
 
-    # Add inverter brand score
-    total_score += result["inverter_brand"]["score"] * 0.10
-    total_weight += 0.10
 
-    # Add IEC certificates scores
-    for iec_code, iec_data in result["iec_inverter_certificates"].items():
-        total_score += iec_data["score"] * iec_data["weight"]
-        total_weight += iec_data["weight"]
+def _shared_bankability_search(searcher) -> Dict[str, Any]:
+    """One brand-agnostic Tier 1 list search whose PDFs can answer for every brand."""
+    query = "Bloomberg BNEF Tier 1 solar module manufacturer list filetype:pdf"
+    resp = _search_cached(searcher, query, 3, brand="*", standard="bankability")
+    return {"query": query, "results": resp.get("results", [])}
 
-    # result["overall_score"] = total_score / total_weight if total_weight > 0 else 0.0
-    # result["total_weight"] = total_weight
 
-    return result
+def evaluate_brands_batch(
+    panel_brands: Optional[List[str]] = None,
+    inverter_brands: Optional[List[str]] = None,
+    max_workers: int = DEFAULT_BRAND_WORKERS,
+    search_provider: Optional[SearchProvider] = None,
+    provider: str = "openai",
+    model: str = "",
+) -> Dict[str, Any]:
+    """
+    Evaluate a vendor shortlist: every (brand, standard) check runs on one worker pool.
+
+    A single brand-agnostic Tier 1 list search is shared by the bankability checks of all
+    panel brands, and the search/analysis caches dedupe anything else that repeats. A check
+    that raises is scored as not found, with its ``error`` on the entry and in the brand's
+    ``errors``.
+    """
+    panel_brands = list(dict.fromkeys(b for b in (panel_brands or []) if b))
+    inverter_brands = list(dict.fromkeys(b for b in (inverter_brands or []) if b))
+
+    searcher = _search_provider(search_provider)
+    llm_client = _llm_client(provider=provider, model=model)
+
+    panels = {b: _new_panel_result(b) for b in panel_brands}
+    inverters = {b: _new_inverter_result(b) for b in inverter_brands}
+
+    workers = max(1, max_workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        shared_future = pool.submit(_shared_bankability_search, searcher) if panel_brands else None
+        # (brand result, check code, entry recorded if the check raises, future)
+        futures: List[Tuple[Dict[str, Any], str, Dict[str, Any], Any]] = []
+        for b in panel_brands:
+            for iec in _panel_iec_standards(b):
+                futures.append((
+                    panels[b], iec["code"], _iec_entry(iec, None, "N/A", "not_found"),
+                    pool.submit(_check_iec, searcher, llm_client, b, iec, "panel"),
+                ))
+        for b in inverter_brands:
+            for iec in _inverter_iec_standards(b):
+                futures.append((
+                    inverters[b], iec["code"], _iec_entry(iec, None, "N/A", "not_found"),
+                    pool.submit(_check_iec, searcher, llm_client, b, iec, "inverter"),
+                ))
+
+        shared = None
+        if shared_future is not None:
+            try:
+                shared = shared_future.result()
+            except Exception as e:
+                print(f"Shared bankability search failed: {str(e)}")
+        for b in panel_brands:
+            futures.append((
+                panels[b], "bankability", _bank_not_found_entry(),
+                pool.submit(_check_bankability, searcher, llm_client, b, shared),
+            ))
+
+        # One failing check must not sink the rest of the shortlist
+        for result, code, not_found, fut in futures:
+            try:
+                out = fut.result()
+            except Exception as e:
+                out = _failed_check(code, not_found, e)
+            for line in out.get("log") or []:
+                print(line)
+            _apply_check(result, out)
+
+    return {
+        "solar_panels": list(panels.values()),
+        "inverters": list(inverters.values()),
+        "shared_searches": (
+            [{"type": "bankability_shared_pdf", "query": shared["query"],
+              "results_count": len(shared["results"])}]
+            if shared
+            else []
+        ),
+    }
 
 
 def main():
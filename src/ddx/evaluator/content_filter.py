@@ -0,0 +1,123 @@
+from __future__ import annotations
+import os
+import re
+from typing import List, Optional, Tuple
+
+# Rough chars-per-token ratio used for budgeting; close enough for English/Spanish prose.
+CHARS_PER_TOKEN = 4
+DEFAULT_SOURCE_TOKENS = int(os.getenv("DDX_BRAND_SOURCE_TOKENS", "2000"))
+DEFAULT_WINDOW_CHARS = 300
+
+_MONTHS = (
+    r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?"
+    r"|(?:ene|feb|mar|abr|may|jun|jul|ago|sep|oct|nov|dic)[a-z]*\.?"
+)
+
+_DATE_RE = re.compile(
+    r"\b\d{4}[-/.]\d{1,2}[-/.]\d{1,2}\b"
+    r"|\b\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}\b"
+    rf"|\b(?:{_MONTHS})\s+\d{{1,2}},?\s+\d{{4}}\b"
+    rf"|\b\d{{1,2}}\s+(?:de\s+)?(?:{_MONTHS})\s+(?:de\s+)?\d{{4}}\b"
+    r"|\b(?:valid(?:ity)?(?:\s+until)?|expir\w*|issued?|fecha)\b",
+    re.IGNORECASE,
+)
+
+_CERT_RE = re.compile(
+    r"\b(?:cert(?:ificate)?|report|registration|licen[cs]e)\s*(?:no\.?|nr\.?|number|#)\s*:?\s*"
+    r"[A-Z0-9][A-Z0-9\-/.]{3,}"
+    r"|\b[A-Z]{1,5}[\s\-]?\d{2,}[\-/.]\d{2,}[A-Z0-9\-/.]*\b",
+    re.IGNORECASE,
+)
+
+_BANKABILITY_RE = re.compile(r"\bTier\s*1\b|\bBNEF\b|\bBloomberg\b|\bbankab\w*", re.IGNORECASE)
+
+
+def _standard_pattern(code: str) -> Optional[re.Pattern]:
+    # "IEC TS 62804" should also match "IEC62804", "IEC/TS 62804-1", "TS 62804"
+    m = re.search(r"(\d{4,5})", code or "")
+    if not m:
+        return None
+    return re.compile(rf"\b(?:IEC|EN|TS)?[\s/\-]*(?:TS[\s\-]*)?{m.group(1)}(?:[-:]\d+)*\b", re.I)
+
+
+def _brand_pattern(brand: str) -> Optional[re.Pattern]:
+    words = [w for w in re.split(r"\W+", brand or "") if len(w) >= 2]
+    if not words:
+        return None
+    # Full name, or its first distinctive word ("Trina" for "Trina Solar")
+    alts = [r"\s+".join(map(re.escape, words))]
+    if len(words) > 1 and len(words[0]) >= 3:
+        alts.append(re.escape(words[0]))
+    return re.compile(r"\b(?:" + "|".join(alts) + r")\b", re.IGNORECASE)
+
+
+def _merge(spans: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+    spans.sort()
+    merged: List[Tuple[int, int, int]] = []
+    for start, end, kinds in spans:
+        if merged and start <= merged[-1][1]:
+            s0, e0, k0 = merged[-1]
+            merged[-1] = (s0, max(e0, end), k0 | kinds)
+        else:
+            merged.append((start, end, kinds))
+    return merged
+
+
+def trim_raw_content(
+    text: str,
+    brand: str,
+    standard: Optional[str] = None,
+    max_tokens: int = DEFAULT_SOURCE_TOKENS,
+    window_chars: int = DEFAULT_WINDOW_CHARS,
+) -> str:
+    """Keep only windows around the brand, standard code, certificate numbers and dates.
+
+    Text already within ``max_tokens`` is returned unchanged. Windows are ranked by how many
+    kinds of signal they contain, then emitted in document order until the budget is spent.
+    """
+    text = text or ""
+    budget = max(0, max_tokens) * CHARS_PER_TOKEN
+    if len(text) <= budget:
+        return text
+
+    patterns: List[Tuple[int, re.Pattern]] = [(1, _DATE_RE), (2, _CERT_RE)]
+    bp = _brand_pattern(brand)
+    if bp is not None:
+        patterns.append((4, bp))
+    if standard == "bankability":
+        patterns.append((8, _BANKABILITY_RE))
+    else:
+        sp = _standard_pattern(standard or "")
+        if sp is not None:
+            patterns.append((8, sp))
+
+    spans: List[Tuple[int, int, int]] = []
+    for kind, rx in patterns:
+        for m in rx.finditer(text):
+            spans.append(
+                (max(0, m.start() - window_chars), min(len(text), m.end() + window_chars), kind)
+            )
+    if not spans:
+        return text[:budget] + "\n[...truncated...]"
+
+    windows = _merge(spans)
+    # Windows that combine brand + standard (+ cert/date) beat lone date hits
+    ranked = sorted(
+        range(len(windows)), key=lambda i: (-bin(windows[i][2]).count("1"), -windows[i][2], i)
+    )
+    chosen: List[int] = []
+    used = 0
+    for i in ranked:
+        start, end, _ = windows[i]
+        size = end - start
+        if used + size > budget:
+            if not chosen:
+                chosen.append(i)
+                windows[i] = (start, start + budget, windows[i][2])
+                used = budget
+            continue
+        chosen.append(i)
+        used += size
+
+    parts = [text[windows[i][0]:windows[i][1]].strip() for i in sorted(chosen)]
+    return "\n[...]\n".join(p for p in parts if p)
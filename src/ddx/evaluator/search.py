@@ -0,0 +1,209 @@
+from __future__ import annotations
+import hashlib
+import json
+import math
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ddx.utils.cache import cache_get, cache_put, file_sha256
+
+
+class SearchProvider:
+    """Minimal web-search interface used by the brand evaluator.
+
+    ``search`` returns a Tavily-shaped dict: ``{"query": ..., "results": [{"url", "title",
+    "content", "raw_content", "score"}, ...]}``.
+    """
+
+    name = "base"
+
+    @property
+    def cache_scope(self) -> str:
+        """What cached results of this provider are keyed by; changes when its corpus does."""
+        return self.name
+
+    def search(self, query: str, max_results: int = 5, **kwargs) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class TavilySearchProvider(SearchProvider):
+    name = "tavily"
+
+    def __init__(self, api_key: Optional[str] = None):
+        try:
+            from tavily import TavilyClient  # type: ignore
+        except Exception as e:
+            raise RuntimeError("tavily Python package not installed. `pip install tavily-python`") from e
+        api_key = api_key or os.getenv("TAVILY_API_KEY")
+        if not api_key:
+            raise ValueError("TAVILY_API_KEY environment variable not set")
+        self._client = TavilyClient(api_key=api_key)
+
+    def search(self, query: str, max_results: int = 5, **kwargs) -> Dict[str, Any]:
+        return self._client.search(query=query, max_results=max_results, **kwargs)
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*", re.IGNORECASE)
+_OPERATOR_RE = re.compile(r"(?:^|\s)-?\w+:\S+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "by", "does", "for", "has", "have", "in", "is", "it",
+    "of", "on", "or", "the", "to", "with", "provide", "latest", "equivalent",
+}
+_TEXT_SUFFIXES = {".txt", ".md", ".html", ".htm", ".json", ".csv"}
+_LOCAL_DOC_VERSION = 1
+
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in (m.group(0).lower() for m in _TOKEN_RE.finditer(text or "")) if t not in _STOPWORDS]
+
+
+def _read_local_text(path: Path) -> str:
+    suf = path.suffix.lower()
+    if suf == ".pdf":
+        from ddx.ingestion.pdf import extract_text_pages_from_pdf
+
+        return "\n\n".join(extract_text_pages_from_pdf(path))
+    txt = path.read_text(encoding="utf-8", errors="ignore")
+    if suf in (".html", ".htm"):
+        txt = re.sub(r"(?is)<(script|style)\b.*?</\1>", " ", txt)
+        txt = re.sub(r"(?s)<[^>]+>", " ", txt)
+        txt = re.sub(r"[ \t]+", " ", txt)
+    return txt
+
+
+class LocalSearchProvider(SearchProvider):
+    """Offline stand-in backed by a directory of pre-fetched pages and PDFs.
+
+    Files are indexed once (text + term counts, cached by content hash) and ranked with BM25.
+    ``filetype:pdf`` restricts results to PDFs and ``-filetype:pdf`` excludes them, matching how
+    the brand evaluator phrases its queries. An optional ``urls.json`` in the root maps relative
+    paths to their original URLs; otherwise ``file://`` URIs are returned.
+    """
+
+    name = "local"
+
+    def __init__(self, root: Path, k1: float = 1.5, b: float = 0.75):
+        self.root = Path(root)
+        if not self.root.is_dir():
+            raise ValueError(f"Local search directory not found: {self.root}")
+        self.k1, self.b = k1, b
+        self._docs: List[Dict[str, Any]] = []
+        self._df: Counter = Counter()
+        self._avgdl = 0.0
+        self._signature = ""
+        self._urls = self._load_url_map()
+        self._build_index()
+
+    @property
+    def cache_scope(self) -> str:
+        # Another --search-dir, or any added, removed or edited file, misses the cache
+        return f"{self.name}:{self.root.resolve()}:{self._signature}"
+
+    def _load_url_map(self) -> Dict[str, str]:
+        p = self.root / "urls.json"
+        try:
+            data = json.loads(p.read_text(encoding="utf-8"))
+            return {str(k): str(v) for k, v in data.items()} if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def _load_doc(self, path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            sha = file_sha256(path)
+        except Exception:
+            return None
+        cached = cache_get("local_search_doc", sha)
+        if isinstance(cached, dict) and cached.get("version") == _LOCAL_DOC_VERSION:
+            return {**cached, "sha256": sha}
+        try:
+            text = _read_local_text(path)
+        except Exception:
+            return None
+        toks = _tokens(text)
+        doc = {"version": _LOCAL_DOC_VERSION, "text": text, "len": len(toks), "tf": dict(Counter(toks))}
+        cache_put("local_search_doc", sha, doc)
+        return {**doc, "sha256": sha}
+
+    def _build_index(self) -> None:
+        files = sorted(
+            p for p in self.root.rglob("*")
+            if p.is_file() and (p.suffix.lower() == ".pdf" or p.suffix.lower() in _TEXT_SUFFIXES)
+            and p.name != "urls.json"
+        )
+        index = hashlib.sha256(json.dumps(self._urls, sort_keys=True).encode("utf-8"))
+        for p in files:
+            doc = self._load_doc(p)
+            if not doc or not doc["len"]:
+                continue
+            rel = p.relative_to(self.root).as_posix()
+            index.update(f"{rel}\0{doc['sha256']}\n".encode("utf-8"))
+            url = self._urls.get(rel) or p.resolve().as_uri()
+            self._docs.append({
+                "rel": rel,
+                "url": url,
+                "is_pdf": p.suffix.lower() == ".pdf",
+                "title": p.stem,
+                "text": doc["text"],
+                "len": doc["len"],
+                "tf": doc["tf"],
+            })
+            self._df.update(doc["tf"].keys())
+        if self._docs:
+            self._avgdl = sum(d["len"] for d in self._docs) / len(self._docs)
+        self._signature = index.hexdigest()[:16]
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def search(self, query: str, max_results: int = 5, **kwargs) -> Dict[str, Any]:
+        q = query or ""
+        want_pdf: Optional[bool] = None
+        if re.search(r"(?:^|\s)-filetype:pdf\b", q, re.I):
+            want_pdf = False
+        elif re.search(r"(?:^|\s)filetype:pdf\b", q, re.I):
+            want_pdf = True
+        terms = list(dict.fromkeys(_tokens(_OPERATOR_RE.sub(" ", q))))
+
+        n = len(self._docs)
+        scored = []
+        for i, d in enumerate(self._docs):
+            if want_pdf is not None and d["is_pdf"] != want_pdf:
+                continue
+            score = 0.0
+            for t in terms:
+                f = d["tf"].get(t)
+                if not f:
+                    continue
+                idf = math.log(1.0 + (n - self._df[t] + 0.5) / (self._df[t] + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * d["len"] / (self._avgdl or 1.0))
+                score += idf * f * (self.k1 + 1) / (f + norm)
+            if score > 0:
+                scored.append((-score, d["rel"], i))
+        scored.sort()
+
+        results = []
+        for neg, _, i in scored[: max(0, max_results)]:
+            d = self._docs[i]
+            results.append({
+                "url": d["url"],
+                "title": d["title"],
+                "content": d["text"][:500],
+                "raw_content": d["text"] if kwargs.get("include_raw_content") else None,
+                "score": round(-neg, 6),
+            })
+        return {"query": query, "results": results}
+
+
+def get_search_provider(name: Optional[str] = None, local_dir: Optional[Path] = None) -> SearchProvider:
+    name = (name or os.getenv("DDX_SEARCH_PROVIDER") or "tavily").lower()
+    if name == "tavily":
+        return TavilySearchProvider()
+    if name == "local":
+        local_dir = local_dir or (Path(os.environ["DDX_SEARCH_DIR"]) if os.getenv("DDX_SEARCH_DIR") else None)
+        if not local_dir:
+            raise ValueError("Local search provider needs --search-dir or DDX_SEARCH_DIR")
+        return LocalSearchProvider(local_dir)
+    raise ValueError(f"Unsupported search provider: {name}")
@@ -0,0 +1,40 @@
+from __future__ import annotations
+import io
+import zipfile
+from pathlib import Path
+from typing import IO, Iterator, Tuple, Union
+
+# Nested members are addressed as "outer.zip!/inner.zip!/file.pdf" relative to the archive
+MEMBER_SEP = "!/"
+MAX_ZIP_DEPTH = 3
+# Members larger than this (uncompressed) are not read into memory
+MAX_MEMBER_BYTES = 256 << 20
+
+
+def _skip_member(name: str) -> bool:
+    parts = name.split("/")
+    return name.endswith("/") or any(p.startswith(".") or p.startswith("~$") or p == "__MACOSX" for p in parts)
+
+
+def iter_zip_members(source: Union[Path, IO[bytes]]) -> Iterator[Tuple[str, int]]:
+    """(member name, uncompressed size) of every file member worth reading."""
+    with zipfile.ZipFile(source) as zf:
+        for info in zf.infolist():
+            if info.is_dir() or _skip_member(info.filename):
+                continue
+            yield info.filename, info.file_size
+
+
+def read_member(path: Path, member: str) -> bytes:
+    """Bytes of ``member`` (possibly nested with ``MEMBER_SEP``) from the ZIP at ``path``,
+    decompressed in memory."""
+    source: Union[Path, IO[bytes]] = path
+    data = b""
+    for part in member.split(MEMBER_SEP):
+        with zipfile.ZipFile(source) as zf:
+            info = zf.getinfo(part)
+            if info.file_size > MAX_MEMBER_BYTES:
+                raise ValueError(f"{part}: {info.file_size} bytes exceeds the in-memory member limit")
+            data = zf.read(info)
+        source = io.BytesIO(data)
+    return data
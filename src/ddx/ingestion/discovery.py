@@ -0,0 +1,227 @@
+from __future__ import annotations
+import hashlib
+import io
+import json
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional, Tuple, Union
+
+from ddx.ingestion.archive import MAX_MEMBER_BYTES, MAX_ZIP_DEPTH, MEMBER_SEP, iter_zip_members
+from ddx.utils.cache import file_sha256
+from ddx.utils.stages import timed_stage
+
+MANIFEST_VERSION = 1
+DEFAULT_DISCOVERY_WORKERS = 8
+
+# Formats read_doc_pages can turn into page text
+SUPPORTED_FORMATS = ("pdf", "txt", "csv", "kmz", "docx", "xlsx")
+
+_SNIFF_BYTES = 4096
+_TEXT_EXTENSIONS = {"": "txt", ".txt": "txt", ".text": "txt", ".md": "txt", ".csv": "csv", ".tsv": "csv"}
+_MAGIC = (
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "ole"),
+    (b"Rar!", "rar"),
+    (b"7z\xbc\xaf\x27\x1c", "7z"),
+)
+
+
+def _sniff_zip(source: Union[Path, IO[bytes]]) -> str:
+    # Only the central directory is read, not the members
+    try:
+        with zipfile.ZipFile(source) as zf:
+            names = zf.namelist()
+    except Exception:
+        return "zip"
+    if "word/document.xml" in names:
+        return "docx"
+    if "xl/workbook.xml" in names:
+        return "xlsx"
+    if any(n.lower().endswith(".kml") for n in names):
+        return "kmz"
+    return "zip"
+
+
+def sniff_format(path: Path) -> Optional[str]:
+    """Document format from the file's leading bytes, falling back to the extension for text.
+
+    Returns e.g. "pdf", "docx", "xlsx", "kmz", "zip", "txt", "csv", an image/archive kind,
+    or None for unrecognized binaries.
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(_SNIFF_BYTES)
+    except OSError:
+        return None
+    return _sniff_head(head, path.suffix, lambda: path)
+
+
+def sniff_bytes(data: bytes, name: str = "") -> Optional[str]:
+    """``sniff_format`` for in-memory content such as a ZIP member."""
+    return _sniff_head(data[:_SNIFF_BYTES], Path(name).suffix, lambda: io.BytesIO(data))
+
+
+def _sniff_head(head: bytes, suffix: str, zip_source) -> Optional[str]:
+    # The PDF header may follow a few bytes of junk
+    if b"%PDF-" in head[:1024]:
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        return _sniff_zip(zip_source())
+    for magic, kind in _MAGIC:
+        if head.startswith(magic):
+            return kind
+    if b"\x00" in head:
+        return None
+    return _TEXT_EXTENSIONS.get(suffix.lower(), "text")
+
+
+def _skip_name(name: str) -> bool:
+    # Hidden files, macOS resource forks and Office lock files
+    return name.startswith(".") or name.startswith("~$") or name == "__MACOSX"
+
+
+def _scan_dir(path: str) -> Tuple[List[str], List[str]]:
+    files, dirs = [], []
+    try:
+        with os.scandir(path) as it:
+            for e in it:
+                if _skip_name(e.name):
+                    continue
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        dirs.append(e.path)
+                    elif e.is_file():
+                        files.append(e.path)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return files, dirs
+
+
+def walk_files(root: Path, workers: int = DEFAULT_DISCOVERY_WORKERS) -> List[Path]:
+    """All files under ``root``, directories scanned concurrently. Symlinked directories
+    are not followed."""
+    out: List[str] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        pending = {ex.submit(_scan_dir, str(root))}
+        while pending:
+            fut = pending.pop()
+            files, dirs = fut.result()
+            out.extend(files)
+            pending.update(ex.submit(_scan_dir, d) for d in dirs)
+    return [Path(p) for p in out]
+
+
+def _zip_members(path: Path, rel: str, source: Union[Path, IO[bytes]], prefix: str, depth: int) -> List[Dict[str, Any]]:
+    """Entries for the members of one ZIP, read one at a time in memory; nested ZIPs are
+    expanded up to ``MAX_ZIP_DEPTH`` levels."""
+    out: List[Dict[str, Any]] = []
+    try:
+        members = list(iter_zip_members(source))
+    except Exception as e:
+        return [{"name": f"{rel}/{prefix}".rstrip("/"), "path": str(path), "format": "zip",
+                 "size": None, "sha256": None, "error": str(e)}]
+    with zipfile.ZipFile(source) as zf:
+        for name, size in members:
+            member = prefix + name
+            entry: Dict[str, Any] = {"name": f"{rel}/{member.replace(MEMBER_SEP, '/')}", "path": str(path),
+                                     "member": member, "format": None, "size": size, "sha256": None}
+            out.append(entry)
+            if size > MAX_MEMBER_BYTES:
+                entry["error"] = "member too large to read in memory"
+                continue
+            try:
+                data = zf.read(name)
+            except Exception as e:
+                entry["error"] = str(e)
+                continue
+            entry["format"] = sniff_bytes(data, name)
+            entry["sha256"] = hashlib.sha256(data).hexdigest()
+            if entry["format"] == "zip" and depth < MAX_ZIP_DEPTH:
+                out.pop()
+                out.extend(_zip_members(path, rel, io.BytesIO(data), member + MEMBER_SEP, depth + 1))
+    return out
+
+
+def _describe(root: Path, path: Path) -> List[Dict[str, Any]]:
+    rel = path.relative_to(root).as_posix()
+    entry: Dict[str, Any] = {"name": rel, "path": str(path), "format": None, "size": None, "sha256": None}
+    try:
+        entry["size"] = path.stat().st_size
+        entry["format"] = sniff_format(path)
+        entry["sha256"] = file_sha256(path)
+    except OSError as e:
+        entry["error"] = str(e)
+    if entry["format"] == "zip" and not entry.get("error"):
+        # Archives are replaced by their members
+        return _zip_members(path, rel, path, "", 1)
+    return [entry]
+
+
+@timed_stage("discovery")
+def build_manifest(docs_dir: Optional[Path], workers: int = DEFAULT_DISCOVERY_WORKERS) -> Dict[str, Any]:
+    """Walk ``docs_dir`` recursively, sniff and hash every file, and drop exact duplicates.
+
+    ``documents`` lists one entry per distinct content in a supported format, named by its
+    path relative to ``docs_dir``. ZIP archives are expanded in memory into one entry per
+    member (``member`` is its name inside the archive, ``path`` the archive file), named
+    e.g. ``bills.zip/2025/enero.pdf``. When the same bytes appear more than once the
+    shallowest, then alphabetically first, copy is kept and the rest go to ``duplicates``.
+    Files in formats that cannot be read are listed under ``unsupported``. Entries carry
+    the content ``sha256`` that the page-text cache and later stages key on.
+    """
+    manifest: Dict[str, Any] = {
+        "version": MANIFEST_VERSION,
+        "root": str(docs_dir) if docs_dir else None,
+        "documents": [],
+        "duplicates": [],
+        "unsupported": [],
+    }
+    if not docs_dir or not Path(docs_dir).is_dir():
+        return manifest
+    root = Path(docs_dir)
+    paths = walk_files(root, workers)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        entries = [e for group in ex.map(lambda p: _describe(root, p), paths) for e in group]
+    entries.sort(key=lambda e: (e["name"].count("/"), e["name"].lower(), e["name"]))
+
+    first_by_sha: Dict[str, str] = {}
+    for e in entries:
+        if e["format"] not in SUPPORTED_FORMATS or e.get("error"):
+            skipped = {"name": e["name"], "format": e["format"], "size": e["size"]}
+            if e.get("error"):
+                skipped["error"] = e["error"]
+            manifest["unsupported"].append(skipped)
+            continue
+        first = first_by_sha.get(e["sha256"])
+        if first is not None:
+            manifest["duplicates"].append({"name": e["name"], "duplicate_of": first, "sha256": e["sha256"]})
+            continue
+        first_by_sha[e["sha256"]] = e["name"]
+        manifest["documents"].append(e)
+    # Documents keep the order the pipeline has always used: by format, then by name
+    manifest["documents"].sort(key=lambda e: (SUPPORTED_FORMATS.index(e["format"]), e["name"]))
+    return manifest
+
+
+def manifest_summary(manifest: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "root": manifest.get("root"),
+        "documents": len(manifest.get("documents") or []),
+        "duplicates": len(manifest.get("duplicates") or []),
+        "unsupported": len(manifest.get("unsupported") or []),
+        "bytes": sum(e.get("size") or 0 for e in manifest.get("documents") or []),
+    }
+
+
+def write_manifest(manifest: Dict[str, Any], path: Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    return path
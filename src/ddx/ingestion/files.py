@@ -1,41 +1,150 @@
 from __future__ import annotations
+import hashlib
+import io
 from pathlib import Path
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
+from ddx.ingestion.archive import MEMBER_SEP, read_member
+from ddx.ingestion.discovery import build_manifest, sniff_bytes, sniff_format
+from ddx.ingestion.isolate import run_isolated
+from ddx.ingestion.office import docx_pages, xlsx_pages
 from ddx.ingestion.pdf import extract_text_pages_from_pdf
+from ddx.ingestion.tables import extract_tables_from_pdf
+from ddx.ingestion.tabular import PROFILE_VERSION, profile_csv, render_profile
 from ddx.ingestion.ocr import ocr_pdf_to_pages
 from ddx.kmz.reader import read_kmz_file
+from ddx.utils.cache import cache_get, cache_put, file_sha256
 
-def read_doc_pages(path: Path, ocr: bool = False, ocr_lang: str = "spa+eng", ocr_dpi: int = 300, progress: bool = False) -> List[str]:
-    suf = path.suffix.lower()
-    if suf == ".pdf":
-        pages = extract_text_pages_from_pdf(path)
+_PAGES_CACHE_VERSION = 2
+# Formats worth caching: text is cheap to re-read, CSV profiles and KMZ analyses have their own cache
+_CACHED_FORMATS = {"pdf", "docx", "xlsx"}
+
+def _profile_csv_uncached(path: Path, data: Optional[bytes]) -> Dict[str, Any]:
+    if data is not None:
+        stream = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8-sig", errors="ignore", newline="")
+    else:
+        stream = open(path, "r", encoding="utf-8-sig", errors="ignore", newline="")
+    with stream:
+        return profile_csv(stream)
+
+def read_csv_profile(path: Path, sha256: Optional[str] = None, member: Optional[str] = None,
+                     data: Optional[bytes] = None) -> Optional[Dict[str, Any]]:
+    """Column statistics and monthly rollups of a CSV (see ``profile_csv``), cached by content hash."""
+    try:
+        if member is not None and data is None:
+            data = read_member(path, member)
+        sha = sha256 or (hashlib.sha256(data).hexdigest() if data is not None else file_sha256(path))
+    except Exception:
+        return None
+    cached = cache_get("csv_profile", sha)
+    if isinstance(cached, dict) and cached.get("version") == PROFILE_VERSION:
+        return cached
+    try:
+        profile = _profile_csv_uncached(path, data)
+    except Exception:
+        return None
+    cache_put("csv_profile", sha, profile)
+    return profile
+
+def _read_pages(path: Path, fmt: Optional[str], ocr: bool, ocr_lang: str, ocr_dpi: int, progress: bool,
+                data: Optional[bytes] = None, name: Optional[str] = None) -> List[str]:
+    # ``data`` holds the document bytes when it is a ZIP member; ``path`` is then the archive
+    name = name or path.name
+    if fmt == "pdf":
+        pages = extract_text_pages_from_pdf(path, data=data)
         if not any(p.strip() for p in pages) and ocr:
-            pages = ocr_pdf_to_pages(path, lang=ocr_lang, dpi=ocr_dpi, progress=progress)
+            pages = ocr_pdf_to_pages(path, lang=ocr_lang, dpi=ocr_dpi, progress=progress, data=data)
         return pages or [""]
-    if suf == ".txt":
+    if fmt == "txt":
         try:
+            if data is not None:
+                return [data.decode("utf-8", errors="ignore")]
             return [path.read_text(encoding="utf-8", errors="ignore")]
         except Exception:
             return [""]
-    if suf == ".csv":
+    if fmt == "csv":
+        profile = read_csv_profile(path, data=data)
+        return render_profile(name, profile) if profile is not None else [""]
+    if fmt == "kmz":
+        return read_kmz_file(Path(name), data=data) if data is not None else read_kmz_file(path)
+    if fmt in ("docx", "xlsx"):
+        reader = docx_pages if fmt == "docx" else xlsx_pages
         try:
-            content = path.read_text(encoding="utf-8", errors="ignore")
-            lines = content.splitlines()
-            head = lines[0] if lines else ""
-            n_rows = max(0, len(lines) - 1)
-            return [f"CSV:{path.name}\nHeader:{head}\nRows:{n_rows}\n\n{content[:2000]}"]
+            return reader(io.BytesIO(data) if data is not None else path)
         except Exception:
             return [""]
-    if suf == ".kmz":
-        return read_kmz_file(path)
     return [""]
 
+def _read_pdf(path: Path, data: Optional[bytes], ocr: bool, ocr_lang: str, ocr_dpi: int,
+              progress: bool) -> Dict[str, Any]:
+    # Module-level so it can run in an isolated worker process
+    pages = _read_pages(path, "pdf", ocr, ocr_lang, ocr_dpi, progress, data)
+    return {"pages": pages, "tables": extract_tables_from_pdf(path, pages, data=data)}
+
+def read_doc(path: Path, ocr: bool = False, ocr_lang: str = "spa+eng", ocr_dpi: int = 300, progress: bool = False,
+             fmt: Optional[str] = None, sha256: Optional[str] = None, member: Optional[str] = None,
+             timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Page texts and detected tables of one document: {"pages": [...], "tables": [...]}.
+
+    PDF and office documents are memoized by content hash (and OCR settings), tables
+    together with the page text. Tables (see ``extract_tables_from_pdf``) are only detected
+    in PDFs. ``fmt``/``sha256``/``member`` come from the discovery manifest; when omitted the
+    file is sniffed and hashed here. With ``member`` the document is read out of the ZIP at
+    ``path`` in memory, never extracted to disk, and only when it is not cached.
+
+    With ``timeout`` a PDF is parsed in a worker process that is killed after that many
+    seconds; a timed-out or crashed parse returns empty pages with an ``error`` and is not
+    cached.
+    """
+    data: Optional[bytes] = None
+    if member is None:
+        fmt = fmt or sniff_format(path)
+    elif fmt is None or sha256 is None:
+        try:
+            data = read_member(path, member)
+        except Exception:
+            return {"pages": [""], "tables": []}
+        fmt = fmt or sniff_bytes(data, member)
+        sha256 = sha256 or hashlib.sha256(data).hexdigest()
+    name = Path(member.replace(MEMBER_SEP, "/")).name if member else None
+
+    def read() -> Dict[str, Any]:
+        nonlocal data
+        if member is not None and data is None:
+            try:
+                data = read_member(path, member)
+            except Exception:
+                return {"pages": [""], "tables": []}
+        if fmt == "pdf":
+            if not timeout:
+                return _read_pdf(path, data, ocr, ocr_lang, ocr_dpi, progress)
+            try:
+                return run_isolated(_read_pdf, (path, data, ocr, ocr_lang, ocr_dpi, progress), timeout)
+            except (TimeoutError, RuntimeError) as e:
+                return {"pages": [""], "tables": [], "error": f"PDF parse failed: {e}"}
+        return {"pages": _read_pages(path, fmt, ocr, ocr_lang, ocr_dpi, progress, data, name), "tables": []}
+
+    if fmt not in _CACHED_FORMATS:
+        return read()
+    try:
+        sha = sha256 or file_sha256(path)
+    except Exception:
+        return read()
+    key = f"{sha}-ocr-{ocr_lang}-{ocr_dpi}" if ocr and fmt == "pdf" else sha
+    cached = cache_get("doc_pages", key)
+    if isinstance(cached, dict) and cached.get("version") == _PAGES_CACHE_VERSION and cached.get("format") == fmt:
+        return {"pages": list(cached.get("pages") or [""]), "tables": list(cached.get("tables") or [])}
+    doc = read()
+    if not doc.get("error"):
+        cache_put("doc_pages", key, {"version": _PAGES_CACHE_VERSION, "format": fmt, **doc})
+    return doc
+
+def read_doc_pages(path: Path, ocr: bool = False, ocr_lang: str = "spa+eng", ocr_dpi: int = 300, progress: bool = False,
+                   fmt: Optional[str] = None, sha256: Optional[str] = None, member: Optional[str] = None) -> List[str]:
+    """Page texts of one document (see ``read_doc``)."""
+    return read_doc(path, ocr=ocr, ocr_lang=ocr_lang, ocr_dpi=ocr_dpi, progress=progress,
+                    fmt=fmt, sha256=sha256, member=member)["pages"]
+
 def discover_files(docs_dir: Optional[Path]) -> List[Path]:
-    if not docs_dir or not docs_dir.exists():
-        return []
-    return (
-        sorted(docs_dir.glob("*.pdf"))
-        + sorted(docs_dir.glob("*.txt"))
-        + sorted(docs_dir.glob("*.csv"))
-        + sorted(docs_dir.glob("*.kmz"))
-    )
+    """Readable, de-duplicated files anywhere under ``docs_dir`` (see ``build_manifest``);
+    an archive is listed once however many of its members are documents."""
+    return list(dict.fromkeys(Path(e["path"]) for e in build_manifest(docs_dir)["documents"]))
@@ -0,0 +1,60 @@
+from __future__ import annotations
+import multiprocessing as mp
+from typing import Any, Callable, Optional, Tuple
+
+# Parsers run in a child process so a hang or crash on a hostile file can be killed
+# without taking the run down. The forkserver start method avoids forking a process
+# whose other threads may hold locks.
+
+
+def _context():
+    methods = mp.get_all_start_methods()
+    return mp.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _child(conn, func: Callable, args: Tuple[Any, ...]) -> None:
+    try:
+        result = ("ok", func(*args))
+    except BaseException as e:
+        result = ("error", f"{type(e).__name__}: {e}")
+    try:
+        conn.send(result)
+    finally:
+        conn.close()
+
+
+def run_isolated(func: Callable, args: Tuple[Any, ...], timeout: Optional[float]) -> Any:
+    """``func(*args)`` in a worker process, killed after ``timeout`` seconds.
+
+    ``func`` must be a module-level function and its arguments and result picklable.
+    Raises TimeoutError on timeout and RuntimeError when the worker fails or dies. Falls
+    back to an in-process call when worker processes cannot be started here.
+    """
+    ctx = _context()
+    recv, send = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_child, args=(send, func, args), daemon=True)
+    try:
+        proc.start()
+    except (OSError, RuntimeError):
+        recv.close()
+        send.close()
+        return func(*args)
+    send.close()
+    try:
+        if not recv.poll(timeout):
+            proc.kill()
+            raise TimeoutError(f"worker timed out after {timeout:g}s")
+        try:
+            status, value = recv.recv()
+        except EOFError:
+            proc.join(5)
+            raise RuntimeError(f"worker died (exit code {proc.exitcode})")
+    finally:
+        recv.close()
+        proc.join(5)
+        if proc.is_alive():
+            proc.kill()
+            proc.join()
+    if status != "ok":
+        raise RuntimeError(value)
+    return value
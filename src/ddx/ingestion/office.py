@@ -0,0 +1,245 @@
+from __future__ import annotations
+import re
+import zipfile
+from datetime import date, timedelta
+from pathlib import Path
+from typing import IO, Dict, Iterator, List, Optional, Set, Union
+from xml.etree import ElementTree as ET
+
+# OOXML readers that stream the part XML with iterparse; no office library needed.
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_S = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PR = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# DOCX files often carry no rendered page breaks; longer "pages" are split at paragraph ends
+DOCX_PAGE_CHARS = 4000
+# XLSX sheets become one page-like segment per this many rows, each repeating the header
+XLSX_ROWS_PER_PAGE = 100
+
+Source = Union[str, Path, IO[bytes]]
+
+
+def _chunk_paragraphs(paras: List[str], limit: int) -> List[str]:
+    out, cur, size = [], [], 0
+    for p in paras:
+        if cur and size + len(p) > limit:
+            out.append("\n".join(cur))
+            cur, size = [], 0
+        cur.append(p)
+        size += len(p) + 1
+    if cur:
+        out.append("\n".join(cur))
+    return out
+
+
+def docx_pages(source: Source, page_chars: int = DOCX_PAGE_CHARS) -> List[str]:
+    """Body text of a .docx split into page-like segments.
+
+    Explicit and last-rendered page breaks start a new page; table rows become one
+    ``cell | cell`` line. Headers, footers and comments are not read.
+    """
+    pages: List[List[str]] = [[]]
+    runs: List[Optional[str]] = []  # None marks a page break inside the paragraph
+    cells: List[str] = []
+    row: List[str] = []
+    table_depth = 0
+    with zipfile.ZipFile(source) as zf, zf.open("word/document.xml") as f:
+        for event, el in ET.iterparse(f, events=("start", "end")):
+            tag = el.tag
+            if event == "start":
+                if tag == _W + "tbl":
+                    table_depth += 1
+                elif tag == _W + "lastRenderedPageBreak" or (
+                        tag == _W + "br" and el.get(_W + "type") == "page"):
+                    if not table_depth:
+                        runs.append(None)
+                continue
+            if tag == _W + "t":
+                runs.append(el.text or "")
+            elif tag == _W + "tab":
+                runs.append("\t")
+            elif tag == _W + "br" and el.get(_W + "type") != "page":
+                runs.append("\n")
+            elif tag == _W + "p":
+                text = "".join(r for r in runs if r is not None).strip()
+                if table_depth:
+                    if text:
+                        cells.append(text)
+                else:
+                    parts = "".join(r if r is not None else "\f" for r in runs).split("\f")
+                    for i, part in enumerate(parts):
+                        if i:
+                            pages.append([])
+                        if part.strip():
+                            pages[-1].append(part.strip())
+                runs = []
+                el.clear()
+            elif tag == _W + "tc":
+                row.append(" ".join(cells))
+                cells = []
+            elif tag == _W + "tr":
+                if any(row) and table_depth == 1:
+                    pages[-1].append(" | ".join(row))
+                row = []
+            elif tag == _W + "tbl":
+                table_depth -= 1
+                el.clear()
+    out: List[str] = []
+    for paras in pages:
+        if paras:
+            out.extend(_chunk_paragraphs(paras, page_chars))
+    return out or [""]
+
+
+# ---- XLSX ------------------------------------------------------------------
+
+# Built-in number formats that display dates
+_DATE_FMT_IDS = set(range(14, 23)) | {45, 46, 47}
+_DATE_CODE_RE = re.compile(r"[dmy]", re.I)
+_FMT_NOISE_RE = re.compile(r'"[^"]*"|\[[^\]]*\]|\\.')
+_CELL_REF_RE = re.compile(r"([A-Z]+)")
+
+
+def _shared_strings(zf: zipfile.ZipFile) -> List[str]:
+    if "xl/sharedStrings.xml" not in zf.namelist():
+        return []
+    out: List[str] = []
+    with zf.open("xl/sharedStrings.xml") as f:
+        parts: List[str] = []
+        for _, el in ET.iterparse(f):
+            if el.tag == _S + "t":
+                parts.append(el.text or "")
+            elif el.tag == _S + "rPh":
+                # Phonetic runs repeat the text they annotate
+                parts = parts[:-1] if parts else parts
+            elif el.tag == _S + "si":
+                out.append("".join(parts))
+                parts = []
+                el.clear()
+    return out
+
+
+def _date_styles(zf: zipfile.ZipFile) -> Set[int]:
+    if "xl/styles.xml" not in zf.namelist():
+        return set()
+    root = ET.fromstring(zf.read("xl/styles.xml"))
+    custom = set()
+    for nf in root.iter(_S + "numFmt"):
+        code = _FMT_NOISE_RE.sub("", nf.get("formatCode") or "")
+        if _DATE_CODE_RE.search(code):
+            custom.add(int(nf.get("numFmtId") or -1))
+    xfs = root.find(_S + "cellXfs")
+    if xfs is None:
+        return set()
+    return {i for i, xf in enumerate(xfs.findall(_S + "xf"))
+            if int(xf.get("numFmtId") or 0) in _DATE_FMT_IDS | custom}
+
+
+def _sheets(zf: zipfile.ZipFile) -> List[tuple]:
+    wb = ET.fromstring(zf.read("xl/workbook.xml"))
+    rels: Dict[str, str] = {}
+    if "xl/_rels/workbook.xml.rels" in zf.namelist():
+        for rel in ET.fromstring(zf.read("xl/_rels/workbook.xml.rels")).iter(_PR + "Relationship"):
+            target = rel.get("Target") or ""
+            rels[rel.get("Id")] = target.lstrip("/") if target.startswith("/") else "xl/" + target
+    pr = wb.find(_S + "workbookPr")
+    date1904 = pr is not None and pr.get("date1904") in ("1", "true")
+    out = []
+    for i, sh in enumerate(wb.iter(_S + "sheet"), start=1):
+        part = rels.get(sh.get(_R + "id")) or f"xl/worksheets/sheet{i}.xml"
+        out.append((sh.get("name") or f"Sheet{i}", part, date1904))
+    return out
+
+
+def _col_index(ref: str) -> int:
+    m = _CELL_REF_RE.match(ref or "")
+    if not m:
+        return -1
+    n = 0
+    for ch in m.group(1):
+        n = n * 26 + ord(ch) - 64
+    return n - 1
+
+
+def _fmt_number(v: str) -> str:
+    try:
+        x = float(v)
+    except ValueError:
+        return v
+    return str(int(x)) if x.is_integer() and abs(x) < 1e15 else f"{x:.10g}"
+
+
+def _serial_date(v: str, date1904: bool) -> str:
+    try:
+        x = float(v)
+    except ValueError:
+        return v
+    # Excel's 1900 system counts a fictitious 1900-02-29
+    base = date(1904, 1, 1) if date1904 else date(1899, 12, 30)
+    return (base + timedelta(days=int(x))).isoformat()
+
+
+def _iter_rows(zf: zipfile.ZipFile, part: str, strings: List[str], date_styles: Set[int],
+               date1904: bool) -> Iterator[List[str]]:
+    with zf.open(part) as f:
+        for _, el in ET.iterparse(f):
+            if el.tag != _S + "row":
+                continue
+            cells: Dict[int, str] = {}
+            for c in el.iter(_S + "c"):
+                t = c.get("t") or "n"
+                v = c.findtext(_S + "v")
+                if t == "inlineStr":
+                    text = "".join(x.text or "" for x in c.iter(_S + "t"))
+                elif v is None:
+                    continue
+                elif t == "s":
+                    text = strings[int(v)] if v.isdigit() and int(v) < len(strings) else ""
+                elif t == "b":
+                    text = "TRUE" if v == "1" else "FALSE"
+                elif t == "n" and int(c.get("s") or 0) in date_styles:
+                    text = _serial_date(v, date1904)
+                elif t == "n":
+                    text = _fmt_number(v)
+                else:
+                    text = v
+                idx = _col_index(c.get("r") or "")
+                cells[idx if idx >= 0 else len(cells)] = text.strip()
+            el.clear()
+            if not any(cells.values()):
+                continue
+            width = max(cells) + 1
+            yield [cells.get(i, "") for i in range(width)]
+
+
+def xlsx_pages(source: Source, rows_per_page: int = XLSX_ROWS_PER_PAGE) -> List[str]:
+    """Cell values of every worksheet as page-like segments of ``rows_per_page`` rows.
+
+    Each segment starts with the sheet name and row range and repeats the sheet's first
+    row as a header. Date-formatted cells are written as ISO dates.
+    """
+    pages: List[str] = []
+    with zipfile.ZipFile(source) as zf:
+        strings = _shared_strings(zf)
+        date_styles = _date_styles(zf)
+        names = set(zf.namelist())
+        for name, part, date1904 in _sheets(zf):
+            if part not in names:
+                continue
+            header: Optional[str] = None
+            chunk: List[str] = []
+            first = 1
+            n = 0
+            for n, row in enumerate(_iter_rows(zf, part, strings, date_styles, date1904), start=1):
+                line = " | ".join(row).rstrip(" |")
+                if header is None:
+                    header = line
+                elif n - first >= rows_per_page:
+                    pages.append(f"Sheet: {name} (rows {first}-{n - 1})\n" + "\n".join(chunk))
+                    chunk, first = [header], n
+                chunk.append(line)
+            if chunk:
+                pages.append(f"Sheet: {name} (rows {first}-{n})\n" + "\n".join(chunk))
+    return pages or [""]
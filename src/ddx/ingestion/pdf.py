@@ -1,28 +1,31 @@
 from __future__ import annotations
+import io
 import subprocess
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
-def _run_pdftotext(path: Path) -> List[str]:
+def _run_pdftotext(path: Path, data: Optional[bytes] = None) -> List[str]:
     try:
+        # In-memory documents go through stdin
         out = subprocess.run(
-            ["pdftotext", "-layout", str(path), "-"],
-            capture_output=True, text=True, timeout=60
+            ["pdftotext", "-layout", "-" if data is not None else str(path), "-"],
+            input=data, capture_output=True, timeout=60
         )
         if out.returncode == 0 and out.stdout:
-            txt = out.stdout
+            txt = out.stdout.decode("utf-8", errors="ignore")
             pages = [p for p in txt.split("\f") if p.strip()]
             return pages or [txt]
     except Exception:
         pass
     return []
 
-def extract_text_pages_from_pdf(path: Path) -> List[str]:
+def extract_text_pages_from_pdf(path: Path, data: Optional[bytes] = None) -> List[str]:
+    """Page texts of a PDF file, or of the PDF bytes in ``data`` (e.g. a ZIP member)."""
     # Try PyPDF2
     try:
         import PyPDF2  # type: ignore
         pages: List[str] = []
-        with open(path, "rb") as f:
+        with (io.BytesIO(data) if data is not None else open(path, "rb")) as f:
             reader = PyPDF2.PdfReader(f)
             for pg in reader.pages:
                 try:
@@ -36,7 +39,7 @@ def extract_text_pages_from_pdf(path: Path) -> List[str]:
     # Try pdfminer.six
     try:
         from pdfminer.high_level import extract_text  # type: ignore
-        txt = extract_text(str(path))
+        txt = extract_text(io.BytesIO(data) if data is not None else str(path))
         if txt:
             pages = [p for p in txt.split("\x0c") if p.strip()]
             if pages:
@@ -44,7 +47,7 @@ def extract_text_pages_from_pdf(path: Path) -> List[str]:
     except Exception:
         pass
     # Try pdftotext CLI
-    pages = _run_pdftotext(path)
+    pages = _run_pdftotext(path, data)
     if pages:
         return pages
     return []
@@ -0,0 +1,114 @@
+from __future__ import annotations
+import io
+import re
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Table detection for PDFs. pdfplumber (optional) finds ruled/aligned tables from the page
+# geometry; without it, column-aligned blocks are recovered from layout-preserving text.
+
+_CELL_SPLIT_RE = re.compile(r"\t+|\s{2,}")
+# A layout block is a table when it has at least this many rows of 2+ cells ...
+_MIN_ROWS = 3
+# ... and this share of its rows have the block's most common cell count (+-1)
+_ROW_AGREEMENT = 0.6
+_MAX_CELL_CHARS = 80
+
+
+def _clean_rows(rows: List[List[Any]]) -> List[List[str]]:
+    out = []
+    for r in rows:
+        cells = [re.sub(r"\s+", " ", str(c or "")).strip() for c in r]
+        if any(cells):
+            out.append(cells)
+    width = max((len(r) for r in out), default=0)
+    return [r + [""] * (width - len(r)) for r in out]
+
+
+def _table(page: int, rows: List[List[str]], source: str) -> Dict[str, Any]:
+    return {"page": page, "source": source, "n_rows": len(rows),
+            "n_cols": len(rows[0]) if rows else 0, "rows": rows}
+
+
+def detect_layout_tables(text: str, page: int) -> List[Dict[str, Any]]:
+    """Tables in one page of layout text: runs of lines whose cells are separated by two or
+    more spaces (or tabs) and agree on the number of columns."""
+    tables: List[Dict[str, Any]] = []
+    block: List[List[str]] = []
+
+    def flush():
+        if len(block) >= _MIN_ROWS:
+            counts = Counter(len(r) for r in block)
+            mode = counts.most_common(1)[0][0]
+            agree = sum(1 for r in block if abs(len(r) - mode) <= 1)
+            if mode >= 2 and agree >= _ROW_AGREEMENT * len(block):
+                tables.append(_table(page, _clean_rows(block), "layout"))
+        block.clear()
+
+    for line in (text or "").splitlines():
+        cells = [c for c in _CELL_SPLIT_RE.split(line.strip()) if c]
+        if len(cells) >= 2 and all(len(c) <= _MAX_CELL_CHARS for c in cells):
+            block.append(cells)
+        else:
+            flush()
+    flush()
+    return tables
+
+
+def _pdfplumber_tables(path: Path, data: Optional[bytes]) -> Optional[List[Dict[str, Any]]]:
+    try:
+        import pdfplumber  # type: ignore
+    except Exception:
+        return None
+    tables: List[Dict[str, Any]] = []
+    try:
+        with pdfplumber.open(io.BytesIO(data) if data is not None else str(path)) as pdf:
+            for n, page in enumerate(pdf.pages, start=1):
+                for raw in page.extract_tables() or []:
+                    rows = _clean_rows(raw)
+                    if len(rows) >= 2 and len(rows[0]) >= 2:
+                        tables.append(_table(n, rows, "pdfplumber"))
+    except Exception:
+        return None
+    return tables
+
+
+def extract_tables_from_pdf(path: Path, pages: List[str], data: Optional[bytes] = None) -> List[Dict[str, Any]]:
+    """Row/column cells of the tables in a PDF, each tagged with its 1-based page.
+
+    Uses pdfplumber when installed, otherwise layout detection over the extracted ``pages``.
+    """
+    found = _pdfplumber_tables(path, data)
+    if found:
+        return found
+    out: List[Dict[str, Any]] = []
+    for n, text in enumerate(pages, start=1):
+        out.extend(detect_layout_tables(text, n))
+    return out
+
+
+def _fold(s: str) -> str:
+    s = unicodedata.normalize("NFKD", s or "")
+    return "".join(c for c in s if not unicodedata.combining(c)).casefold()
+
+
+def table_text(table: Dict[str, Any]) -> str:
+    return "\n".join(" | ".join(r) for r in table["rows"])
+
+
+def matching_tables(tables: List[Dict[str, Any]], keywords: List[str]) -> List[Dict[str, Any]]:
+    """Tables whose cells mention any of ``keywords`` (case- and accent-insensitive)."""
+    if not keywords:
+        return list(tables)
+    keys = [_fold(k) for k in keywords if k]
+    return [t for t in tables if any(k in _fold(table_text(t)) for k in keys)]
+
+
+def render_tables(tables: List[Dict[str, Any]]) -> str:
+    """Tables as map-prompt document text, keeping the ``[Page N]`` markers evidence uses."""
+    parts = []
+    for i, t in enumerate(tables, start=1):
+        parts.append(f"[Page {t['page']}] Table {i} ({t['n_rows']} rows x {t['n_cols']} columns)\n{table_text(t)}")
+    return "\\n\\n".join(parts)
@@ -0,0 +1,400 @@
+from __future__ import annotations
+import calendar
+import csv
+import math
+import re
+from array import array
+from datetime import datetime
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from ddx.reducer.units import conversion_factor, parse_number, parse_unit
+
+# Streaming profile of delimited text files: typed columns, per-column aggregates and
+# per-month rollups, computed chunk by chunk without holding the rows in memory.
+
+PROFILE_VERSION = 1
+CHUNK_ROWS = 8192
+# Rows looked at to decide column types, date order and the sampling interval
+_INFER_ROWS = 1000
+_TYPE_SHARE = 0.9
+_SAMPLE_CHARS = 2000
+# A month counts as complete when it has this share of the rows its interval implies
+_COMPLETE_SHARE = 0.9
+
+_ISO_TS_RE = re.compile(r"^\s*(\d{4})-(\d{1,2})-(\d{1,2})(?:[T\s]+(\d{1,2}):(\d{2}))?")
+_DMY_TS_RE = re.compile(r"^\s*(\d{1,2})[/.-](\d{1,2})[/.-](\d{2,4})(?:[T\s]+(\d{1,2}):(\d{2}))?")
+_NUMERIC_CELL_RE = re.compile(r"^\s*[-+(]?\s*[$€£]?\s*\d[\d.,\s']*\)?\s*%?\s*$")
+_HEADER_UNIT_RE = re.compile(r"[\(\[]\s*([^\)\]]+?)\s*[\)\]]")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Unit tokens recognised inside a bare header such as "AE_kWh"
+_HEADER_UNIT_TOKENS = {"kwh": "kWh", "mwh": "MWh", "wh": "Wh", "kw": "kW", "mw": "MW"}
+
+
+def _np():
+    try:
+        import numpy  # type: ignore
+    except Exception:
+        return None
+    return numpy
+
+
+def _to_float(s: str) -> Optional[float]:
+    try:
+        return float(s)
+    except ValueError:
+        # Only whole-cell numbers ("1.234,5", "$ 12", "(3)"), not codes such as "P1"
+        return parse_number(s) if _NUMERIC_CELL_RE.match(s) else None
+
+
+def header_unit(name: str) -> Optional[str]:
+    """Unit named in a column header: "Consumo (kWh)", "Energía [MWh]", "AE_kWh"."""
+    m = _HEADER_UNIT_RE.search(name or "")
+    if m and parse_unit(m.group(1)) is not None:
+        return m.group(1)
+    for tok in _TOKEN_RE.findall((name or "").lower()):
+        if tok in _HEADER_UNIT_TOKENS:
+            return _HEADER_UNIT_TOKENS[tok]
+    return None
+
+
+class _TimeParser:
+    """Parses one column's timestamps; day/month order is decided once from sample values."""
+
+    __slots__ = ("day_first",)
+
+    def __init__(self, samples: List[str]):
+        day_first = True
+        for s in samples:
+            m = _DMY_TS_RE.match(s)
+            if m and int(m.group(2)) > 12:
+                day_first = False
+                break
+        self.day_first = day_first
+
+    def parse(self, s: str) -> Optional[Tuple[Tuple[int, int, int, int, int], int]]:
+        """((y, m, d, hh, mm), minutes since 0001-01-01), or None."""
+        m = _ISO_TS_RE.match(s)
+        if m:
+            y, mo, d = int(m.group(1)), int(m.group(2)), int(m.group(3))
+        else:
+            m = _DMY_TS_RE.match(s)
+            if not m:
+                return None
+            a, b, y = int(m.group(1)), int(m.group(2)), int(m.group(3))
+            d, mo = (a, b) if self.day_first else (b, a)
+            if y < 100:
+                y += 2000
+        h, mi = int(m.group(4) or 0), int(m.group(5) or 0)
+        try:
+            minute = datetime(y, mo, d).toordinal() * 1440 + h * 60 + mi
+        except ValueError:
+            return None
+        return (y, mo, d, h, mi), minute
+
+
+def _is_time(s: str) -> bool:
+    return bool(_ISO_TS_RE.match(s) or _DMY_TS_RE.match(s))
+
+
+def _infer_type(values: List[str]) -> str:
+    vals = [v for v in values if v.strip()]
+    if not vals:
+        return "empty"
+    if sum(_is_time(v) for v in vals) >= _TYPE_SHARE * len(vals):
+        return "datetime"
+    if sum(_to_float(v) is not None for v in vals) >= _TYPE_SHARE * len(vals):
+        return "number"
+    low = {v.strip().lower() for v in vals}
+    if low <= {"true", "false", "0", "1", "yes", "no", "si", "sí"}:
+        return "boolean"
+    return "string"
+
+
+class _NumStats:
+    __slots__ = ("count", "sum", "min", "max", "invalid")
+
+    def __init__(self):
+        self.count, self.sum, self.min, self.max, self.invalid = 0, 0.0, math.inf, -math.inf, 0
+
+    def add_chunk(self, col: array) -> None:
+        if not col:
+            return
+        np = _np()
+        if np is not None:
+            a = np.frombuffer(col, dtype=np.float64)
+            s, lo, hi = float(a.sum()), float(a.min()), float(a.max())
+        else:
+            s, lo, hi = math.fsum(col), min(col), max(col)
+        self.count += len(col)
+        self.sum += s
+        self.min = min(self.min, lo)
+        self.max = max(self.max, hi)
+
+    def as_dict(self) -> Dict[str, Any]:
+        if not self.count:
+            return {"count": 0, "invalid": self.invalid}
+        return {"count": self.count, "invalid": self.invalid, "sum": self.sum,
+                "mean": self.sum / self.count, "min": self.min, "max": self.max}
+
+
+def _sniff_dialect(sample: str) -> str:
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+    except csv.Error:
+        counts = {d: sample.count(d) for d in ",;\t|"}
+        return max(counts, key=counts.get)
+
+
+def _chunks(reader: Iterator[List[str]], size: int) -> Iterator[List[List[str]]]:
+    chunk: List[List[str]] = []
+    for row in reader:
+        if not any(c.strip() for c in row):
+            continue
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def profile_csv(stream: IO[str], chunk_rows: int = CHUNK_ROWS) -> Dict[str, Any]:
+    """Profile a seekable delimited text stream (opened with ``newline=""``) in one pass.
+
+    Column types (number/datetime/boolean/string) are inferred from the first rows. Number
+    columns get count/sum/mean/min/max; when a datetime column exists, every number column
+    is also rolled up per calendar month, and the sampling interval is estimated so that
+    months can be flagged complete or partial.
+    """
+    sample = stream.read(64 * 1024)
+    delimiter = _sniff_dialect(sample)
+    stream.seek(0)
+    reader = csv.reader(stream, delimiter=delimiter)
+    header = next(reader, None) or []
+    names = [h.strip() or f"col{i + 1}" for i, h in enumerate(header)]
+    n_cols = len(names)
+
+    rows = 0
+    types: List[str] = []
+    stats: List[Optional[_NumStats]] = []
+    other_counts = [0] * n_cols
+    time_col: Optional[int] = None
+    parser: Optional[_TimeParser] = None
+    first_ts = last_ts = None
+    deltas: List[int] = []
+    # month index -> [rows, first ts, last ts, per-number-column [count, sum, min, max]]
+    monthly: Dict[int, list] = {}
+
+    for chunk in _chunks(reader, chunk_rows):
+        if not types:
+            head = chunk[:_INFER_ROWS]
+            types = [_infer_type([r[i] if i < len(r) else "" for r in head]) for i in range(n_cols)]
+            stats = [_NumStats() if t == "number" else None for t in types]
+            if "datetime" in types:
+                time_col = types.index("datetime")
+                parser = _TimeParser([r[time_col] for r in head if time_col < len(r)])
+        num_idx = [i for i, t in enumerate(types) if t == "number"]
+        cols = {i: array("d") for i in num_idx}
+        months = array("l")
+        for r in chunk:
+            rows += 1
+            month = -1
+            if time_col is not None:
+                parsed = parser.parse(r[time_col]) if time_col < len(r) else None
+                if parsed is not None:
+                    ts, minute = parsed
+                    month = ts[0] * 12 + ts[1] - 1
+                    if last_ts is not None and len(deltas) < _INFER_ROWS and minute > last_ts[1]:
+                        deltas.append(minute - last_ts[1])
+                    if first_ts is None:
+                        first_ts = (ts, minute)
+                    last_ts = (ts, minute)
+                    slot = monthly.get(month)
+                    if slot is None:
+                        slot = monthly[month] = [0, ts, ts, {i: [0, 0.0, math.inf, -math.inf] for i in num_idx}]
+                    slot[0] += 1
+                    slot[2] = ts
+            months.append(month)
+            for i, t in enumerate(types):
+                v = r[i] if i < len(r) else ""
+                if t != "number":
+                    if v.strip():
+                        other_counts[i] += 1
+                    continue
+                x = _to_float(v) if v.strip() else None
+                if x is None:
+                    if v.strip():
+                        stats[i].invalid += 1
+                    cols[i].append(math.nan)
+                else:
+                    cols[i].append(x)
+        for i in num_idx:
+            col = cols[i]
+            stats[i].add_chunk(array("d", (x for x in col if x == x)))
+            if time_col is not None:
+                _roll_up(monthly, months, i, col)
+
+    interval = _median(deltas) if deltas else None
+    columns = []
+    for i, name in enumerate(names):
+        t = types[i] if i < len(types) else "empty"
+        c: Dict[str, Any] = {"name": name, "type": t, "unit": header_unit(name)}
+        if t == "number":
+            c.update(stats[i].as_dict())
+        else:
+            c["count"] = other_counts[i]
+        columns.append(c)
+
+    monthly_out = []
+    for m in sorted(monthly):
+        n, ts0, ts1, per = monthly[m]
+        y, mo = divmod(m, 12)
+        expected = (calendar.monthrange(y, mo + 1)[1] * 1440 // interval) if interval else None
+        monthly_out.append({
+            "month": f"{y:04d}-{mo + 1:02d}",
+            "rows": n,
+            "first": _ts_iso(ts0),
+            "last": _ts_iso(ts1),
+            "complete": (n >= _COMPLETE_SHARE * expected) if expected else None,
+            "columns": {names[i]: {"count": s[0], "sum": s[1], "min": s[2], "max": s[3]}
+                        for i, s in per.items() if s[0]},
+        })
+
+    return {
+        "version": PROFILE_VERSION,
+        "delimiter": delimiter,
+        "header": header,
+        "rows": rows,
+        "columns": columns,
+        "time_column": names[time_col] if time_col is not None else None,
+        "interval_minutes": interval,
+        "first": _ts_iso(first_ts[0]) if first_ts else None,
+        "last": _ts_iso(last_ts[0]) if last_ts else None,
+        "monthly": monthly_out,
+        "sample": sample[:_SAMPLE_CHARS],
+    }
+
+
+def _ts_iso(ts: Tuple[int, int, int, int, int]) -> str:
+    y, mo, d, h, mi = ts
+    return f"{y:04d}-{mo:02d}-{d:02d}" + (f" {h:02d}:{mi:02d}" if h or mi else "")
+
+
+def _median(xs: List[int]) -> int:
+    s = sorted(xs)
+    return s[len(s) // 2]
+
+
+def _roll_up(monthly: Dict[int, list], months: array, i: int, col: array) -> None:
+    np = _np()
+    if np is not None:
+        m = np.array(months, dtype=np.int64)
+        v = np.frombuffer(col, dtype=np.float64)
+        ok = (m >= 0) & ~np.isnan(v)
+        for month in np.unique(m[ok]):
+            sel = v[ok & (m == month)]
+            s = monthly[int(month)][3][i]
+            s[0] += int(sel.size)
+            s[1] += float(sel.sum())
+            s[2] = min(s[2], float(sel.min()))
+            s[3] = max(s[3], float(sel.max()))
+        return
+    for month, x in zip(months, col):
+        if month < 0 or x != x:
+            continue
+        s = monthly[month][3][i]
+        s[0] += 1
+        s[1] += x
+        if x < s[2]:
+            s[2] = x
+        if x > s[3]:
+            s[3] = x
+
+
+# ---- consumers ----------------------------------------------------------------
+
+def energy_column(profile: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The number column carrying energy (kWh-like) or power (kW-like, with a known interval)."""
+    best = None
+    for c in profile.get("columns") or []:
+        if c["type"] != "number" or not c.get("unit"):
+            continue
+        dim = (parse_unit(c["unit"]) or ("", 0))[0]
+        if dim == "energy":
+            return c
+        if dim == "power" and profile.get("interval_minutes") and best is None:
+            best = c
+    return best
+
+
+def monthly_energy_kwh(profile: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Per-month energy in kWh from the profile's monthly rollups.
+
+    Power columns are integrated over the sampling interval. Returns [] when the file has
+    no time column or no energy/power column.
+    """
+    col = energy_column(profile)
+    if col is None or not profile.get("time_column"):
+        return []
+    dim = parse_unit(col["unit"])[0]
+    if dim == "energy":
+        factor = conversion_factor(col["unit"], "kWh")
+    else:
+        factor = conversion_factor(col["unit"], "kW") * profile["interval_minutes"] / 60.0
+    out = []
+    for m in profile.get("monthly") or []:
+        s = (m.get("columns") or {}).get(col["name"])
+        if not s or not s["count"]:
+            continue
+        out.append({"month": m["month"], "kwh": s["sum"] * factor, "rows": m["rows"],
+                    "first": m["first"], "last": m["last"], "complete": m["complete"],
+                    "column": col["name"], "unit": col["unit"],
+                    # The rollup line as render_profile prints it, for evidence
+                    "line": monthly_line(m, col["name"])})
+    return out
+
+
+def _fmt(x: Any) -> str:
+    if isinstance(x, float):
+        return f"{x:.6g}" if abs(x) < 1e6 else f"{x:.0f}"
+    return str(x)
+
+
+def monthly_line(m: Dict[str, Any], column: str) -> str:
+    s = m["columns"][column]
+    return f"{m['month']} | {m['rows']} | {_fmt(s['sum'])} | {_fmt(s['sum'] / s['count'])} | {_fmt(s['min'])} | {_fmt(s['max'])}"
+
+
+def render_profile(name: str, profile: Dict[str, Any]) -> List[str]:
+    """Page texts for the map prompt: a statistics page, then the first rows verbatim."""
+    header = profile.get("header") or []
+    lines = [
+        f"CSV:{name}",
+        f"Header:{profile.get('delimiter', ',').join(header)}",
+        f"Rows:{profile['rows']}",
+        "",
+    ]
+    if profile.get("time_column"):
+        iv = profile.get("interval_minutes")
+        lines.append(f"Time column: {profile['time_column']} ({profile['first']} .. {profile['last']})"
+                     + (f", interval {iv} min" if iv else ""))
+    lines.append("Columns:")
+    for c in profile["columns"]:
+        desc = f"- {c['name']}: {c['type']}"
+        if c.get("unit"):
+            desc += f" [{c['unit']}]"
+        desc += f", {c['count']} values"
+        if c["type"] == "number" and c["count"]:
+            desc += (f", sum {_fmt(c['sum'])}, mean {_fmt(c['mean'])}, "
+                     f"min {_fmt(c['min'])}, max {_fmt(c['max'])}")
+        lines.append(desc)
+    num_cols = [c["name"] for c in profile["columns"] if c["type"] == "number" and c["count"]]
+    for column in num_cols if profile.get("monthly") else []:
+        lines.append("")
+        lines.append(f"Monthly rollup of {column}:")
+        lines.append("month | rows | sum | mean | min | max")
+        for m in profile["monthly"]:
+            if column in m["columns"]:
+                flag = "" if m["complete"] in (True, None) else " (partial month)"
+                lines.append(monthly_line(m, column) + flag)
+    return ["\n".join(lines), profile.get("sample") or ""]
@@ -1,54 +1,223 @@
 from __future__ import annotations
+import hashlib
+import math
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
+
+from ddx.utils.cache import cache_get, cache_put, file_sha256
+
+# Bump when the analysis layout changes so stale on-disk entries are ignored.
+_KMZ_ANALYSIS_VERSION = 1
+_EARTH_RADIUS_M = 6371008.8
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1] if "}" in tag else tag
+
+
+def _parse_coords(text: Optional[str]) -> List[Tuple[float, float]]:
+    pts: List[Tuple[float, float]] = []
+    for tok in (text or "").split():
+        parts = tok.split(",")
+        if len(parts) < 2:
+            continue
+        try:
+            pts.append((float(parts[0]), float(parts[1])))
+        except ValueError:
+            continue
+    return pts
+
+
+def _ring_area_m2(ring: List[Tuple[float, float]]) -> float:
+    # Spherical excess approximation; good enough for site-scale polygons.
+    if len(ring) < 3:
+        return 0.0
+    total = 0.0
+    for (lon1, lat1), (lon2, lat2) in zip(ring, ring[1:] + ring[:1]):
+        total += math.radians(lon2 - lon1) * (
+            2 + math.sin(math.radians(lat1)) + math.sin(math.radians(lat2))
+        )
+    return abs(total * _EARTH_RADIUS_M * _EARTH_RADIUS_M / 2.0)
+
 
 def _count_polygons_in_kml_bytes(kml_bytes: bytes) -> int:
+    return _analyze_kml_bytes(kml_bytes)["polygons"]
+
+
+def _analyze_kml_bytes(kml_bytes: bytes) -> Dict[str, Any]:
     from xml.etree import ElementTree as ET
+
+    stats: Dict[str, Any] = {
+        "polygons": 0,
+        "placemarks": 0,
+        "linestrings": 0,
+        "points": 0,
+        "vertices": 0,
+        "area_m2": 0.0,
+        "bbox": None,
+        "layers": [],
+        "parse_error": None,
+    }
     try:
         root = ET.fromstring(kml_bytes)
-    except Exception:
-        return 0
-    ns = {"kml": "http://www.opengis.net/kml/2.2"}
-    polys = root.findall(".//kml:Polygon", ns)
-    if polys:
-        return len(polys)
-    polys = root.findall(".//Polygon")
-    return len(polys) if polys else 0
+    except Exception as e:
+        stats["parse_error"] = str(e)
+        return stats
 
-def parse_kmz_for_polygon(path: Path) -> bool:
-    import zipfile
-    try:
-        with zipfile.ZipFile(path, "r") as zf:
-            for name in zf.namelist():
-                if name.lower().endswith(".kml"):
-                    try:
-                        kml_bytes = zf.read(name)
-                    except Exception:
-                        continue
-                    if _count_polygons_in_kml_bytes(kml_bytes) > 0:
-                        return True
-        return False
-    except Exception:
-        return False
+    min_lon = min_lat = math.inf
+    max_lon = max_lat = -math.inf
+
+    def _layer_name(el) -> str:
+        for child in el:
+            if _local(child.tag) == "name":
+                return (child.text or "").strip()
+        return ""
 
-def read_kmz_file(path: Path) -> List[str]:
+    # Walk once; each Folder/Document opens a layer that collects its own counts.
+    def walk(el, layer: Optional[Dict[str, Any]]):
+        nonlocal min_lon, min_lat, max_lon, max_lat
+        tag = _local(el.tag)
+        if tag in ("Folder", "Document"):
+            layer = {"name": _layer_name(el) or tag, "kind": tag, "placemarks": 0, "polygons": 0}
+            stats["layers"].append(layer)
+        elif tag == "Placemark":
+            stats["placemarks"] += 1
+            if layer is not None:
+                layer["placemarks"] += 1
+        elif tag == "Polygon":
+            stats["polygons"] += 1
+            if layer is not None:
+                layer["polygons"] += 1
+            outer = _outer_coords(el)
+            for sub in el.iter():
+                if _local(sub.tag) != "coordinates":
+                    continue
+                ring = _parse_coords(sub.text)
+                stats["vertices"] += len(ring)
+                stats["area_m2"] += _ring_area_m2(ring) if sub is outer else 0.0
+                for lon, lat in ring:
+                    min_lon, max_lon = min(min_lon, lon), max(max_lon, lon)
+                    min_lat, max_lat = min(min_lat, lat), max(max_lat, lat)
+            return
+        elif tag == "LineString":
+            stats["linestrings"] += 1
+        elif tag == "Point":
+            stats["points"] += 1
+        for child in el:
+            walk(child, layer)
+
+    walk(root, None)
+    stats["layers"] = [lay for lay in stats["layers"] if lay["placemarks"] or lay["polygons"]]
+    if min_lon is not math.inf:
+        stats["bbox"] = [min_lon, min_lat, max_lon, max_lat]
+    stats["area_m2"] = round(stats["area_m2"], 1)
+    return stats
+
+
+def _outer_coords(poly_el):
+    for el in poly_el.iter():
+        if _local(el.tag) == "outerBoundaryIs":
+            for sub in el.iter():
+                if _local(sub.tag) == "coordinates":
+                    return sub
+    return None
+
+
+def _merge_bbox(a: Optional[List[float]], b: Optional[List[float]]) -> Optional[List[float]]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+
+
+def _analyze_kmz_uncached(path: Path, sha: Optional[str], data: Optional[bytes] = None) -> Dict[str, Any]:
+    import io
     import zipfile
-    summary = []
+
+    analysis: Dict[str, Any] = {
+        "version": _KMZ_ANALYSIS_VERSION,
+        "file": path.name,
+        "sha256": sha,
+        "error": None,
+        "kml_files": [],
+        "polygon_count": 0,
+        "placemark_count": 0,
+        "geometry": {"vertices": 0, "linestrings": 0, "points": 0, "area_m2": 0.0, "bbox": None},
+        "layers": [],
+    }
     try:
-        with zipfile.ZipFile(path, "r") as zf:
-            kml_names = [n for n in zf.namelist() if n.lower().endswith(".kml")]
-            if not kml_names:
-                return [f"[KMZ] No KML files found in {path.name}."]
-            total_polys = 0
-            per_file = []
-            for n in kml_names:
+        with zipfile.ZipFile(io.BytesIO(data) if data is not None else path, "r") as zf:
+            for name in zf.namelist():
+                if not name.lower().endswith(".kml"):
+                    continue
                 try:
-                    cnt = _count_polygons_in_kml_bytes(zf.read(n))
-                except Exception:
-                    cnt = 0
-                total_polys += cnt
-                per_file.append(f"{n}({cnt})")
-            summary.append(f"[KMZ] Found {total_polys} polygons in {', '.join(per_file)}.")
+                    st = _analyze_kml_bytes(zf.read(name))
+                except Exception as e:
+                    st = _analyze_kml_bytes(b"")
+                    st["parse_error"] = str(e)
+                analysis["kml_files"].append({"name": name, "polygons": st["polygons"],
+                                              "placemarks": st["placemarks"],
+                                              "parse_error": st["parse_error"]})
+                analysis["polygon_count"] += st["polygons"]
+                analysis["placemark_count"] += st["placemarks"]
+                geo = analysis["geometry"]
+                geo["vertices"] += st["vertices"]
+                geo["linestrings"] += st["linestrings"]
+                geo["points"] += st["points"]
+                geo["area_m2"] = round(geo["area_m2"] + st["area_m2"], 1)
+                geo["bbox"] = _merge_bbox(geo["bbox"], st["bbox"])
+                for lay in st["layers"]:
+                    analysis["layers"].append({"kml": name, **lay})
     except Exception as e:
-        summary.append(f"[KMZ] Failed to read {path.name}: {e}")
-    return summary or [f"[KMZ] No polygons found in {path.name}."]
\ No newline at end of file
+        analysis["error"] = str(e)
+    return analysis
+
+
+def analyze_kmz(path: Path, data: Optional[bytes] = None, sha256: Optional[str] = None) -> Dict[str, Any]:
+    """Parse a KMZ once and return its polygon counts, geometry stats and per-layer summary.
+
+    ``data`` holds the archive bytes when it was read from inside another archive; ``path``
+    then only names it. Results are memoized by archive content hash, in-process and on disk.
+    """
+    try:
+        sha = sha256 or (hashlib.sha256(data).hexdigest() if data is not None else file_sha256(path))
+    except Exception:
+        return _analyze_kmz_uncached(path, None, data)
+    cached = cache_get("kmz", sha)
+    if isinstance(cached, dict) and cached.get("version") == _KMZ_ANALYSIS_VERSION:
+        return {**cached, "file": path.name}
+    analysis = _analyze_kmz_uncached(path, sha, data)
+    if analysis["error"] is None:
+        cache_put("kmz", sha, analysis)
+    return analysis
+
+
+def parse_kmz_for_polygon(path: Path) -> bool:
+    return analyze_kmz(path)["polygon_count"] > 0
+
+
+def read_kmz_file(path: Path, data: Optional[bytes] = None, sha256: Optional[str] = None) -> List[str]:
+    a = analyze_kmz(path, data, sha256)
+    if a["error"] is not None:
+        return [f"[KMZ] Failed to read {path.name}: {a['error']}"]
+    if not a["kml_files"]:
+        return [f"[KMZ] No KML files found in {path.name}."]
+    per_file = ", ".join(f"{k['name']}({k['polygons']})" for k in a["kml_files"])
+    summary = [f"[KMZ] Found {a['polygon_count']} polygons in {per_file}."]
+    geo = a["geometry"]
+    if a["polygon_count"]:
+        bbox = geo["bbox"]
+        bbox_txt = (
+            f"lon {bbox[0]:.6f}..{bbox[2]:.6f}, lat {bbox[1]:.6f}..{bbox[3]:.6f}" if bbox else "n/a"
+        )
+        summary.append(
+            f"[KMZ] Geometry: {geo['vertices']} vertices, approx. polygon area "
+            f"{geo['area_m2'] / 10000.0:.2f} ha, bbox {bbox_txt}."
+        )
+    for lay in a["layers"]:
+        summary.append(
+            f"[KMZ] Layer {lay['kind']} '{lay['name']}' ({lay['kml']}): "
+            f"{lay['placemarks']} placemarks, {lay['polygons']} polygons."
+        )
+    return summary
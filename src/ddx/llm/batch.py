@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+import hashlib
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ddx.llm.providers import ChatProvider
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+# Terminal states of the OpenAI Batch API; the local backend uses the same vocabulary.
+_DONE_STATES = ("completed", "failed", "expired", "cancelled")
+
+
+def build_batch_line(
+    custom_id: str,
+    model: str,
+    messages: List[Dict[str, str]],
+    response_format: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": model,
+            "messages": messages,
+            "temperature": 0.0,
+            "response_format": response_format or {"type": "text"},
+        },
+    }
+
+
+def write_batch_file(path: Path, lines: List[Dict[str, Any]]) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    return path
+
+
+def _lines_sha256(lines: List[Dict[str, Any]]) -> str:
+    """sha256 of ``lines`` as ``write_batch_file`` serializes them."""
+    h = hashlib.sha256()
+    for line in lines:
+        h.update((json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8"))
+    return h.hexdigest()
+
+
+def _body_usage(body: Dict[str, Any]) -> Dict[str, int]:
+    u = body.get("usage") or {}
+    return {
+        "prompt_tokens": int(u.get("prompt_tokens") or 0),
+        "completion_tokens": int(u.get("completion_tokens") or 0),
+        "cached_tokens": int((u.get("prompt_tokens_details") or {}).get("cached_tokens") or 0),
+    }
+
+
+def parse_batch_output(text: str) -> Dict[str, Dict[str, Any]]:
+    """Map custom_id -> {"content", "usage", "error"} from a batch output/error JSONL."""
+    out: Dict[str, Dict[str, Any]] = {}
+    for raw in (text or "").splitlines():
+        if not raw.strip():
+            continue
+        try:
+            rec = json.loads(raw)
+        except Exception:
+            continue
+        cid = rec.get("custom_id")
+        if not cid:
+            continue
+        resp = rec.get("response") or {}
+        body = resp.get("body") or {}
+        err = rec.get("error")
+        if not err and int(resp.get("status_code") or 0) != 200:
+            err = (body.get("error") or {}).get("message") or f"status {resp.get('status_code')}"
+        content = None
+        if not err:
+            try:
+                content = body["choices"][0]["message"]["content"]
+            except Exception:
+                err = "malformed batch response body"
+        if isinstance(err, dict):
+            err = err.get("message") or json.dumps(err)
+        out[cid] = {"content": content, "usage": _body_usage(body), "error": err}
+    return out
+
+
+class BatchTimeout(TimeoutError):
+    """A batch still running when ``run_batch`` stopped waiting; it is left to finish remotely."""
+
+    def __init__(self, batch_id: str, status: str, seconds: float):
+        super().__init__(f"batch {batch_id} still '{status}' after {seconds:.0f}s")
+        self.batch_id = batch_id
+        self.status = status
+
+
+class BatchBackend:
+    """Submit a request JSONL, then poll until a terminal state and fetch the output JSONL."""
+
+    name = "base"
+    default_poll_seconds = 60.0
+
+    def submit(self, input_path: Path) -> str:
+        raise NotImplementedError
+
+    def poll(self, batch_id: str) -> Tuple[str, Optional[str]]:
+        """Return (status, output_text); output_text is set once the batch is terminal."""
+        raise NotImplementedError
+
+
+class OpenAIBatchBackend(BatchBackend):
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str] = None, completion_window: str = "24h"):
+        try:
+            from openai import OpenAI  # type: ignore
+        except Exception as e:
+            raise RuntimeError("openai Python package not installed. `pip install openai`") from e
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise RuntimeError("OPENAI_API_KEY not set in .env or environment.")
+        self._client = OpenAI(api_key=api_key)
+        self.completion_window = completion_window
+
+    def submit(self, input_path: Path) -> str:
+        with input_path.open("rb") as f:
+            up = self._client.files.create(file=f, purpose="batch")
+        batch = self._client.batches.create(
+            input_file_id=up.id, endpoint=BATCH_ENDPOINT, completion_window=self.completion_window
+        )
+        return batch.id
+
+    def _file_text(self, file_id: Optional[str]) -> str:
+        if not file_id:
+            return ""
+        return self._client.files.content(file_id).text
+
+    def poll(self, batch_id: str) -> Tuple[str, Optional[str]]:
+        batch = self._client.batches.retrieve(batch_id)
+        if batch.status not in _DONE_STATES:
+            return batch.status, None
+        # Per-request failures land in the error file; both share the output line format
+        text = self._file_text(getattr(batch, "output_file_id", None))
+        err = self._file_text(getattr(batch, "error_file_id", None))
+        return batch.status, "\n".join(t for t in (text, err) if t)
+
+
+class LocalBatchBackend(BatchBackend):
+    """File-based stand-in: ``<root>/<batch_id>/{input,output}.jsonl`` plus ``state.json``.
+
+    The batch is executed through a ``ChatProvider`` (typically mock or replay) on the first
+    poll after submission, so callers exercise the same submit/poll/join path as the real API.
+    """
+
+    name = "local"
+    default_poll_seconds = 0.1
+
+    def __init__(self, root: Path, provider: ChatProvider):
+        self.root = Path(root)
+        self.provider = provider
+
+    def _state_path(self, batch_id: str) -> Path:
+        return self.root / batch_id / "state.json"
+
+    def _write_state(self, batch_id: str, status: str) -> None:
+        self._state_path(batch_id).write_text(json.dumps({"id": batch_id, "status": status}), encoding="utf-8")
+
+    def submit(self, input_path: Path) -> str:
+        batch_id = f"batch_local_{uuid.uuid4().hex[:12]}"
+        d = self.root / batch_id
+        d.mkdir(parents=True, exist_ok=True)
+        (d / "input.jsonl").write_bytes(Path(input_path).read_bytes())
+        self._write_state(batch_id, "validating")
+        return batch_id
+
+    def _execute(self, batch_id: str) -> None:
+        d = self.root / batch_id
+        lines = []
+        for raw in (d / "input.jsonl").read_text(encoding="utf-8").splitlines():
+            if not raw.strip():
+                continue
+            req = json.loads(raw)
+            body = req.get("body") or {}
+            rec: Dict[str, Any] = {"id": f"req_{uuid.uuid4().hex[:12]}", "custom_id": req.get("custom_id")}
+            try:
+                content, usage = self.provider.chat(
+                    body.get("messages") or [], body.get("model") or "", body.get("response_format")
+                )
+                rec["response"] = {
+                    "status_code": 200,
+                    "body": {
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+                        "usage": {
+                            "prompt_tokens": usage.get("prompt_tokens", 0),
+                            "completion_tokens": usage.get("completion_tokens", 0),
+                            "prompt_tokens_details": {"cached_tokens": usage.get("cached_tokens", 0)},
+                        },
+                    },
+                }
+                rec["error"] = None
+            except Exception as e:
+                rec["response"] = None
+                rec["error"] = {"code": "provider_error", "message": str(e)}
+            lines.append(rec)
+        write_batch_file(d / "output.jsonl", lines)
+
+    def poll(self, batch_id: str) -> Tuple[str, Optional[str]]:
+        try:
+            status = json.loads(self._state_path(batch_id).read_text(encoding="utf-8"))["status"]
+        except Exception:
+            return "failed", ""
+        if status == "validating":
+            self._write_state(batch_id, "in_progress")
+            return "in_progress", None
+        if status == "in_progress":
+            self._execute(batch_id)
+            self._write_state(batch_id, "completed")
+            status = "completed"
+        out = self.root / batch_id / "output.jsonl"
+        return status, out.read_text(encoding="utf-8") if out.exists() else ""
+
+
+def _resume_batch(
+    backend: BatchBackend, work_dir: Path, lines: List[Dict[str, Any]]
+) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """(batch_id, status, output_text) of the batch a previous run submitted from ``work_dir``.
+
+    Only reused when it went to the same backend with exactly these request lines (compared by
+    hash) and has not failed, expired or been cancelled; otherwise (None, None, None) and a new
+    batch is submitted.
+    """
+    try:
+        prev = json.loads((work_dir / "batch.json").read_text(encoding="utf-8"))
+    except Exception:
+        return None, None, None
+    if (prev.get("backend") != backend.name or not prev.get("batch_id")
+            or prev.get("sha256") != _lines_sha256(lines)):
+        return None, None, None
+    try:
+        status, text = backend.poll(prev["batch_id"])
+    except Exception:
+        return None, None, None
+    if status in ("failed", "expired", "cancelled"):
+        return None, None, None
+    return prev["batch_id"], status, text
+
+
+def run_batch(
+    backend: BatchBackend,
+    lines: List[Dict[str, Any]],
+    work_dir: Path,
+    *,
+    poll_seconds: Optional[float] = None,
+    timeout_seconds: float = 24 * 3600.0,
+    on_poll=None,
+    stop=None,
+) -> Dict[str, Any]:
+    """Write, submit and poll one batch; returns {"batch_id", "status", "input", "results"}.
+
+    A batch recorded in ``work_dir/batch.json`` by an earlier run (one that timed out or was
+    interrupted) is polled again instead of being resubmitted when its requests are the same.
+
+    ``results`` maps custom_id -> {"content", "usage", "error"}; requests missing from the
+    output (expired or cancelled batches) are reported with an error rather than dropped.
+    Raises ``BatchTimeout`` when the batch is not done within ``timeout_seconds``, or once
+    ``stop()`` returns true between polls.
+    """
+    work_dir.mkdir(parents=True, exist_ok=True)
+    input_path = work_dir / "requests.jsonl"
+    batch_id, status, text = _resume_batch(backend, work_dir, lines)
+    if batch_id is None:
+        write_batch_file(input_path, lines)
+        batch_id = backend.submit(input_path)
+        (work_dir / "batch.json").write_text(
+            json.dumps({"batch_id": batch_id, "backend": backend.name, "requests": len(lines),
+                        "sha256": _lines_sha256(lines)}),
+            encoding="utf-8",
+        )
+        status, text = backend.poll(batch_id)
+    t0 = time.monotonic()
+    while True:
+        if on_poll is not None:
+            on_poll(batch_id, status)
+        if text is not None:
+            break
+        waited = time.monotonic() - t0
+        if waited >= max(0.0, timeout_seconds) or (stop is not None and stop()):
+            raise BatchTimeout(batch_id, status, waited)
+        time.sleep(max(0.0, backend.default_poll_seconds if poll_seconds is None else poll_seconds))
+        status, text = backend.poll(batch_id)
+    (work_dir / "results.jsonl").write_text(text, encoding="utf-8")
+    results = parse_batch_output(text)
+    for line in lines:
+        results.setdefault(
+            line["custom_id"],
+            {"content": None, "usage": {}, "error": f"no result (batch {status})"},
+        )
+    return {"batch_id": batch_id, "status": status, "input": str(input_path), "results": results}
@@ -1,65 +1,172 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 from __future__ import annotations
+import copy
 import os
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
 
+from ddx.llm.batch import (
+    BatchBackend, LocalBatchBackend, OpenAIBatchBackend, build_batch_line, run_batch,
+)
+from ddx.llm.providers import ChatProvider, ReplayProvider, make_provider
+from ddx.utils.stages import timed_stage
+
 load_dotenv()
 
+# Providers that never touch the network; they don't need an LLM_MODEL to be set.
+_OFFLINE_PROVIDERS = ("mock", "replay")
 
-class LLMClient:
-    def __init__(self, provider: str = "openai", model: Optional[str] = None):
-        self.provider = provider.lower()
-        self.model = model or os.getenv("LLM_MODEL", "")
-        if self.provider == "openai":
-            self._init_openai()
-        else:
-            raise ValueError(f"Unsupported provider: {provider}")
 
-    def _init_openai(self):
-        try:
-            from openai import OpenAI  # type: ignore
-        except Exception as e:
-            raise RuntimeError("openai Python package not installed. `pip install openai`") from e
+class LLMClient:
+    """Provider-agnostic chat client with cumulative usage accounting.
 
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise RuntimeError("OPENAI_API_KEY not set in .env or environment.")
-        self._openai = OpenAI(api_key=api_key)
+    ``provider`` is ``openai``, ``mock``, ``replay`` or ``record`` (see ``ddx.llm.providers``);
+    a ready-made ``ChatProvider`` instance may be passed instead.
+    """
 
+    def __init__(self, provider: Any = "openai", model: Optional[str] = None, **options):
+        if isinstance(provider, ChatProvider):
+            self._provider = provider
+        else:
+            self._provider = make_provider(str(provider), **options)
+        self.provider = self._provider.name
+        self.model = model or os.getenv("LLM_MODEL", "")
+        replay = self._provider if isinstance(self._provider, ReplayProvider) else None
+        if not self.model and replay is not None:
+            # Replays are keyed on the model; default to the one the recordings were made with
+            self.model = replay.recorded_model() or ""
         if not self.model:
-            self.model = os.getenv("LLM_MODEL", "gpt-4o-mini")
+            self.model = "mock-model" if self.provider in _OFFLINE_PROVIDERS else "gpt-4o-mini"
+        if replay is not None:
+            replay.remember_model(self.model)
+        self._usage_lock = threading.Lock()
+        self._usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+        self._by_model: Dict[str, Dict[str, Any]] = {}
+
+    def for_model(self, model: str) -> "LLMClient":
+        """A client for ``model`` on the same provider, sharing this client's usage accounting
+        (see ``usage_snapshot()["by_model"]``)."""
+        if not model or model == self.model:
+            return self
+        view = copy.copy(self)
+        view.model = model
+        return view
 
     def chat(
         self, messages: List[Dict[str, str]], response_format: Optional[Dict[str, Any]] = None
     ) -> str:
-        if self.provider == "openai":
-            return self._chat_openai(messages, response_format)
-        raise ValueError(f"Unsupported provider: {self.provider}")
+        with timed_stage("llm", model=self.model) as span:
+            t0 = time.perf_counter()
+            content, usage = self._provider.chat(messages, self.model, response_format)
+            self._record_usage(usage, time.perf_counter() - t0, span)
+        return content
 
-    def _chat_openai(
-        self, messages: List[Dict[str, str]], response_format: Optional[Dict[str, Any]]
+    async def achat(
+        self, messages: List[Dict[str, str]], response_format: Optional[Dict[str, Any]] = None
     ) -> str:
-        resp = self._openai.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=0.0,
-            response_format=response_format or {"type": "text"},
+        with timed_stage("llm", model=self.model) as span:
+            t0 = time.perf_counter()
+            content, usage = await self._provider.achat(messages, self.model, response_format)
+            self._record_usage(usage, time.perf_counter() - t0, span)
+        return content
+
+    def batch_backend(self, root: Path) -> BatchBackend:
+        """OpenAI Batch API for the openai provider; a file-based local batch otherwise."""
+        if self.provider == "openai":
+            return OpenAIBatchBackend()
+        return LocalBatchBackend(Path(root) / "local", self._provider)
+
+    def chat_batch(
+        self,
+        requests: List[Tuple[str, List[Dict[str, str]], Optional[Dict[str, Any]]]],
+        work_dir: Path,
+        *,
+        poll_seconds: Optional[float] = None,
+        timeout_seconds: float = 24 * 3600.0,
+        on_poll=None,
+        stop=None,
+    ) -> Dict[str, Any]:
+        """Submit (custom_id, messages, response_format) requests as one batch and wait for it.
+
+        Returns ``run_batch``'s summary; usage of every answered request is accounted here.
+        """
+        lines = [build_batch_line(cid, self.model, msgs, rf) for cid, msgs, rf in requests]
+        out = run_batch(
+            self.batch_backend(work_dir),
+            lines,
+            Path(work_dir),
+            poll_seconds=poll_seconds,
+            timeout_seconds=timeout_seconds,
+            on_poll=on_poll,
+            stop=stop,
+        )
+        for res in out["results"].values():
+            if res.get("error") is None:
+                self._record_usage(res.get("usage"))
+        return out
+
+    def _record_usage(self, usage: Optional[Dict[str, int]], seconds: Optional[float] = None,
+                      span: Optional[Dict[str, Any]] = None) -> None:
+        usage = usage or {}
+        if span is not None:
+            span.update({k: usage.get(k) for k in ("prompt_tokens", "completion_tokens", "cached_tokens")})
+        with self._usage_lock:
+            per_model = self._by_model.setdefault(
+                self.model,
+                {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "seconds": 0.0},
+            )
+            for tally in (self._usage, per_model):
+                tally["calls"] += 1
+                tally["prompt_tokens"] += int(usage.get("prompt_tokens", 0) or 0)
+                tally["completion_tokens"] += int(usage.get("completion_tokens", 0) or 0)
+                tally["cached_tokens"] += int(usage.get("cached_tokens", 0) or 0)
+            # Batch results carry no per-request latency
+            if seconds is not None:
+                per_model["seconds"] += seconds
+
+    def usage_snapshot(self) -> Dict[str, Any]:
+        """Cumulative token usage; cached_tokens counts provider prompt-cache hits.
+
+        ``by_model`` splits calls, tokens and wall-clock ``seconds`` by model, which is how
+        the tiers of a model cascade are told apart.
+        """
+        with self._usage_lock:
+            snap = dict(self._usage)
+            by_model = {m: dict(u) for m, u in self._by_model.items()}
+        snap["cached_ratio"] = (
+            round(snap["cached_tokens"] / snap["prompt_tokens"], 4) if snap["prompt_tokens"] else 0.0
         )
-        return resp.choices[0].message.content
+        for u in by_model.values():
+            u["seconds"] = round(u["seconds"], 3)
+        snap["by_model"] = by_model
+        return snap
 
     def complete(self, prompt: str, **kwargs) -> str:
-        if self.provider == "openai":
-            from openai import OpenAI
+        with timed_stage("llm", model=self.model) as span:
+            t0 = time.perf_counter()
+            content, usage = self._provider.chat(
+                [{"role": "user", "content": prompt}],
+                self.model,
+                None,
+                temperature=kwargs.get("temperature", 0.0),
+                max_tokens=kwargs.get("max_tokens", 500),
+            )
+            self._record_usage(usage, time.perf_counter() - t0, span)
+        return (content or "").strip()
 
-            client = OpenAI()
-            resp = client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
+    async def acomplete(self, prompt: str, **kwargs) -> str:
+        with timed_stage("llm", model=self.model) as span:
+            t0 = time.perf_counter()
+            content, usage = await self._provider.achat(
+                [{"role": "user", "content": prompt}],
+                self.model,
+                None,
                 temperature=kwargs.get("temperature", 0.0),
                 max_tokens=kwargs.get("max_tokens", 500),
             )
-            # Return the content in both branches
-            return resp.choices[0].message.content.strip()
-        raise NotImplementedError(f"No .complete() handler for provider={self.provider}")
+            self._record_usage(usage, time.perf_counter() - t0, span)
+        return (content or "").strip()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# A provider call returns (content, usage) where usage is a plain dict with
+# prompt_tokens / completion_tokens / cached_tokens (missing keys count as 0).
+ChatResult = Tuple[str, Dict[str, int]]
+
+
+class ChatProvider:
+    """Interface every LLM backend implements; ``achat`` must not block the event loop."""
+
+    name = "base"
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        response_format: Optional[Dict[str, Any]] = None,
+        **kwargs,
+    ) -> ChatResult:
+        raise NotImplementedError
+
+    async def achat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        response_format: Optional[Dict[str, Any]] = None,
+        **kwargs,
+    ) -> ChatResult:
+        return await asyncio.to_thread(self.chat, messages, model, response_format, **kwargs)
+
+
+def _usage_dict(usage: Any) -> Dict[str, int]:
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": int(getattr(usage, "prompt_tokens", 0) or 0),
+        "completion_tokens": int(getattr(usage, "completion_tokens", 0) or 0),
+        "cached_tokens": int(getattr(details, "cached_tokens", 0) or 0),
+    }
+
+
+class OpenAIProvider(ChatProvider):
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str] = None, timeout: Optional[float] = None):
+        try:
+            from openai import OpenAI, AsyncOpenAI  # type: ignore
+        except Exception as e:
+            raise RuntimeError("openai Python package not installed. `pip install openai`") from e
+
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise RuntimeError("OPENAI_API_KEY not set in .env or environment.")
+        # The SDK retries a timed-out request itself; ``timeout`` bounds each attempt
+        self._timeout = timeout
+        self._client = OpenAI(api_key=api_key, timeout=timeout) if timeout else OpenAI(api_key=api_key)
+        self._async_cls = AsyncOpenAI
+        self._api_key = api_key
+        self._aclient = None
+
+    def _params(self, messages, model, response_format, kwargs) -> Dict[str, Any]:
+        params = {
+            "model": model,
+            "messages": messages,
+            "temperature": kwargs.get("temperature", 0.0),
+            "response_format": response_format or {"type": "text"},
+        }
+        if kwargs.get("max_tokens") is not None:
+            params["max_tokens"] = kwargs["max_tokens"]
+        return params
+
+    def chat(self, messages, model, response_format=None, **kwargs) -> ChatResult:
+        resp = self._client.chat.completions.create(
+            **self._params(messages, model, response_format, kwargs)
+        )
+        return resp.choices[0].message.content, _usage_dict(getattr(resp, "usage", None))
+
+    async def achat(self, messages, model, response_format=None, **kwargs) -> ChatResult:
+        if self._aclient is None:
+            self._aclient = (
+                self._async_cls(api_key=self._api_key, timeout=self._timeout)
+                if self._timeout
+                else self._async_cls(api_key=self._api_key)
+            )
+        resp = await self._aclient.chat.completions.create(
+            **self._params(messages, model, response_format, kwargs)
+        )
+        return resp.choices[0].message.content, _usage_dict(getattr(resp, "usage", None))
+
+
+def request_key(
+    messages: List[Dict[str, str]], model: str, response_format: Optional[Dict[str, Any]]
+) -> str:
+    raw = json.dumps(
+        {"model": model, "messages": messages, "response_format": response_format},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _schema_skeleton(schema: Dict[str, Any]) -> Any:
+    # Smallest instance that validates: null where allowed, empty arrays, zero/blank scalars
+    if "anyOf" in schema:
+        return _schema_skeleton(schema["anyOf"][-1])
+    t = schema.get("type")
+    types = t if isinstance(t, list) else [t]
+    if "null" in types:
+        return None
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "object" in types:
+        return {k: _schema_skeleton(v) for k, v in (schema.get("properties") or {}).items()}
+    if "array" in types:
+        return []
+    if "number" in types or "integer" in types:
+        return 0
+    if "boolean" in types:
+        return False
+    return ""
+
+
+def _default_mock_content(messages: List[Dict[str, str]], response_format) -> str:
+    rf = response_format or {}
+    if rf.get("type") == "json_schema":
+        obj = _schema_skeleton((rf.get("json_schema") or {}).get("schema") or {})
+        if isinstance(obj, dict) and "confidence" in obj:
+            obj["confidence"] = 0.5
+            obj["notes"] = ["mock provider response"]
+        return json.dumps(obj)
+    if rf.get("type") == "json_object":
+        return json.dumps(
+            {
+                "value": None,
+                "unit": None,
+                "intermediate": {},
+                "evidence": [],
+                "evidence_structured": [],
+                "confidence": 0.5,
+                "notes": ["mock provider response"],
+            }
+        )
+    return "mock provider response"
+
+
+class MockProvider(ChatProvider):
+    """Offline provider with configurable latency and deterministic failure injection.
+
+    Whether a request fails depends only on its content and ``seed``, so a load test
+    replays identically. ``responder(messages, response_format)`` customizes the content.
+    A call whose latency exceeds ``timeout`` seconds raises TimeoutError after ``timeout``.
+    """
+
+    name = "mock"
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+        responder: Optional[Callable[[List[Dict[str, str]], Any], str]] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.latency_ms = max(0.0, latency_ms)
+        self.timeout = timeout if timeout and timeout > 0 else None
+        self.jitter_ms = max(0.0, jitter_ms)
+        self.failure_rate = min(1.0, max(0.0, failure_rate))
+        self.seed = seed
+        self.responder = responder or _default_mock_content
+
+    def _plan(self, messages, model, response_format) -> Tuple[float, bool]:
+        rnd = random.Random(f"{self.seed}:{request_key(messages, model, response_format)}")
+        delay = (self.latency_ms + rnd.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+        return max(0.0, delay), rnd.random() < self.failure_rate
+
+    def _result(self, messages, response_format) -> ChatResult:
+        content = self.responder(messages, response_format)
+        prompt_chars = sum(len(m.get("content") or "") for m in messages)
+        return content, {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": len(content) // 4,
+            "cached_tokens": 0,
+        }
+
+    def chat(self, messages, model, response_format=None, **kwargs) -> ChatResult:
+        delay, fail = self._plan(messages, model, response_format)
+        if self.timeout is not None and delay > self.timeout:
+            time.sleep(self.timeout)
+            raise TimeoutError(f"mock provider: request timed out after {self.timeout:g}s")
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError("mock provider: injected failure")
+        return self._result(messages, response_format)
+
+    async def achat(self, messages, model, response_format=None, **kwargs) -> ChatResult:
+        delay, fail = self._plan(messages, model, response_format)
+        if self.timeout is not None and delay > self.timeout:
+            await asyncio.sleep(self.timeout)
+            raise TimeoutError(f"mock provider: request timed out after {self.timeout:g}s")
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError("mock provider: injected failure")
+        return self._result(messages, response_format)
+
+
+class ReplayProvider(ChatProvider):
+    """Serves recorded request/response pairs from ``<root>/<key[:2]>/<key>.json``.
+
+    With ``inner`` set (record mode) misses are forwarded to it and written to disk;
+    without it a miss raises ``KeyError`` so replays never silently hit the network.
+    Record mode also keeps the client's model in ``<root>/model.json``: requests are keyed on
+    the model, so a replay without ``--model`` must default to the one recorded.
+    """
+
+    name = "replay"
+    _MODEL_FILE = "model.json"
+
+    def __init__(self, root: Path, inner: Optional[ChatProvider] = None):
+        self.root = Path(root)
+        self.inner = inner
+        self._lock = threading.Lock()
+        if inner is not None:
+            self.name = "record"
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def recorded_model(self) -> Optional[str]:
+        try:
+            return json.loads((self.root / self._MODEL_FILE).read_text(encoding="utf-8")).get("model") or None
+        except Exception:
+            return None
+
+    def remember_model(self, model: str) -> None:
+        if self.inner is None or not model:
+            return
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            (self.root / self._MODEL_FILE).write_text(json.dumps({"model": model}), encoding="utf-8")
+
+    def _load(self, key: str) -> Optional[ChatResult]:
+        try:
+            rec = json.loads(self._path(key).read_text(encoding="utf-8"))
+        except Exception:
+            return None
+        return rec["response"]["content"], rec["response"].get("usage") or {}
+
+    def _save(self, key, messages, model, response_format, result: ChatResult) -> None:
+        p = self._path(key)
+        rec = {
+            "key": key,
+            "request": {"model": model, "messages": messages, "response_format": response_format},
+            "response": {"content": result[0], "usage": result[1]},
+        }
+        with self._lock:
+            p.parent.mkdir(parents=True, exist_ok=True)
+            tmp = p.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(rec, ensure_ascii=False, indent=2), encoding="utf-8")
+            tmp.replace(p)
+
+    def chat(self, messages, model, response_format=None, **kwargs) -> ChatResult:
+        key = request_key(messages, model, response_format)
+        hit = self._load(key)
+        if hit is not None:
+            return hit
+        if self.inner is None:
+            raise KeyError(f"replay: no recorded response for request {key[:12]}")
+        result = self.inner.chat(messages, model, response_format, **kwargs)
+        self._save(key, messages, model, response_format, result)
+        return result
+
+    async def achat(self, messages, model, response_format=None, **kwargs) -> ChatResult:
+        key = request_key(messages, model, response_format)
+        hit = self._load(key)
+        if hit is not None:
+            return hit
+        if self.inner is None:
+            raise KeyError(f"replay: no recorded response for request {key[:12]}")
+        result = await self.inner.achat(messages, model, response_format, **kwargs)
+        self._save(key, messages, model, response_format, result)
+        return result
+
+
+def make_provider(name: str, **options) -> ChatProvider:
+    """Build a provider by name: openai | mock | replay | record.
+
+    Options: ``replay_dir`` (replay/record, else env DDX_LLM_REPLAY_DIR), ``latency_ms``,
+    ``jitter_ms``, ``failure_rate``, ``seed`` (mock, else DDX_MOCK_* env vars) and
+    ``timeout`` seconds per call (openai/mock, else env DDX_LLM_TIMEOUT).
+    """
+    name = (name or "openai").lower()
+    timeout = float(options.get("timeout") or os.getenv("DDX_LLM_TIMEOUT", "0")) or None
+    if name == "openai":
+        return OpenAIProvider(timeout=timeout)
+    if name == "mock":
+        return MockProvider(
+            latency_ms=float(options.get("latency_ms") or os.getenv("DDX_MOCK_LATENCY_MS", "0")),
+            jitter_ms=float(options.get("jitter_ms") or os.getenv("DDX_MOCK_JITTER_MS", "0")),
+            failure_rate=float(
+                options.get("failure_rate") or os.getenv("DDX_MOCK_FAILURE_RATE", "0")
+            ),
+            seed=int(options.get("seed") or os.getenv("DDX_MOCK_SEED", "0")),
+            responder=options.get("responder"),
+            timeout=timeout,
+        )
+    if name in ("replay", "record"):
+        root = options.get("replay_dir") or os.getenv("DDX_LLM_REPLAY_DIR")
+        if not root:
+            raise ValueError(f"{name} provider needs --replay-dir or DDX_LLM_REPLAY_DIR")
+        inner = make_provider(options.get("record_provider") or "openai", **options) if name == "record" else None
+        return ReplayProvider(Path(root), inner=inner)
+    raise ValueError(f"Unsupported provider: {name}")
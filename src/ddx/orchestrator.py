@@ -1,30 +1,734 @@
 from __future__ import annotations
+import contextvars
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from ddx.llm.batch import BatchTimeout
 from ddx.llm.client import LLMClient
 from ddx.prompts.single_doc import build_prompt_single_doc
+from ddx.prompts.schema import compile_map_response_format, parse_structured, reask_message
 from ddx.reducer.normalize import normalize_per_doc, _normalize_single_doc_output
 from ddx.reducer.policy import reduce_by_policy
-from ddx.ingestion.files import discover_files, read_doc_pages
+from ddx.reducer.rules import compile_rules, pre_extract
+from ddx.ingestion.discovery import DEFAULT_DISCOVERY_WORKERS, build_manifest
+from ddx.ingestion.files import read_csv_profile, read_doc
+from ddx.ingestion.tables import matching_tables, render_tables
+from ddx.ingestion.tabular import monthly_energy_kwh, render_profile
+from ddx.reducer.units import conversion_factor, parse_unit, source_unit
+from ddx.storage.checkpoint import RunCheckpoint, docs_signature
+from ddx.utils.deadline import DEFAULT_STAGE_TIMEOUTS, Deadline
 from ddx.utils.progress import _progress_print
+from ddx.utils.stages import timed_stage
 
-def _llm_client(provider: str, model: str):
+def _llm_client(provider: str, model: str, timeout: Optional[float] = None):
+    if timeout:
+        return LLMClient(provider=provider, model=model or None, timeout=timeout)
     return LLMClient(provider=provider, model=model or None)
 
-def llm_extract_single_doc(field: Dict[str, Any], doc_text: str, provider: str, model: str, filename: str = None) -> Dict[str, Any]:
-    client = _llm_client(provider, model)
+PROMPT_LAYOUTS = ("field_first", "document_first")
+# Cascade answers below this (verification-scaled) confidence go to the next model tier
+DEFAULT_ESCALATE_CONFIDENCE = 0.75
+
+def _map_messages(prompt: str, doc_text: str, filename: Optional[str], layout: str) -> List[Dict[str, str]]:
+    system = {"role": "system", "content": "Return ONLY valid JSON matching the schema. No prose."}
+    if layout == "document_first":
+        # Document block first so every field mapped over this document shares a cacheable prefix
+        return [
+            system,
+            {"role": "user", "content": f"Document: {filename or '(unnamed)'}\n{doc_text}"},
+            {"role": "user", "content": prompt},
+        ]
+    return [system, {"role": "user", "content": f"{prompt}\\n\\nDocument:\\n{doc_text}"}]
+
+@timed_stage("prompt")
+def _map_request(field: Dict[str, Any], doc_text: str, filename: Optional[str], layout: str) -> List[Dict[str, str]]:
     prompt = build_prompt_single_doc(field, filename)
     if len(doc_text) > 12000:
         doc_text = doc_text[:12000] + "\\n[...truncated...]"
-    messages = [
-        {"role": "system", "content": "Return ONLY valid JSON matching the schema. No prose."},
-        {"role": "user", "content": f"{prompt}\\n\\nDocument:\\n{doc_text}"}
-    ]
+    return _map_messages(prompt, doc_text, filename, layout)
+
+def _complete_structured(client: LLMClient, messages: List[Dict[str, str]], response_format: Dict[str, Any],
+                         raw: Optional[str], max_reasks: int) -> Dict[str, Any]:
+    """Validate ``raw`` against the field schema, re-asking at most ``max_reasks`` times.
+
+    A response that never validates becomes an explicit error instead of a zero-filled guess.
+    """
+    schema = response_format["json_schema"]["schema"]
+    obj, errors = parse_structured(raw, schema)
+    attempts = 1
+    while errors and attempts <= max_reasks:
+        messages = messages + [{"role": "assistant", "content": raw or ""}, reask_message(errors)]
+        raw = client.chat(messages, response_format=response_format)
+        obj, errors = parse_structured(raw, schema)
+        attempts += 1
+    if errors:
+        return {
+            "error": f"invalid structured output after {attempts} attempt(s): {'; '.join(errors[:3])}",
+            "schema_errors": errors,
+            "raw": (raw or "")[:2000],
+        }
+    return obj
+
+def llm_extract_single_doc(field: Dict[str, Any], doc_text: str, provider: str, model: str, filename: str = None,
+                           *, client: Optional[LLMClient] = None, layout: str = "field_first",
+                           structured: bool = True, max_reasks: int = 1) -> Dict[str, Any]:
+    client = client or _llm_client(provider, model)
+    messages = _map_request(field, doc_text, filename, layout)
+    if structured:
+        rf = compile_map_response_format(field)
+        raw = client.chat(messages, response_format=rf)
+        return _complete_structured(client, messages, rf, raw, max_reasks)
     raw = client.chat(messages, response_format={"type": "json_object"})
     from ddx.utils.json import _json_loads_lenient
     return _json_loads_lenient(raw)
 
+@timed_stage("normalize")
+def _finish_map(meta: Dict[str, Any], fcfg: Dict[str, Any], idx: int, fn: str, txt: str,
+                j: Dict[str, Any]) -> Dict[str, Any]:
+    j_norm = normalize_per_doc(j, fcfg)
+    if j.get("error") or j.get("parse_error"):
+        # normalize_per_doc zero-fills missing keys; flag the doc so reducers ignore it
+        j_norm["error"] = j.get("error") or "unparseable JSON response"
+        j_norm["confidence"] = 0.0
+    if fn.lower().endswith(".kmz"):
+        evs = j_norm.get("evidence") or []
+        for ev in evs:
+            if isinstance(ev, dict):
+                ev["page"] = None
+        evs2 = j_norm.get("evidence_structured") or []
+        for ev in evs2:
+            if isinstance(ev, dict):
+                ev["page"] = None
+
+    j_norm["_doc_index"] = idx
+    j_norm["_filename"] = fn
+
+    inter_spec = ((fcfg.get("extraction_contract") or {}).get("intermediate") or {})
+    return _normalize_single_doc_output(fn, txt, j_norm, inter_spec)
+
+def _map_one(meta: Dict[str, Any], fcfg: Dict[str, Any], idx: int, fn: str, txt: str,
+             provider: str, model: str, client: Optional[LLMClient] = None,
+             layout: str = "field_first", structured: bool = True, max_reasks: int = 1,
+             cascade: Optional[Dict[str, Any]] = None, first_tier: int = 0) -> Dict[str, Any]:
+    """Map one document; with ``cascade`` start at tier ``first_tier`` and escalate (see
+    ``_escalation_reason``) until an answer is good enough or the tiers run out."""
+    if not cascade:
+        span_model = client.model if client else model or None
+        with timed_stage("map", field=meta.get("_key"), doc=fn, model=span_model):
+            try:
+                j = llm_extract_single_doc(meta, txt, provider, model, filename=fn, client=client, layout=layout,
+                                           structured=structured, max_reasks=max_reasks)
+            except Exception as e:
+                j = {"error": f"single_doc LLM failed: {e}"}
+            return _finish_map(meta, fcfg, idx, fn, txt, j)
+    client = client or _llm_client(provider, model)
+    models = cascade["models"]
+    attempts: List[Dict[str, Any]] = []
+    out: Dict[str, Any] = {}
+    for tier in range(first_tier, len(models)):
+        t0 = time.perf_counter()
+        out = _map_one(meta, fcfg, idx, fn, txt, provider, models[tier], client.for_model(models[tier]),
+                       layout, structured, max_reasks)
+        reason = _escalation_reason(out, fcfg, cascade["min_confidence"])
+        attempts.append({"tier": tier, "model": models[tier], "seconds": round(time.perf_counter() - t0, 3),
+                         "confidence": out.get("confidence"), "escalated": reason})
+        if reason is None:
+            break
+    return _tag_cascade(out, attempts)
+
+def _tag_cascade(out: Dict[str, Any], attempts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    attempts[-1]["escalated"] = None
+    out["cascade"] = (out.get("cascade") or []) + attempts
+    out["tier"] = attempts[-1]["tier"]
+    out["model"] = attempts[-1]["model"]
+    return out
+
+def _escalation_reason(j_norm: Dict[str, Any], fcfg: Dict[str, Any], min_confidence: float) -> Optional[str]:
+    """Why a cascade tier's answer goes to the next tier, or None to keep it.
+
+    Escalates failed answers, confidence below ``min_confidence`` (already scaled down for
+    unverified quotes), evidence mostly not found in the document, and partial answers that
+    fill some required intermediates but not others. An answer that finds none of them is
+    a confident "not in this document" and is kept.
+    """
+    if j_norm.get("error"):
+        return "error"
+    if float(j_norm.get("confidence") or 0.0) < min_confidence:
+        return "low_confidence"
+    ratio = j_norm.get("evidence_verified")
+    if ratio is not None and ratio < 0.5:
+        return "unverified_evidence"
+    inter = (fcfg.get("extraction_contract") or {}).get("intermediate") or {}
+    required = {k for k, v in inter.items() if (v or {}).get("required")}
+    missing = required & set(j_norm.get("_missing") or [])
+    if missing and missing != required:
+        return "missing_required"
+    return None
+
+def _cascade_summary(per_doc_outputs: List[Dict[str, Any]], models: List[str]) -> Dict[str, Any]:
+    """Per-tier map attempts, escalations, answers kept and summed latency of one field."""
+    tiers = [{"model": m, "calls": 0, "escalated": 0, "answered": 0, "seconds": 0.0} for m in models]
+    for d in per_doc_outputs:
+        if d.get("_resumed"):
+            continue
+        for a in d.get("cascade") or []:
+            t = tiers[a["tier"]]
+            t["calls"] += 1
+            t["seconds"] = round(t["seconds"] + (a.get("seconds") or 0.0), 3)
+            if a.get("escalated"):
+                t["escalated"] += 1
+            else:
+                t["answered"] += 1
+    return {"tiers": tiers}
+
+def _usage_delta(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    keys = ("calls", "prompt_tokens", "completion_tokens", "cached_tokens")
+    d = {k: after.get(k, 0) - before.get(k, 0) for k in keys}
+    d["cached_ratio"] = round(d["cached_tokens"] / d["prompt_tokens"], 4) if d["prompt_tokens"] else 0.0
+    return d
+
+def _early_exit_eligible(fcfg: Dict[str, Any]) -> bool:
+    pol = fcfg.get("reducer_policy") or {}
+    rv = (fcfg.get("extraction_contract") or {}).get("return_value")
+    return (
+        pol.get("strategy") == "max_confidence"
+        and int(fcfg.get("min_documents") or 1) <= 1
+        and isinstance(rv, str)
+    )
+
+def _is_decisive(j_norm: Dict[str, Any], threshold: float) -> bool:
+    """A single-doc answer good enough to stop mapping the rest of the folder."""
+    if float(j_norm.get("confidence") or 0.0) < threshold:
+        return False
+    # normalize_per_doc fills missing values with False/0.0/"", so those never decide
+    if j_norm.get("value") in (None, False, 0.0, ""):
+        return False
+    return any(
+        isinstance(e, dict) and isinstance(e.get("snippet"), str) and e["snippet"].strip()
+        for e in (j_norm.get("evidence_structured") or [])
+    )
+
+def _order_by_relevance(filenames: List[str], key: str, fcfg: Dict[str, Any]) -> List[str]:
+    words = " ".join([key.replace(".", " "), fcfg.get("doc_category") or "",
+                      fcfg.get("doc_subcategory") or ""])
+    terms = {w for w in re.split(r"[^a-z0-9]+", words.lower().replace("_", " ")) if len(w) > 2}
+    def score(fn: str) -> int:
+        toks = set(re.split(r"[^a-z0-9]+", fn.lower()))
+        return sum(1 for t in terms if t in toks or any(t in tok for tok in toks if len(tok) > 3))
+    # stable: ties keep discovery order
+    return sorted(filenames, key=lambda fn: -score(fn))
+
+def _map_documents(meta: Dict[str, Any],
+                   fcfg: Dict[str, Any],
+                   docs: List[tuple],
+                   provider: str,
+                   model: str,
+                   *,
+                   progress: bool = False,
+                   workers: int = 1,
+                   early_exit_confidence: Optional[float] = None,
+                   client: Optional[LLMClient] = None,
+                   layout: str = "field_first",
+                   structured: bool = True,
+                   max_reasks: int = 1,
+                   cascade: Optional[Dict[str, Any]] = None,
+                   on_output=None,
+                   deadline: Optional[Deadline] = None) -> tuple:
+    """Map (doc_index, filename, text) triples with bounded concurrency, in the given order.
+
+    With ``early_exit_confidence`` set, no new documents are started (and queued ones are
+    cancelled) once a decisive answer arrives. Once ``deadline`` expires nothing new starts
+    and calls still in flight are abandoned. ``on_output(filename, output)`` is called as
+    each document finishes. Returns (per_doc_outputs ordered by doc index, filenames not
+    mapped because of early exit or the deadline).
+    """
+    total = len(docs)
+    outputs: Dict[int, Dict[str, Any]] = {}
+    pending_docs = list(docs)
+    stop = False
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        running = {}
+        while (pending_docs and not stop) or running:
+            if deadline is not None and deadline.expired():
+                break
+            while pending_docs and not stop and len(running) < max(1, workers):
+                idx, fn, txt = pending_docs.pop(0)
+                # Each task runs in a copy of this context so its spans nest under the field's
+                running[pool.submit(contextvars.copy_context().run, _map_one, meta, fcfg, idx, fn, txt, provider,
+                                     model, client, layout, structured, max_reasks, cascade)] = idx
+            if deadline is not None:
+                done, _ = deadline.wait(list(running), return_when=FIRST_COMPLETED)
+            else:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                idx = running.pop(fut)
+                outputs[idx] = fut.result()
+                if on_output is not None:
+                    on_output(outputs[idx]["_filename"], outputs[idx])
+                _progress_print(len(outputs), total, "LLM map", f"Document {idx}", enabled=progress)
+                if early_exit_confidence is not None and _is_decisive(outputs[idx], early_exit_confidence):
+                    stop = True
+            if stop:
+                for fut in list(running):
+                    if fut.cancel():
+                        running.pop(fut)
+    finally:
+        # Never block on abandoned calls (deadline, Ctrl-C); queued ones are dropped
+        pool.shutdown(wait=False, cancel_futures=True)
+    if stop and progress and len(outputs) < total:
+        _progress_print(total, total, "LLM map", "early exit", enabled=progress)
+    skipped = [fn for idx, fn, _ in docs if idx not in outputs]
+    return [outputs[i] for i in sorted(outputs)], skipped
+
+def _field_meta(meta: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "section": meta.get("Sections"),
+        "document": meta.get("Sub Section/Document"),
+        "data_point": meta.get("Data Point"),
+        "category": meta.get("Category"),
+        "weight": meta.get("Weight"),
+    }
+
+def _read_documents(manifest: Dict[str, Any], progress: bool, ocr: bool, ocr_lang: str, ocr_dpi: int,
+                    workers: int = DEFAULT_DISCOVERY_WORKERS, parse_timeout: Optional[float] = None,
+                    deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+    """Read every manifest document once, in parallel.
+
+    PDFs are parsed in killable worker processes when ``parse_timeout`` is set. Documents
+    still unread when ``deadline`` expires are left empty.
+
+    Returns {"texts": {name: text} in manifest order, "empty": [names with no text],
+    "profiles": {name: CSV profile}, "tables": {name: detected tables},
+    "errors": {name: why it could not be read}}.
+    """
+    entries = manifest.get("documents") or []
+    total = len(entries)
+    _progress_print(0, total, "Reading", "(start)", enabled=progress)
+
+    def read(entry: Dict[str, Any]):
+        with timed_stage("ingest", doc=entry["name"], format=entry["format"]):
+            return _read(entry)
+
+    def _read(entry: Dict[str, Any]):
+        profile, tables, error = None, [], None
+        if entry["format"] == "csv":
+            profile = read_csv_profile(Path(entry["path"]), entry["sha256"], entry.get("member"))
+            pages = render_profile(Path(entry["name"]).name, profile) if profile is not None else [""]
+        else:
+            doc = read_doc(Path(entry["path"]), ocr=ocr, ocr_lang=ocr_lang, ocr_dpi=ocr_dpi,
+                           progress=progress, fmt=entry["format"], sha256=entry["sha256"],
+                           member=entry.get("member"), timeout=parse_timeout)
+            pages, tables, error = doc["pages"], doc["tables"], doc.get("error")
+        empty = not any((pg or "").strip() for pg in pages)
+        if entry["format"] == "kmz":
+            return "\\n".join(pages), empty, profile, tables, error
+        text = "\\n\\n".join(f"[Page {j}] {pg}" for j, pg in enumerate(pages, start=1))
+        return text, empty, profile, tables, error
+
+    texts: Dict[str, str] = {}
+    empty: List[str] = []
+    profiles: Dict[str, Dict[str, Any]] = {}
+    doc_tables: Dict[str, List[Dict[str, Any]]] = {}
+    errors: Dict[str, str] = {}
+    ex = ThreadPoolExecutor(max_workers=max(1, min(workers, total or 1)))
+    try:
+        futs = {ex.submit(contextvars.copy_context().run, read, e): e["name"] for e in entries}
+        if deadline is not None:
+            deadline.wait(list(futs))
+        else:
+            wait(list(futs))
+        done = 0
+        for fut, name in futs.items():
+            if not fut.done():
+                texts[name] = ""
+                empty.append(name)
+                errors[name] = ("not read before the run was cancelled" if deadline.cancelled
+                                else "not read before the run deadline")
+                continue
+            texts[name], is_empty, profile, tables, error = fut.result()
+            if is_empty:
+                empty.append(name)
+            if profile is not None:
+                profiles[name] = profile
+            if tables:
+                doc_tables[name] = tables
+            if error:
+                errors[name] = error
+            done += 1
+            _progress_print(done, total, "Reading", name, enabled=progress)
+    finally:
+        ex.shutdown(wait=False, cancel_futures=True)
+    return {"texts": texts, "empty": empty, "profiles": profiles, "tables": doc_tables, "errors": errors}
+
+def _prepare_field(registry_idx: Dict[str, Dict[str, Any]], key: str, documents) -> Dict[str, Any]:
+    """Resolve a field key and attach the run's document texts.
+
+    ``documents`` is a callable returning the ``_read_documents`` output, so nothing is read
+    until a known field needs it. Returns {"result": ...} when there is nothing to map,
+    otherwise a job.
+    """
+    meta = registry_idx.get(key)
+    orig_key = key
+    if not meta:
+        candidates = [k for k in registry_idx.keys() if k.endswith(key)]
+        if candidates:
+            meta = registry_idx[candidates[0]]
+            key = candidates[0]
+    if not meta:
+        return {"result": {"key": orig_key, "error": "Unknown field key", "status": "error"}}
+
+    docs = documents()
+    doc_texts = docs["texts"]
+    if not doc_texts:
+        return {"result": {
+            "key": key,
+            "meta": _field_meta(meta),
+            "prompt": "(n/a)",
+            "value": None,
+            "unit": None,
+            "justification": "",
+            "confidence": 0.0,
+            "evidence": [],
+            "files_processed": [],
+            "files_count": 0,
+            "empty_text_docs": [],
+            "status": "complete",
+        }}
+
+    job = {
+        "key": key,
+        "meta": meta,
+        "fcfg": meta.get("_cfg") or {},
+        "doc_texts": doc_texts,
+        "doc_index": {fn: i for i, fn in enumerate(doc_texts, start=1)},
+        "empty_text_docs": list(docs["empty"]),
+        "read_errors": dict(docs.get("errors") or {}),
+    }
+    # Per-doc outputs that need no map call: CSV rollups, then confident rule answers
+    job["precomputed_outputs"] = _tabular_outputs(job, docs.get("profiles") or {})
+    done = {d["_filename"] for d in job["precomputed_outputs"]}
+    job["map_docs"] = [fn for fn in doc_texts if fn not in done]
+    rule_outputs, job["rule_candidates"] = _rule_outputs(job)
+    if rule_outputs:
+        job["precomputed_outputs"] += rule_outputs
+        done = {d["_filename"] for d in rule_outputs}
+        job["map_docs"] = [fn for fn in job["map_docs"] if fn not in done]
+    job["map_texts"] = _map_texts(job, docs.get("tables") or {})
+    return job
+
+def _rule_outputs(job: Dict[str, Any]) -> tuple:
+    """Run the field's ``pre_extract`` rules over each document still to be mapped.
+
+    Returns (per-doc outputs for documents the rules answer decisively, {filename: rule
+    candidates} for the others, kept on their map outputs for inspection).
+    """
+    fcfg = job["fcfg"]
+    if not (fcfg.get("pre_extract") or {}).get("rules"):
+        return [], {}
+    outputs: List[Dict[str, Any]] = []
+    candidates: Dict[str, Dict[str, Any]] = {}
+    for fn in job["map_docs"]:
+        found = pre_extract(fcfg, job["doc_texts"][fn])
+        if not found["decisive"]:
+            if found["candidates"]:
+                candidates[fn] = found["candidates"]
+            continue
+        cands = found["candidates"]
+        evs = []
+        for c in cands.values():
+            ev = {"doc": fn, "page": c["page"], "snippet": c["snippet"]}
+            if ev not in evs:
+                evs.append(ev)
+        keys = compile_rules(fcfg).decisive_keys
+        j = {
+            "intermediate": {k: c["value"] for k, c in cands.items()},
+            "confidence": min(cands[k]["confidence"] for k in keys),
+            "evidence": evs,
+            "evidence_structured": [dict(e) for e in evs],
+            "notes": [f"Answered by pre-extraction rules ({', '.join(c['rule'] for c in cands.values())}), no LLM call."],
+        }
+        out = _finish_map(job["meta"], fcfg, job["doc_index"][fn], fn, job["doc_texts"][fn], j)
+        out["pre_extract"] = cands
+        outputs.append(out)
+    return outputs, candidates
+
+def _resume_outputs(job: Dict[str, Any], checkpoint: Optional[RunCheckpoint], shas: Dict[str, Any]) -> None:
+    """Move documents whose map output is checkpointed from ``map_docs`` to the precomputed outputs."""
+    if checkpoint is None:
+        return
+    resumed = []
+    for fn in job["map_docs"]:
+        out = checkpoint.map_output(job["key"], fn, shas.get(fn))
+        if out is not None:
+            resumed.append({**out, "_resumed": True})
+    if resumed:
+        done = {d["_filename"] for d in resumed}
+        job["precomputed_outputs"] += resumed
+        job["map_docs"] = [fn for fn in job["map_docs"] if fn not in done]
+
+def _map_texts(job: Dict[str, Any], tables: Dict[str, List[Dict[str, Any]]]) -> Dict[str, str]:
+    """The text each document is mapped with: for fields with ``table_input``, only the
+    document's tables that mention one of its ``keywords``, when it has any.
+
+    A table of sections, ampacities or voltage drops answers such fields on its own, so the
+    map prompt skips the surrounding prose; documents without a matching table keep their
+    full text.
+    """
+    texts = {fn: job["doc_texts"][fn] for fn in job["map_docs"]}
+    spec = job["fcfg"].get("table_input")
+    if not isinstance(spec, dict):
+        return texts
+    keywords = [k for k in spec.get("keywords") or [] if isinstance(k, str)]
+    for fn in texts:
+        found = matching_tables(tables.get(fn) or [], keywords)
+        if found:
+            texts[fn] = render_tables(found)
+    return texts
+
+def _tabular_energy_key(fcfg: Dict[str, Any]) -> Optional[str]:
+    """The intermediate an ``average`` field takes per month, when it is an energy quantity."""
+    pol = fcfg.get("reducer_policy") or {}
+    if pol.get("strategy") not in ("average", "mean"):
+        return None
+    sk = pol.get("source_keys") or {}
+    key = sk.get("kwh") or sk.get("values") or (fcfg.get("extraction_contract") or {}).get("return_value")
+    if not isinstance(key, str):
+        return None
+    dim = (parse_unit(source_unit(fcfg, key)) or ("",))[0]
+    return key if dim in ("energy", "energy/time") else None
+
+def _tabular_outputs(job: Dict[str, Any], profiles: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per-doc outputs computed from CSV monthly rollups, one per month, instead of a map call.
+
+    Applies to ``average`` fields over an energy intermediate (e.g. monthly kWh) and CSVs with
+    a time column and an energy or power column. Partial months at the ends of the file are
+    left out when complete months exist.
+    """
+    fcfg = job["fcfg"]
+    key = _tabular_energy_key(fcfg)
+    if key is None:
+        return []
+    sk = (fcfg.get("reducer_policy") or {}).get("source_keys") or {}
+    factor = conversion_factor("kWh", source_unit(fcfg, key).split("/")[0])
+    if factor is None:
+        return []
+    out: List[Dict[str, Any]] = []
+    for fn, profile in profiles.items():
+        if fn not in job["doc_texts"]:
+            continue
+        months = monthly_energy_kwh(profile)
+        full = [m for m in months if m["complete"] is not False]
+        for m in full or months:
+            inter = {key: m["kwh"] * factor}
+            if sk.get("period_start"):
+                inter[sk["period_start"]] = m["first"][:10]
+            if sk.get("period_end"):
+                inter[sk["period_end"]] = m["last"][:10]
+            ev = {"doc": fn, "page": 1, "snippet": m["line"]}
+            j = {
+                "intermediate": inter,
+                "confidence": 0.95 if m["complete"] is not False else 0.6,
+                "evidence": [ev],
+                "evidence_structured": [dict(ev)],
+                "notes": [f"{m['month']}: sum of {m['column']} over {m['rows']} rows (CSV rollup, no LLM call)."],
+            }
+            out.append(_finish_map(job["meta"], fcfg, job["doc_index"][fn], fn, job["doc_texts"][fn], j))
+    return out
+
+@timed_stage("reduce")
+def _finish_field(job: Dict[str, Any], per_doc_outputs: List[Dict[str, Any]], llm_client: LLMClient,
+                  progress: bool) -> Dict[str, Any]:
+    """Reduce the per-doc outputs of a prepared field and assemble its result."""
+    key, meta, fcfg, doc_texts = job["key"], job["meta"], job["fcfg"], job["doc_texts"]
+    for d in per_doc_outputs:
+        cands = (job.get("rule_candidates") or {}).get(d.get("_filename"))
+        if cands and "pre_extract" not in d:
+            d["pre_extract"] = cands
+    unit = (fcfg.get("reducer_policy", {}) or {}).get("expected_unit") or fcfg.get("unit")
+
+    _progress_print(1, 1, "LLM reduce", "synthesizing", enabled=progress)
+    try:
+        det = reduce_by_policy(
+            field_key=key,
+            field_def=fcfg,
+            intermediate_results=per_doc_outputs,
+            llm_client=llm_client
+        )
+    except Exception as e:
+        det = {
+            "value": None,
+            "unit": unit,
+            "justification": f"Reducer failed: {e}",
+            "evidence": [],
+            "confidence": 0.0,
+            "notes": ["Reducer exception"]
+        }
+
+    value = det.get("value")
+    unit = det.get("unit") or unit
+
+    structured: List[Dict[str, Any]] = []
+    for d in per_doc_outputs:
+        for e in (d.get("evidence_structured") or []):
+            structured.append(e)
+
+    llm_evidence = []
+    for e in (det.get("evidence") or []):
+        if isinstance(e, str):
+            llm_evidence.append({"doc": None, "page": None, "snippet": e})
+        elif isinstance(e, dict):
+            llm_evidence.append(e)
+
+    evidence = structured or llm_evidence
+    def _is_generic(name: Optional[str]) -> bool:
+        n = (name or "").lower()
+        return any(s in n for s in ["guidebook", "permitting", "manual", "code"])
+    proj_ev = [e for e in evidence if not _is_generic(e.get("doc"))]
+    if proj_ev:
+        evidence = proj_ev
+    confidence = float(det.get("confidence", 0.85))
+
+    result = {
+        "key": key,
+        "meta": _field_meta(meta),
+        "prompt": build_prompt_single_doc(meta),
+        "value": value,
+        "unit": unit,
+        "justification": det.get("justification", ""),
+        "confidence": confidence,
+        "evidence": evidence,
+        "files_processed": list(doc_texts.keys()),
+        "files_count": len(doc_texts),
+        "empty_text_docs": job["empty_text_docs"],
+        "intermediate_per_doc": per_doc_outputs,
+        "failed_docs": [
+            {"doc": d.get("_filename"), "error": d["error"]} for d in per_doc_outputs if d.get("error")
+        ],
+    }
+    rule_docs = [d["_filename"] for d in job.get("precomputed_outputs") or []
+                 if "pre_extract" in d and not d.get("_resumed")]
+    if rule_docs:
+        result["pre_extracted_docs"] = rule_docs
+    result["status"] = "partial" if job.get("unmapped_docs") or job.get("read_errors") else "complete"
+    if job.get("unmapped_docs"):
+        result["unmapped_docs"] = job["unmapped_docs"]
+    if job.get("read_errors"):
+        result["read_errors"] = job["read_errors"]
+    resumed = [d["_filename"] for d in per_doc_outputs if d.get("_resumed")]
+    if resumed:
+        result["resumed_docs"] = resumed
+    table_docs = [fn for fn, txt in (job.get("map_texts") or {}).items() if txt is not doc_texts[fn]]
+    if table_docs:
+        result["table_input_docs"] = table_docs
+    if det.get("time_series"):
+        result["time_series"] = det["time_series"]
+    return result
+
+def _run_batched(jobs: List[Dict[str, Any]], llm_client: LLMClient, layout: str, batch_dir: Path,
+                 *, progress: bool, poll_seconds: Optional[float], timeout_seconds: float,
+                 structured: bool = True, max_reasks: int = 1,
+                 cascade: Optional[Dict[str, Any]] = None, on_output=None, stop=None) -> Optional[Dict[str, Any]]:
+    """Map every (field, document) pair of the run through one batch; fills job["per_doc_outputs"].
+
+    Answers that fail schema validation are re-asked interactively (bounded by ``max_reasks``).
+    With ``cascade`` the batch goes to the first tier and answers that need escalating are
+    re-mapped interactively from the second tier on. Waiting stops (``BatchTimeout``) once
+    ``stop()`` returns true.
+    """
+    if cascade:
+        llm_client = llm_client.for_model(cascade["models"][0])
+    requests = []
+    for n, job in enumerate(jobs):
+        job["custom_ids"] = {}
+        job["response_format"] = (
+            compile_map_response_format(job["meta"]) if structured else {"type": "json_object"}
+        )
+        for fn in job["map_docs"]:
+            txt = job["map_texts"][fn]
+            cid = f"f{n}-d{job['doc_index'][fn]}"
+            job["custom_ids"][fn] = (cid, _map_request(job["meta"], txt, fn, layout))
+            requests.append((cid, job["custom_ids"][fn][1], job["response_format"]))
+    if not requests:
+        # Every document was answered from tabular rollups or rules
+        for job in jobs:
+            job["per_doc_outputs"] = list(job["precomputed_outputs"])
+            job["map_usage"] = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+        return None
+
+    def on_poll(batch_id: str, status: str) -> None:
+        _progress_print(0, 1, "LLM batch", f"{batch_id} {status}", enabled=progress)
+
+    from ddx.utils.json import _json_loads_lenient
+    out = llm_client.chat_batch(requests, batch_dir, poll_seconds=poll_seconds,
+                                timeout_seconds=timeout_seconds, on_poll=on_poll, stop=stop)
+    _progress_print(1, 1, "LLM batch", f"{out['batch_id']} {out['status']}", enabled=progress)
+    results = out["results"]
+    failed = 0
+    for job in jobs:
+        per_doc = []
+        usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+        for fn, (cid, messages) in job["custom_ids"].items():
+            res = results.get(cid) or {"error": f"no result for {cid} in batch {out['batch_id']}"}
+            if res["error"] is not None:
+                failed += 1
+                j = {"error": f"single_doc LLM failed: {res['error']}"}
+            else:
+                usage["calls"] += 1
+                for k in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+                    usage[k] += int((res.get("usage") or {}).get(k) or 0)
+                if structured:
+                    before = llm_client.usage_snapshot()
+                    try:
+                        j = _complete_structured(llm_client, messages, job["response_format"],
+                                                 res["content"], max_reasks)
+                    except Exception as e:
+                        j = {"error": f"single_doc LLM failed: {e}"}
+                    reask = _usage_delta(before, llm_client.usage_snapshot())
+                    for k in usage:
+                        usage[k] += reask[k]
+                    if j.get("error"):
+                        failed += 1
+                else:
+                    j = _json_loads_lenient(res["content"])
+            idx = job["doc_index"][fn]
+            j_norm = _finish_map(job["meta"], job["fcfg"], idx, fn, job["map_texts"][fn], j)
+            if cascade:
+                reason = _escalation_reason(j_norm, job["fcfg"], cascade["min_confidence"])
+                first = {"tier": 0, "model": cascade["models"][0], "seconds": None,
+                         "confidence": j_norm.get("confidence"), "escalated": reason}
+                if reason is not None and len(cascade["models"]) > 1:
+                    before = llm_client.usage_snapshot()
+                    j_norm = _map_one(job["meta"], job["fcfg"], idx, fn, job["map_texts"][fn], llm_client.provider,
+                                      llm_client.model, llm_client, layout, structured, max_reasks, cascade, 1)
+                    j_norm["cascade"] = [first] + j_norm["cascade"]
+                    escalated = _usage_delta(before, llm_client.usage_snapshot())
+                    for k in usage:
+                        usage[k] += escalated[k]
+                else:
+                    j_norm = _tag_cascade(j_norm, [first])
+            if on_output is not None:
+                on_output(job, fn, j_norm)
+            per_doc.append(j_norm)
+        job["per_doc_outputs"] = sorted(per_doc + job["precomputed_outputs"], key=lambda d: d.get("_doc_index") or 0)
+        job["map_usage"] = usage
+    return {
+        "batch_id": out["batch_id"],
+        "status": out["status"],
+        "requests": len(requests),
+        "failed": failed,
+        "input": out["input"],
+    }
+
+def _skipped_result(key: str, deadline: Optional[Deadline], error: Optional[str] = None) -> Dict[str, Any]:
+    if error is None:
+        reason = "run cancelled" if deadline is not None and deadline.cancelled else "run deadline reached"
+        error = f"{reason} before this field started"
+    return {"key": key, "value": None, "confidence": 0.0, "evidence": [], "status": "skipped", "error": error}
+
 def run_for_fields(registry_idx: Dict[str, Dict[str, Any]],
                    fields: List[str],
                    docs_dir: Optional[Path],
@@ -34,156 +738,213 @@ def run_for_fields(registry_idx: Dict[str, Dict[str, Any]],
                    *,
                    ocr: bool = False,
                    ocr_lang: str = "spa+eng",
-                   ocr_dpi: int = 300) -> Dict[str, Any]:
+                   ocr_dpi: int = 300,
+                   map_workers: int = 1,
+                   early_exit: bool = False,
+                   early_exit_confidence: float = 0.9,
+                   prompt_layout: str = "field_first",
+                   batch_dir: Optional[Path] = None,
+                   batch_poll_seconds: Optional[float] = None,
+                   batch_timeout_seconds: float = 24 * 3600.0,
+                   structured_output: bool = True,
+                   max_reasks: int = 1,
+                   ingest_workers: int = DEFAULT_DISCOVERY_WORKERS,
+                   manifest: Optional[Dict[str, Any]] = None,
+                   model_tiers: Optional[List[str]] = None,
+                   escalate_confidence: float = DEFAULT_ESCALATE_CONFIDENCE,
+                   checkpoint: Optional[RunCheckpoint] = None,
+                   deadline: Optional[Deadline] = None,
+                   stage_timeouts: Optional[Dict[str, Optional[float]]] = None) -> Dict[str, Any]:
+    """Map every requested field over the documents, then reduce each field.
+
+    With ``batch_dir`` set, all map requests of the run are written to one JSONL batch
+    under that directory, submitted, polled and joined before any field is reduced;
+    early exit does not apply since every document is submitted up front. A batch still
+    running at the deadline (or ``batch_timeout_seconds``) is left to finish remotely and
+    its fields are returned as skipped.
+
+    With ``structured_output`` each map call carries the field's strict JSON Schema and
+    invalid answers are re-asked up to ``max_reasks`` times; documents that still fail are
+    listed under ``failed_docs`` and left out of the reduce.
+
+    Documents come from ``manifest`` (default: ``build_manifest(docs_dir)``, a recursive,
+    de-duplicated walk) and are read once, ``ingest_workers`` at a time, for all fields.
+    The manifest is returned under ``manifest``.
+
+    With ``model_tiers`` (cheapest first) every map call goes to the first model and a
+    document is re-mapped with the next one while its answer needs escalating (see
+    ``_escalation_reason``, ``escalate_confidence``). Each per-doc output lists its
+    ``cascade`` attempts and each result a per-tier ``cascade`` summary; reduce calls use
+    ``model``, or the last tier when no model is given.
+
+    With ``checkpoint`` every successful map output and every reduced field is appended to
+    it as soon as it is done. Resuming with a checkpoint that already holds work skips
+    fields whose result was computed over the same documents, and documents (matched by
+    content hash) whose map output for the field is there.
+
+    ``stage_timeouts`` overrides ``DEFAULT_STAGE_TIMEOUTS`` ("parse", "ocr", "llm" seconds;
+    None or 0 disables one). With ``deadline`` no field or document is started once it
+    expires and work in flight is abandoned; every result carries a ``status``: "complete",
+    "partial" (``unmapped_docs`` or ``read_errors`` left out) or "skipped", and the run
+    a ``status`` of "complete" or "partial". Only complete fields are checkpointed.
+    """
+    if prompt_layout not in PROMPT_LAYOUTS:
+        raise ValueError(f"Unknown prompt layout: {prompt_layout}")
     results: List[Dict[str, Any]] = []
-    llm_client = _llm_client(provider=provider, model=model)
+    model_tiers = [m for m in model_tiers or [] if m]
+    cascade = {"models": model_tiers, "min_confidence": escalate_confidence} if model_tiers else None
+    timeouts = {**DEFAULT_STAGE_TIMEOUTS, **(stage_timeouts or {})}
+    parse_timeout = None
+    if timeouts.get("parse"):
+        parse_timeout = timeouts["parse"] + ((timeouts.get("ocr") or 0.0) if ocr else 0.0)
+    llm_client = _llm_client(provider=provider, model=model or (model_tiers[-1] if model_tiers else ""),
+                             timeout=timeouts.get("llm"))
+    if manifest is None:
+        manifest = build_manifest(docs_dir, workers=ingest_workers)
+    read_cache: Dict[str, Any] = {}
 
-    for key in fields:
-        meta = registry_idx.get(key)
-        orig_key = key
-        if not meta:
-            candidates = [k for k in registry_idx.keys() if k.endswith(key)]
-            if candidates:
-                meta = registry_idx[candidates[0]]
-                key = candidates[0]
-        if not meta:
-            results.append({"key": orig_key, "error": "Unknown field key"})
-            continue
+    def documents() -> Dict[str, Any]:
+        if not read_cache:
+            read_cache.update(_read_documents(manifest, progress, ocr, ocr_lang, ocr_dpi, ingest_workers,
+                                              parse_timeout=parse_timeout, deadline=deadline))
+        return read_cache
 
-        files = discover_files(docs_dir)
-        _progress_print(0, len(files), "Reading", "(start)", enabled=progress)
-        if not files:
-            results.append({
-                "key": key,
-                "meta": {
-                    "section": meta.get("Sections"),
-                    "document": meta.get("Sub Section/Document"),
-                    "data_point": meta.get("Data Point"),
-                    "category": meta.get("Category"),
-                    "weight": meta.get("Weight"),
-                },
-                "prompt": "(n/a)",
-                "value": None,
-                "unit": None,
-                "justification": "",
-                "confidence": 0.0,
-                "evidence": [],
-                "files_processed": [],
-                "files_count": 0,
-                "empty_text_docs": []
-            })
-            continue
+    shas = {e["name"]: e.get("sha256") for e in manifest.get("documents") or []}
+    signature = docs_signature(shas)
 
-        doc_texts: Dict[str, str] = {}
-        empty_text_docs: List[str] = []
-        total = len(files)
-        for i, pth in enumerate(files, start=1):
-            _progress_print(i, total, "Reading", pth.name, enabled=progress)
-            pages = read_doc_pages(pth, ocr=ocr, ocr_lang=ocr_lang, ocr_dpi=ocr_dpi, progress=progress)
-            if pth.suffix.lower() == ".kmz":
-                txt = "\\n".join(pages)
-                if not any((s or "").strip() for s in pages):
-                    empty_text_docs.append(pth.name)
-            else:
-                txt = "\\n\\n".join(f"[Page {j}] {pg}" for j, pg in enumerate(pages, start=1))
-                if not (txt or "").strip():
-                    empty_text_docs.append(pth.name)
-            doc_texts[pth.name] = txt
-
-        fcfg = meta.get("_cfg") or {}
-        unit = (fcfg.get("reducer_policy", {}) or {}).get("expected_unit") or fcfg.get("unit")
-
-        per_doc_outputs: List[Dict[str, Any]] = []
-        prompt_used = build_prompt_single_doc(meta)
-        total = len(doc_texts)
-        for idx, (fn, txt) in enumerate(doc_texts.items(), start=1):
-            _progress_print(idx, total, "LLM map", f"Document {idx}", enabled=progress)
+    def resumed_result(key: str) -> Optional[Dict[str, Any]]:
+        hit = checkpoint.field_result(key, signature) if checkpoint is not None else None
+        return {**hit, "resumed": True} if hit is not None else None
+
+    def save_map(job: Dict[str, Any], fn: str, output: Dict[str, Any]) -> None:
+        if checkpoint is not None:
+            checkpoint.save_map(job["key"], fn, shas.get(fn), output)
+
+    def save_field(key: str, result: Dict[str, Any]) -> None:
+        # Fields with failed or unread documents are redone on resume
+        if checkpoint is not None and result.get("status") == "complete" and not result.get("failed_docs"):
+            checkpoint.save_field(key, signature, result)
+
+    def finish(out: Dict[str, Any]) -> Dict[str, Any]:
+        out["status"] = "complete" if all(r.get("status", "complete") == "complete" for r in results) else "partial"
+        if deadline is not None:
+            out["deadline"] = {"seconds": deadline.seconds, "expired": deadline.expired(),
+                               "cancelled": deadline.cancelled}
+        if checkpoint is not None:
+            out["checkpoint"] = {"path": str(checkpoint.path), "resumed": dict(checkpoint.resumed)}
+        return out
+
+    if batch_dir is not None:
+        jobs = []
+        for key in fields:
+            hit = resumed_result(key)
+            job = {"result": hit} if hit is not None else _prepare_field(registry_idx, key, documents)
+            if "result" not in job:
+                job["requested_key"] = key
+                _resume_outputs(job, checkpoint, shas)
+            jobs.append(job)
+        if deadline is not None and deadline.expired():
+            jobs = [job if "result" in job else {"result": _skipped_result(job["requested_key"], deadline)}
+                    for job in jobs]
+        pending = [job for job in jobs if "result" not in job]
+        batch_info = None
+        if pending:
+            timeout = deadline.cap(batch_timeout_seconds) if deadline is not None else batch_timeout_seconds
             try:
-                j = llm_extract_single_doc(meta, txt, provider, model, filename=fn)
-            except Exception as e:
-                j = {"error": f"single_doc LLM failed: {e}"}
-            j_norm = normalize_per_doc(j, fcfg)
-            if fn.lower().endswith(".kmz"):
-                evs = j_norm.get("evidence") or []
-                for ev in evs:
-                    if isinstance(ev, dict):
-                        ev["page"] = None
-                evs2 = j_norm.get("evidence_structured") or []
-                for ev in evs2:
-                    if isinstance(ev, dict):
-                        ev["page"] = None
-
-            j_norm["_doc_index"] = idx
-            j_norm["_filename"] = fn
-
-            inter_spec = ((fcfg.get("extraction_contract") or {}).get("intermediate") or {})
-            j_norm = _normalize_single_doc_output(fn, txt, j_norm, inter_spec)
-
-            per_doc_outputs.append(j_norm)
-
-        _progress_print(1, 1, "LLM reduce", "synthesizing", enabled=progress)
-        try:
-            det = reduce_by_policy(
-                field_key=key,
-                field_def=fcfg,
-                intermediate_results=per_doc_outputs,
-                llm_client=llm_client
+                batch_info = _run_batched(pending, llm_client, prompt_layout, Path(batch_dir), progress=progress,
+                                          poll_seconds=batch_poll_seconds, timeout_seconds=timeout,
+                                          structured=structured_output, max_reasks=max_reasks, cascade=cascade,
+                                          on_output=save_map,
+                                          stop=deadline.expired if deadline is not None else None)
+            except BatchTimeout as e:
+                # The batch keeps running remotely; batch.json under batch_dir lets --resume poll it again
+                batch_info = {"batch_id": e.batch_id, "status": e.status, "timed_out": True,
+                              "requests": sum(len(job.get("custom_ids") or {}) for job in pending),
+                              "input": str(Path(batch_dir) / "requests.jsonl")}
+                for job in pending:
+                    job["result"] = _skipped_result(job["requested_key"], deadline,
+                                                    f"{e}; its answers were not joined")
+        for job in jobs:
+            if "result" in job:
+                results.append(job["result"])
+                continue
+            usage_before = llm_client.usage_snapshot()
+            result = _finish_field(job, job["per_doc_outputs"], llm_client, progress)
+            if cascade:
+                result["cascade"] = _cascade_summary(job["per_doc_outputs"], model_tiers)
+            reduce_usage = _usage_delta(usage_before, llm_client.usage_snapshot())
+            result["llm_usage"] = _usage_delta(
+                {}, {k: job["map_usage"].get(k, 0) + reduce_usage[k] for k in job["map_usage"]}
             )
-        except Exception as e:
-            det = {
-                "value": None,
-                "unit": unit,
-                "justification": f"Reducer failed: {e}",
-                "evidence": [],
-                "confidence": 0.0,
-                "notes": ["Reducer exception"]
-            }
+            save_field(job["requested_key"], result)
+            results.append(result)
+        out = {"results": results, "llm_usage": {"prompt_layout": prompt_layout, **llm_client.usage_snapshot()},
+               "manifest": manifest}
+        if batch_info is not None:
+            out["batch"] = batch_info
+        return finish(out)
 
-        value = det.get("value")
-        unit = det.get("unit") or unit
-
-        structured: List[Dict[str, Any]] = []
-        for d in per_doc_outputs:
-            for e in (d.get("evidence_structured") or []):
-                structured.append(e)
-
-        llm_evidence = []
-        for e in (det.get("evidence") or []):
-            if isinstance(e, str):
-                llm_evidence.append({"doc": None, "page": None, "snippet": e})
-            elif isinstance(e, dict):
-                llm_evidence.append(e)
-
-        evidence = structured or llm_evidence
-        def _is_generic(name: Optional[str]) -> bool:
-            n = (name or "").lower()
-            return any(s in n for s in ["guidebook", "permitting", "manual", "code"])
-        proj_ev = [e for e in evidence if not _is_generic(e.get("doc"))]
-        if proj_ev:
-            evidence = proj_ev
-        confidence = float(det.get("confidence", 0.85))
-
-        result = {
-            "key": key,
-            "meta": {
-                "section": meta.get("Sections"),
-                "document": meta.get("Sub Section/Document"),
-                "data_point": meta.get("Data Point"),
-                "category": meta.get("Category"),
-                "weight": meta.get("Weight"),
-            },
-            "prompt": prompt_used,
-            "value": value,
-            "unit": unit,
-            "justification": det.get("justification", ""),
-            "confidence": confidence,
-            "evidence": evidence,
-            "files_processed": list(doc_texts.keys()),
-            "files_count": len(doc_texts),
-            "empty_text_docs": empty_text_docs,
-            "intermediate_per_doc": per_doc_outputs
-        }
+    for key in fields:
+        requested_key = key
+        hit = resumed_result(key)
+        if hit is not None:
+            results.append(hit)
+            continue
+        if deadline is not None and deadline.expired():
+            results.append(_skipped_result(key, deadline))
+            continue
+        usage_before = llm_client.usage_snapshot()
+        job = _prepare_field(registry_idx, key, documents)
+        if "result" in job:
+            results.append(job["result"])
+            continue
+        _resume_outputs(job, checkpoint, shas)
+
+        key, fcfg = job["key"], job["fcfg"]
+        early = early_exit and _early_exit_eligible(fcfg)
+        doc_index = job["doc_index"]
+        order = list(job["map_docs"])
+        if early:
+            order = _order_by_relevance(order, key, fcfg)
+        decided = early and any(_is_decisive(d, early_exit_confidence) for d in job["precomputed_outputs"])
+        per_doc_outputs, skipped_docs = _map_documents(
+            job["meta"],
+            fcfg,
+            [] if decided else [(doc_index[fn], fn, job["map_texts"][fn]) for fn in order],
+            provider,
+            model,
+            progress=progress,
+            workers=map_workers,
+            early_exit_confidence=early_exit_confidence if early else None,
+            client=llm_client,
+            layout=prompt_layout,
+            structured=structured_output,
+            max_reasks=max_reasks,
+            cascade=cascade,
+            on_output=lambda fn, output: save_map(job, fn, output),
+            deadline=deadline,
+        )
+        answered = decided or (early and any(_is_decisive(d, early_exit_confidence) for d in per_doc_outputs))
+        mapped = len(per_doc_outputs)
+        if deadline is not None and deadline.expired() and skipped_docs and not answered:
+            # Left out by the deadline rather than by early exit
+            job["unmapped_docs"], skipped_docs = skipped_docs, []
+
+        per_doc_outputs = sorted(per_doc_outputs + job["precomputed_outputs"], key=lambda d: d.get("_doc_index") or 0)
+        result = _finish_field(job, per_doc_outputs, llm_client, progress)
+        result["llm_usage"] = _usage_delta(usage_before, llm_client.usage_snapshot())
+        if cascade:
+            result["cascade"] = _cascade_summary(per_doc_outputs, model_tiers)
+        if early:
+            result["early_exit"] = {
+                "triggered": bool(skipped_docs) or (decided and bool(order)),
+                "threshold": early_exit_confidence,
+                "docs_mapped": mapped,
+                "skipped_docs": order if decided else skipped_docs,
+            }
 
+        save_field(requested_key, result)
         results.append(result)
 
-    return {"results": results}
+    return finish({"results": results, "llm_usage": {"prompt_layout": prompt_layout, **llm_client.usage_snapshot()},
+                   "manifest": manifest})
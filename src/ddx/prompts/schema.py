@@ -0,0 +1,151 @@
+from __future__ import annotations
+import json, re
+from typing import Any, Dict, List, Optional, Tuple
+
+# JSON Schema compiled from a field's extraction contract, in the strict structured-output
+# dialect: every object lists all its properties as required and forbids extra keys;
+# "not found" is expressed as null rather than by omitting a key.
+
+_JSON_TYPES = {"number": "number", "boolean": "boolean", "string": "string", "integer": "integer"}
+
+
+def _nullable(t: str) -> Dict[str, Any]:
+    return {"type": [_JSON_TYPES.get((t or "string").lower(), "string"), "null"]}
+
+
+def _obj(props: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": props,
+        "required": list(props.keys()),
+        "additionalProperties": False,
+    }
+
+
+def _evidence_item(labels: Optional[List[str]]) -> Dict[str, Any]:
+    props = {
+        "doc": {"type": "string"},
+        "page": {"type": ["number", "null"]},
+        "snippet": {"type": "string"},
+    }
+    if labels is not None:
+        props["label"] = {"type": "string", "enum": labels} if labels else {"type": "string"}
+    return _obj(props)
+
+
+def _build_map_schema(fcfg: Dict[str, Any]) -> Dict[str, Any]:
+    ec = fcfg.get("extraction_contract") or {}
+    inter_spec = ec.get("intermediate") or {}
+    rv = ec.get("return_value")
+
+    inter_props = {}
+    for k, spec in inter_spec.items():
+        p = _nullable((spec or {}).get("type"))
+        if (spec or {}).get("desc"):
+            p["description"] = spec["desc"]
+        inter_props[k] = p
+
+    if isinstance(rv, list):
+        value = _obj({k: _nullable((inter_spec.get(k) or {}).get("type")) for k in rv})
+    else:
+        value = {"anyOf": [{"type": "number"}, {"type": "string"}, {"type": "boolean"}, {"type": "null"}]}
+
+    return _obj({
+        "value": value,
+        "unit": {"type": ["string", "null"]},
+        "intermediate": _obj(inter_props),
+        "evidence": {"type": "array", "items": _evidence_item(None)},
+        "evidence_structured": {"type": "array", "items": _evidence_item(list(inter_spec.keys()))},
+        "confidence": {"type": "number", "description": "0..1"},
+        "notes": {"type": "array", "items": {"type": "string"}},
+    })
+
+
+# id(field) -> (field, response_format); same lifetime rule as the compiled prompts
+_SCHEMAS: Dict[int, tuple] = {}
+
+
+def compile_map_response_format(field: dict) -> Dict[str, Any]:
+    """Strict ``json_schema`` response_format for one field's map call, compiled once per field."""
+    hit = _SCHEMAS.get(id(field))
+    if hit is not None and hit[0] is field:
+        return hit[1]
+    key = field.get("_key") or field.get("Data Point") or "field"
+    name = re.sub(r"[^A-Za-z0-9_-]+", "_", key)[-64:] or "field"
+    rf = {
+        "type": "json_schema",
+        "json_schema": {"name": name, "schema": _build_map_schema(field.get("_cfg") or {}), "strict": True},
+    }
+    _SCHEMAS[id(field)] = (field, rf)
+    return rf
+
+
+def _type_ok(v: Any, t: str) -> bool:
+    if t == "null":
+        return v is None
+    if t == "boolean":
+        return isinstance(v, bool)
+    if t == "integer":
+        return isinstance(v, int) and not isinstance(v, bool)
+    if t == "number":
+        return isinstance(v, (int, float)) and not isinstance(v, bool)
+    if t == "string":
+        return isinstance(v, str)
+    if t == "array":
+        return isinstance(v, list)
+    if t == "object":
+        return isinstance(v, dict)
+    return True
+
+
+def validate_json(obj: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """Validate against the schema subset compiled here (type, anyOf, enum, properties,
+    required, additionalProperties, items). Returns human-readable errors, empty if valid."""
+    if "anyOf" in schema:
+        if any(not validate_json(obj, s, path) for s in schema["anyOf"]):
+            return []
+        return [f"{path}: does not match any allowed type"]
+    t = schema.get("type")
+    if t is not None:
+        types = t if isinstance(t, list) else [t]
+        if not any(_type_ok(obj, x) for x in types):
+            return [f"{path}: expected {' or '.join(types)}, got {type(obj).__name__}"]
+    if "enum" in schema and obj not in schema["enum"]:
+        return [f"{path}: {obj!r} is not one of {schema['enum']}"]
+    errors: List[str] = []
+    if isinstance(obj, dict) and "properties" in schema:
+        props = schema["properties"]
+        for k in schema.get("required", []):
+            if k not in obj:
+                errors.append(f"{path}.{k}: missing")
+        if schema.get("additionalProperties") is False:
+            for k in obj:
+                if k not in props:
+                    errors.append(f"{path}.{k}: not allowed")
+        for k, sub in props.items():
+            if k in obj:
+                errors.extend(validate_json(obj[k], sub, f"{path}.{k}"))
+    if isinstance(obj, list) and "items" in schema:
+        for i, item in enumerate(obj):
+            errors.extend(validate_json(item, schema["items"], f"{path}[{i}]"))
+    return errors
+
+
+def parse_structured(raw: Optional[str], schema: Dict[str, Any]) -> Tuple[Optional[dict], List[str]]:
+    """Parse a response that must be exactly one JSON document valid under ``schema``."""
+    try:
+        obj = json.loads(raw or "")
+    except Exception as e:
+        return None, [f"$: not valid JSON ({e})"]
+    errors = validate_json(obj, schema)
+    return (obj if not errors else None), errors
+
+
+def reask_message(errors: List[str], limit: int = 8) -> Dict[str, str]:
+    shown = "\n".join(f"- {e}" for e in errors[:limit])
+    more = f"\n- (+{len(errors) - limit} more)" if len(errors) > limit else ""
+    return {
+        "role": "user",
+        "content": "Your previous response did not match the required JSON schema:\n"
+        f"{shown}{more}\nReturn the corrected JSON object only, with every key present.",
+    }
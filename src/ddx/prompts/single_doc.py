@@ -13,7 +13,45 @@ def contract_lines(field_cfg: dict) -> str:
         lines.append(f'- "{k}": {t}, {req}. {desc}'.strip())
     return "\n".join(lines) or "- (no intermediate keys)"
 
+class SingleDocPrompt:
+    """Field prompt compiled once; only the per-document filename slot is filled per call.
+
+    Everything that does not depend on the document is in ``prefix`` so repeated calls for
+    the same field share an identical leading block (provider-side prompt caching).
+    """
+
+    __slots__ = ("prefix",)
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+
+    def render(self, filename: str = None) -> str:
+        if not filename:
+            return self.prefix
+        return (
+            f"{self.prefix}- This document's filename is \"{filename}\"; use it verbatim as "
+            f"\"doc\" in every evidence item.\n"
+        )
+
+
+# id(field) -> (field, compiled); holding the field keeps its id from being reused
+_COMPILED: Dict[int, tuple] = {}
+
+
+def compile_prompt_single_doc(field: dict) -> SingleDocPrompt:
+    hit = _COMPILED.get(id(field))
+    if hit is not None and hit[0] is field:
+        return hit[1]
+    compiled = SingleDocPrompt(_build_prefix(field))
+    _COMPILED[id(field)] = (field, compiled)
+    return compiled
+
+
 def build_prompt_single_doc(field: dict, filename: str = None) -> str:
+    return compile_prompt_single_doc(field).render(filename)
+
+
+def _build_prefix(field: dict) -> str:
     fcfg = field.get("_cfg") or {}
     doc_category = fcfg.get("doc_category") or field.get("Sub Section/Document") or "(unspecified)"
     dp = field.get("Data Point", "")
@@ -43,7 +81,7 @@ def build_prompt_single_doc(field: dict, filename: str = None) -> str:
         value_placeholder = "<number|string|boolean|null>"
         unit_literal = f"\"{unit}\"" if unit else "null"
 
-    schema = f"""\nReturn ONLY JSON:\n{{\n  "value": {value_placeholder},\n  "unit": {unit_literal},\n  "intermediate": {intermediate_schema},\n  "evidence": [\n    {{\n      "doc": "{filename or '<string>'}",\n      "page": <number|null>,\n      "snippet": "<string>"\n    }}\n  ],\n  "evidence_structured": [\n    {{\n      "doc": "{filename or '<string>'}",\n      "page": <number|null>,\n      "snippet": "<string>",\n      "label": "<one of the intermediate keys>"\n    }}\n  ],\n  "confidence": <0..1>,\n  "notes": [<string>]\n}}\n""".strip()
+    schema = f"""\nReturn ONLY JSON:\n{{\n  "value": {value_placeholder},\n  "unit": {unit_literal},\n  "intermediate": {intermediate_schema},\n  "evidence": [\n    {{\n      "doc": "<string>",\n      "page": <number|null>,\n      "snippet": "<string>"\n    }}\n  ],\n  "evidence_structured": [\n    {{\n      "doc": "<string>",\n      "page": <number|null>,\n      "snippet": "<string>",\n      "label": "<one of the intermediate keys>"\n    }}\n  ],\n  "confidence": <0..1>,\n  "notes": [<string>]\n}}\n""".strip()
 
     hints = "\n".join(f"- {h}" for h in (fcfg.get("prompt_hints") or []))
     rules = []
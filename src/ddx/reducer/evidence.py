@@ -0,0 +1,153 @@
+from __future__ import annotations
+import re
+import unicodedata
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+# Snippets whose word trigrams are at least this fraction present on a page count as found there
+FUZZY_THRESHOLD = 0.6
+# Confidence multiplier when none of a document's quotes can be found in its text
+UNVERIFIED_PENALTY = 0.5
+
+_PAGE_RE = re.compile(r"\[Page (\d+)\] ")
+_NON_WORD_RE = re.compile(r"[\W_]+")
+# The orchestrator joins pages with a literal backslash-n sequence; PDF text may carry them too
+_LITERAL_NL_RE = re.compile(r"\\[nrt]")
+_ELLIPSIS_RE = re.compile(r"\.\.\.|…|\[\.\.\.\]")
+
+
+def _normalize_words(text: str) -> str:
+    text = _LITERAL_NL_RE.sub(" ", text or "")
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    return _NON_WORD_RE.sub(" ", text).strip()
+
+
+def _trigrams(words: List[str]) -> set:
+    if len(words) < 3:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + 3]) for i in range(len(words) - 2)}
+
+
+class _Page:
+    __slots__ = ("number", "words", "flat", "_grams")
+
+    def __init__(self, number: Optional[int], text: str):
+        self.number = number
+        self.words = _normalize_words(text)
+        # Whitespace-insensitive form: "1 234,5 kWh" and "1234,5kWh" compare equal
+        self.flat = self.words.replace(" ", "")
+        self._grams: Optional[set] = None
+
+    def grams(self) -> set:
+        if self._grams is None:
+            words = self.words.split()
+            self._grams = _trigrams(words) | {tuple(words[i:i + 2]) for i in range(len(words) - 1)}
+        return self._grams
+
+
+class PageIndex:
+    """Normalized per-page text of one document, built once and shared by every field."""
+
+    __slots__ = ("pages",)
+
+    def __init__(self, doc_text: str):
+        parts = _PAGE_RE.split(doc_text or "")
+        pages: List[_Page] = []
+        if len(parts) > 1:
+            if parts[0].strip():
+                pages.append(_Page(None, parts[0]))
+            for num, body in zip(parts[1::2], parts[2::2]):
+                pages.append(_Page(int(num), body))
+        else:
+            pages.append(_Page(None, doc_text or ""))
+        self.pages = pages
+
+    def locate(self, snippet: str, page_hint: Any = None) -> Tuple[Optional[_Page], float]:
+        """Best page for a quote and a 0..1 match score (1.0 = exact modulo whitespace/case)."""
+        fragments = [f for f in (_normalize_words(x) for x in _ELLIPSIS_RE.split(snippet or "")) if f]
+        if not fragments:
+            return None, 0.0
+        ordered = sorted(self.pages, key=lambda p: p.number != page_hint)
+        flats = [f.replace(" ", "") for f in fragments]
+        for p in ordered:
+            if all(f in p.flat for f in flats):
+                return p, 1.0
+        words = " ".join(fragments).split()
+        grams = _trigrams(words) if len(words) >= 3 else {tuple(words[i:i + 2]) for i in range(len(words) - 1)}
+        if not grams:
+            return None, 0.0
+        best, best_score = None, 0.0
+        for p in ordered:
+            score = len(grams & p.grams()) / len(grams)
+            if score > best_score:
+                best, best_score = p, score
+        return best, best_score
+
+
+_INDEX_CACHE: "OrderedDict[str, PageIndex]" = OrderedDict()
+_INDEX_LOCK = Lock()
+_INDEX_CACHE_SIZE = 64
+
+
+def page_index(doc_text: str) -> PageIndex:
+    # Keyed by the text itself: str hashes are cached, so repeat lookups across fields are O(1)
+    with _INDEX_LOCK:
+        idx = _INDEX_CACHE.get(doc_text)
+        if idx is not None:
+            _INDEX_CACHE.move_to_end(doc_text)
+            return idx
+    idx = PageIndex(doc_text)
+    with _INDEX_LOCK:
+        _INDEX_CACHE[doc_text] = idx
+        while len(_INDEX_CACHE) > _INDEX_CACHE_SIZE:
+            _INDEX_CACHE.popitem(last=False)
+    return idx
+
+
+def _verify_item(index: PageIndex, ev: Dict[str, Any]) -> Optional[bool]:
+    snippet = ev.get("snippet")
+    if not isinstance(snippet, str) or not snippet.strip():
+        return None
+    page, score = index.locate(snippet, ev.get("page"))
+    ok = page is not None and score >= FUZZY_THRESHOLD
+    ev["verified"] = ok
+    ev["match_score"] = round(score, 3)
+    if ok and page.number is not None and ev.get("page") != page.number:
+        ev["page_claimed"] = ev.get("page")
+        ev["page"] = page.number
+    return ok
+
+
+def verify_evidence(doc_text: str, j_norm: Dict[str, Any]) -> Dict[str, Any]:
+    """Check each evidence quote against the document text, in place.
+
+    Quotes are matched case-, accent-, punctuation- and whitespace-insensitively, exactly
+    first, then by word-trigram overlap. Wrong page numbers are corrected (the claimed
+    page is kept as ``page_claimed``). Confidence is scaled by the share of quotes found,
+    down to ``UNVERIFIED_PENALTY`` when none are.
+    """
+    index = page_index(doc_text)
+    seen = set()
+    checked = verified = 0
+    for key in ("evidence_structured", "evidence"):
+        for ev in j_norm.get(key) or []:
+            if not isinstance(ev, dict) or id(ev) in seen:
+                continue
+            seen.add(id(ev))
+            ok = _verify_item(index, ev)
+            if ok is None:
+                continue
+            checked += 1
+            verified += int(ok)
+    if checked:
+        ratio = verified / checked
+        j_norm["evidence_verified"] = round(ratio, 3)
+        if ratio < 1.0:
+            factor = UNVERIFIED_PENALTY + (1.0 - UNVERIFIED_PENALTY) * ratio
+            j_norm["confidence"] = round(float(j_norm.get("confidence") or 0.0) * factor, 4)
+            notes = j_norm.setdefault("notes", [])
+            if isinstance(notes, list):
+                notes.append(f"{checked - verified} of {checked} evidence quote(s) not found in the document text.")
+    return j_norm
@@ -2,27 +2,14 @@
 from __future__ import annotations
 from typing import Any, Dict
 
+from ddx.reducer.evidence import verify_evidence
+from ddx.reducer.units import parse_number
 
-def _to_float(x):
-    if x is None:
-        return None
-    if isinstance(x, (int, float)):
-        return float(x)
-    if isinstance(x, str):
-        s = x.strip().replace(" ", "")
-        if s.count(",") == 1 and s.count(".") > 1:
-            s = s.replace(".", "").replace(",", ".")
-        elif s.count(",") == 1 and s.count(".") == 0:
-            s = s.replace(",", ".")
-        else:
-            s = s.replace(",", "")
-        try:
-            return float(s)
-        except Exception:
-            return None
+
+def _to_float(x, locale=None):
     if isinstance(x, bool):
-        return x
-    return None
+        return float(x)
+    return parse_number(x, locale)
 
 
 def _normalize_single_doc_output(fn: str, doc_text: str, j_norm: dict, inter_spec: dict) -> dict:
@@ -45,6 +32,9 @@ def _normalize_single_doc_output(fn: str, doc_text: str, j_norm: dict, inter_spe
             elif isinstance(e, str):
                 evs_struct.append({"doc": fn, "page": None, "snippet": (e[:240] or None)})
     j_norm["evidence_structured"] = evs_struct
+    if doc_text and not j_norm.get("error"):
+        # Quotes are checked against the text the model actually saw; wrong pages get fixed
+        verify_evidence(doc_text, j_norm)
     return j_norm
 
 
@@ -57,11 +47,12 @@ def normalize_per_doc(doc_json: dict, field_cfg: dict) -> dict:
     inter_spec = ec.get("intermediate", {}) or {}
     rv = ec.get("return_value")
     allowed = set(inter_spec.keys())
+    locale = (field_cfg or {}).get("number_locale")
 
     def cast(v, typ):
         t = (typ or "string").lower()
         if t == "number":
-            return _to_float(v)
+            return _to_float(v, locale)
         if t == "boolean":
             if v is None:
                 return None
@@ -98,8 +89,10 @@ def normalize_per_doc(doc_json: dict, field_cfg: dict) -> dict:
                 out["intermediate"]["rate_usd_per_kwh"] = float(cost) / float(kwh)
             except Exception:
                 pass
+    missing = []
     for k, spec in inter_spec.items():
         if out["intermediate"].get(k) is None:
+            missing.append(k)
             t = (spec.get("type") or "").lower()
             if t == "boolean":
                 out["intermediate"][k] = False
@@ -108,10 +101,15 @@ def normalize_per_doc(doc_json: dict, field_cfg: dict) -> dict:
             else:
                 out["intermediate"][k] = ""
 
+    # Keys filled with the type default above; columnar reducers treat them as not found
+    if missing:
+        out["_missing"] = missing
+
+    # A return value that is not a declared intermediate (a derived key) stays None
     if isinstance(rv, list):
-        out["value"] = {k: out["intermediate"][k] for k in rv}
+        out["value"] = {k: out["intermediate"].get(k) for k in rv}
     elif isinstance(rv, str):
-        out["value"] = out["intermediate"][rv]
+        out["value"] = out["intermediate"].get(rv)
     else:
         if out["value"] is None:
             out["value"] = False
@@ -1,10 +1,76 @@
 from __future__ import annotations
 import json
 
+from ddx.reducer.table import IntermediateTable
+from ddx.reducer.timeseries import reduce_time_series
+from ddx.reducer.units import compile_field_conversion, target_unit
+
+# (field_key, id(field_def)) -> (field_def, {schema_json: prefix})
+_PREFIXES: dict = {}
+
+
+def _reducer_prefix(field_key: str, field_def: dict, rules, schema_json: str) -> str:
+    slot = _PREFIXES.get((field_key, id(field_def)))
+    if slot is None or slot[0] is not field_def:
+        slot = (field_def, {})
+        _PREFIXES[(field_key, id(field_def))] = slot
+    prefix = slot[1].get(schema_json)
+    if prefix is None:
+        pol = field_def.get("reducer_policy") or {}
+        expected_unit = pol.get("expected_unit") if "expected_unit" in pol else field_def.get("unit")
+        prefix = f"""
+You are the reducer for "{field_key}".
+
+Reducer policy:
+- expected_unit = {expected_unit}
+- method = {pol.get("method")}
+- strategy = {pol.get("strategy")}
+- rules = {json.dumps(rules, ensure_ascii=False)}
+
+Return STRICT JSON only in this schema:
+{schema_json}
+
+Intermediate results (per-doc):
+"""
+        slot[1][schema_json] = prefix
+    return prefix
+
+
+def _candidates_block(candidates: list) -> str:
+    # Compact separators: same content as indent=2, far fewer tokens per reduce call
+    return json.dumps(candidates, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def _deterministic_average(table: IntermediateTable, field_def: dict, rv) -> dict:
+    """Mean of a numeric return value in expected_unit; None when that cannot be done exactly."""
+    if not isinstance(rv, str) or table.types.get(rv) != "number":
+        return None
+    conv = compile_field_conversion(field_def)
+    dst = target_unit(field_def)
+    if conv is None and dst is not None:
+        return None
+    rows = table.present(rv)
+    if not rows:
+        return None
+    raw = table.mean(rv)
+    value = conv.apply(raw) if conv is not None else raw
+    notes = [f"Deterministic mean over {len(rows)} of {len(table)} documents."]
+    if conv is not None and conv.factor != 1.0:
+        notes.append(f"Converted {conv.src} -> {conv.dst} (x{conv.factor:g}).")
+    return {
+        "value": round(value, 6),
+        "unit": dst,
+        "justification": f"Average of {len(rows)} per-document '{rv}' values"
+        + (f" ({raw:.6g} {conv.src})" if conv is not None else "") + ".",
+        "evidence": [e for i in rows for e in table.evidence[i]],
+        "confidence": round(sum(table.confidence[i] for i in rows) / len(rows), 4),
+        "notes": notes,
+    }
+
+
 def reduce_by_policy(field_key: str, field_def: dict, intermediate_results: list, llm_client) -> dict:
     pol = field_def.get("reducer_policy") or {}
     expected_unit = pol.get("expected_unit") if "expected_unit" in pol else field_def.get("unit")
-    method = pol.get("method")
     strategy = pol.get("strategy")
     rules = pol.get("rules")
     ec = field_def.get("extraction_contract", {}) or {}
@@ -26,41 +92,35 @@ def reduce_by_policy(field_key: str, field_def: dict, intermediate_results: list
     elif isinstance(rules, list):
         rules = [_normalize_rule(v) for v in rules]
 
-    candidates = []
-    rv = (field_def.get("extraction_contract", {}) or {}).get("return_value")
-    for r in intermediate_results:
-        v = r.get("value")
-        if v is None and isinstance(rv, str):
-            v = (r.get("intermediate") or {}).get(rv, None)
-        candidates.append({
-            "value": v,
-            "unit": r.get("unit"),
-            "intermediate": r.get("intermediate"),
-            "evidence": r.get("evidence", []),
-            "confidence": r.get("confidence"),
-            "page": r.get("_page", None),
-            "filename": r.get("_filename", None),
-        })
+    # Failed map calls carry zero-filled intermediates; IntermediateTable leaves them out
+    table = IntermediateTable.from_per_doc(intermediate_results, field_def)
+    candidates = table.candidates()
+
+    conv = compile_field_conversion(field_def) if isinstance(rv, str) else None
+    if conv is not None and table.types.get(rv) == "number":
+        # Hand the reducer values already in expected_unit instead of asking it to convert
+        for c, x in zip(candidates, conv.apply_column(table.columns[rv])):
+            c["value"] = None if x != x else x
+            c["unit"] = conv.dst
+
+    # Bill-style fields: place each document on its billing month, dedupe, window, weight
+    if strategy == "weighted_average" or (
+        strategy in ("average", "mean") and (pol.get("source_keys") or {}).get("period_start")
+    ):
+        det = reduce_time_series(table, field_def)
+        if det is not None:
+            return det
+    if strategy in ("average", "mean"):
+        det = _deterministic_average(table, field_def, rv)
+        if det is not None:
+            return det
 
     def _unit_json_value(u):
         return None if u in (None, "None") else u
 
     def _llm_reduce(schema_json: str) -> dict:
-        prompt = f"""
-You are the reducer for "{field_key}".
-
-Reducer policy:
-- expected_unit = {expected_unit}
-- method = {method}
-- strategy = {strategy}
-- rules = {json.dumps(rules, ensure_ascii=False)}
-
-Intermediate results (per-doc):
-{json.dumps(candidates, ensure_ascii=False, indent=2)}
-
-Return STRICT JSON only in this schema:
-{schema_json}
-"""
+        # Static policy + schema first (compiled once per field), per-run candidates last
+        prompt = _reducer_prefix(field_key, field_def, rules, schema_json) + _candidates_block(candidates)
         try:
             messages = [
                 {"role": "system", "content": "Return ONLY valid JSON matching the schema. No prose."},
@@ -105,37 +165,16 @@ Return STRICT JSON only in this schema:
 
         merged = {}
         for k in rv:
-            vals, confs = [], []
-            for c in candidates:
-                v = (c.get("intermediate") or {}).get(k)
-                if v is not None:
-                    vals.append(v)
-                    confs.append(c.get("confidence") or 0.0)
-            if not vals:
+            v = table.reduce(k, (rules or {}).get(k)) if k in table.columns else None
+            if v is None:
                 t = ((ec.get("intermediate") or {}).get(k, {}) or {}).get("type", "string").lower()
                 if t == "boolean":
-                    merged[k] = False
+                    v = False
                 elif t == "number":
-                    merged[k] = 0.0
+                    v = 0.0
                 else:
-                    merged[k] = ""
-                continue
-            rule = (rules or {}).get(k)
-            if rule == "any_true":
-                merged[k] = any(bool(v) for v in vals)
-            elif rule == "any_false":
-                merged[k] = any(v is False for v in vals)
-            elif rule == "all_true":
-                merged[k] = all(bool(v) for v in vals)
-            elif rule == "take_max":
-                merged[k] = max(vals)
-            elif rule == "take_min":
-                merged[k] = min(vals)
-            elif rule == "majority_vote":
-                merged[k] = max(set(vals), key=vals.count)
-            else:
-                best_idx = max(range(len(vals)), key=lambda i: confs[i])
-                merged[k] = vals[best_idx]
+                    v = ""
+            merged[k] = v
 
         return {
             "value": merged or None,
@@ -161,10 +200,8 @@ Return STRICT JSON only in this schema:
             result["unit"] = None
         return result
 
-    best = None
-    for c in candidates:
-        if best is None or (c.get("confidence", 0) or 0) > (best.get("confidence", 0) or 0):
-            best = c
+    best_i = table.best_row()
+    best = candidates[best_i] if best_i is not None else None
     return {
         "value": best.get("value") if best else None,
         "unit": _unit_json_value(expected_unit),
@@ -0,0 +1,163 @@
+from __future__ import annotations
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+from ddx.reducer.units import parse_number
+
+# Rule answers at least this confident stand in for the map call (per field: pre_extract.min_confidence)
+DEFAULT_MIN_CONFIDENCE = 0.9
+DEFAULT_RULE_CONFIDENCE = 0.9
+# Confidence multiplier when one intermediate matches with different values in a document
+CONFLICT_PENALTY = 0.5
+# Matches examined per rule and page; the first ones decide, the rest only reveal conflicts
+_MAX_MATCHES = 20
+_SNIPPET_CONTEXT = 80
+
+_PAGE_RE = re.compile(r"\[Page (\d+)\] ")
+# Real line breaks, or the literal "\n" the orchestrator joins pages with
+_LINE_BREAK_RE = re.compile(r"\n|\\n")
+
+
+class _Rule:
+    __slots__ = ("intermediate", "pattern", "keywords", "value", "confidence", "name")
+
+    def __init__(self, spec: Dict[str, Any], n: int):
+        self.intermediate = spec["intermediate"]
+        self.pattern = re.compile(spec["pattern"], re.IGNORECASE) if spec.get("pattern") else None
+        self.keywords = [_fold(k) for k in spec.get("keywords") or [] if k]
+        self.value = spec.get("value", True if self.pattern is None else None)
+        self.confidence = float(spec.get("confidence", DEFAULT_RULE_CONFIDENCE))
+        self.name = spec.get("name") or f"{self.intermediate}#{n}"
+
+
+class CompiledRules:
+    __slots__ = ("rules", "min_confidence", "types", "decisive_keys", "locale")
+
+    def __init__(self, field_cfg: Dict[str, Any]):
+        spec = field_cfg.get("pre_extract") or {}
+        ec = field_cfg.get("extraction_contract") or {}
+        inter = ec.get("intermediate") or {}
+        self.rules = [_Rule(r, n) for n, r in enumerate(spec.get("rules") or [], start=1)
+                      if isinstance(r, dict) and r.get("intermediate") in inter
+                      and (r.get("pattern") or r.get("keywords"))]
+        self.min_confidence = float(spec.get("min_confidence", DEFAULT_MIN_CONFIDENCE))
+        self.types = {k: ((v or {}).get("type") or "string").lower() for k, v in inter.items()}
+        rv = ec.get("return_value")
+        keys = [rv] if isinstance(rv, str) else [k for k in rv or [] if isinstance(k, str)]
+        # Required intermediates some rule targets must be found too (e.g. the kWh a rate is weighted by)
+        ruled = {r.intermediate for r in self.rules}
+        keys += [k for k, v in inter.items() if (v or {}).get("required") and k in ruled and k not in keys]
+        self.decisive_keys = keys
+        self.locale = field_cfg.get("number_locale")
+
+
+_COMPILED: Dict[int, tuple] = {}
+
+
+def compile_rules(field_cfg: Dict[str, Any]) -> CompiledRules:
+    hit = _COMPILED.get(id(field_cfg))
+    if hit is not None and hit[0] is field_cfg:
+        return hit[1]
+    compiled = CompiledRules(field_cfg)
+    _COMPILED[id(field_cfg)] = (field_cfg, compiled)
+    return compiled
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in text if not unicodedata.combining(c)).casefold()
+
+
+def _fold_with_offsets(text: str) -> Tuple[str, List[int]]:
+    """Case- and accent-folded text plus, per folded character, its offset in ``text``."""
+    out: List[str] = []
+    offsets: List[int] = []
+    for i, ch in enumerate(text):
+        for f in _fold(ch):
+            out.append(f)
+            offsets.append(i)
+    return "".join(out), offsets
+
+
+def _pages(doc_text: str) -> List[Tuple[Optional[int], str]]:
+    parts = _PAGE_RE.split(doc_text or "")
+    if len(parts) == 1:
+        return [(None, doc_text or "")]
+    pages = [(None, parts[0])] if parts[0].strip() else []
+    return pages + [(int(num), body) for num, body in zip(parts[1::2], parts[2::2])]
+
+
+def _snippet(text: str, start: int, end: int) -> str:
+    """The match with some context, cut at line breaks."""
+    lo, hi = max(0, start - _SNIPPET_CONTEXT), min(len(text), end + _SNIPPET_CONTEXT)
+    before = list(_LINE_BREAK_RE.finditer(text, lo, start))
+    after = _LINE_BREAK_RE.search(text, end, hi)
+    lo = before[-1].end() if before else lo
+    hi = after.start() if after else hi
+    return re.sub(r"\s+", " ", text[lo:hi]).strip()
+
+
+def _matches(rule: _Rule, text: str):
+    """(start, end, raw value) of the rule's matches in one page."""
+    if rule.pattern is not None:
+        for n, m in enumerate(rule.pattern.finditer(text)):
+            if n >= _MAX_MATCHES:
+                return
+            if rule.value is not None:
+                raw = rule.value
+            elif "value" in rule.pattern.groupindex:
+                raw = m.group("value")
+            else:
+                raw = m.group(1) if rule.pattern.groups else m.group(0)
+            yield m.start(), m.end(), raw
+        return
+    folded, offsets = _fold_with_offsets(text)
+    for kw in rule.keywords:
+        i = folded.find(kw)
+        if i >= 0:
+            yield offsets[i], offsets[i + len(kw) - 1] + 1, rule.value
+
+
+def _cast(raw: Any, typ: str, locale: Optional[str]) -> Any:
+    if typ == "number":
+        return parse_number(raw, locale)
+    if typ == "boolean":
+        # A pattern rule without a "value" asserts presence
+        return raw if isinstance(raw, bool) else True
+    return (str(raw).strip() or None) if raw is not None else None
+
+
+def pre_extract(field_cfg: Dict[str, Any], doc_text: str) -> Dict[str, Any]:
+    """Run a field's ``pre_extract`` rules over one document's page text.
+
+    Returns {"candidates": {intermediate: {"value", "confidence", "page", "snippet", "rule"}},
+    "decisive": bool}. A candidate comes from the first page and rule that match; when the
+    same intermediate also matches with a different value its confidence is multiplied by
+    ``CONFLICT_PENALTY``. The answer is decisive when every return-value intermediate, and every
+    required one that a rule targets, has a candidate at or above the field's ``min_confidence``.
+    """
+    rules = compile_rules(field_cfg)
+    candidates: Dict[str, Dict[str, Any]] = {}
+    if not rules.rules:
+        return {"candidates": candidates, "decisive": False}
+    for page, text in _pages(doc_text):
+        for rule in rules.rules:
+            typ = rules.types.get(rule.intermediate, "string")
+            for start, end, raw in _matches(rule, text):
+                value = _cast(raw, typ, rules.locale)
+                if value is None:
+                    continue
+                cand = candidates.get(rule.intermediate)
+                if cand is None:
+                    candidates[rule.intermediate] = {
+                        "value": value, "confidence": rule.confidence, "page": page,
+                        "snippet": _snippet(text, start, end), "rule": rule.name,
+                    }
+                elif cand["value"] != value and not cand.get("conflict"):
+                    cand["conflict"] = value
+                    cand["confidence"] = round(cand["confidence"] * CONFLICT_PENALTY, 4)
+    decisive = bool(rules.decisive_keys) and all(
+        k in candidates and candidates[k]["confidence"] >= rules.min_confidence for k in rules.decisive_keys
+    )
+    return {"candidates": candidates, "decisive": decisive}
@@ -0,0 +1,203 @@
+from __future__ import annotations
+import math
+from array import array
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+# Column storage per contract type: numbers are float64 arrays with NaN for "not found",
+# booleans are int8 arrays with -1 for "not found", strings stay a list (None when missing).
+_MISSING_BOOL = -1
+
+
+def _np():
+    # numpy is optional; array('d') columns are exposed to it without copying when present
+    try:
+        import numpy  # type: ignore
+    except Exception:
+        return None
+    return numpy
+
+
+class IntermediateTable:
+    """Per-document intermediates of one field, stored column-wise.
+
+    One typed column per ``extraction_contract.intermediate`` key plus the per-row doc
+    metadata. Evidence lists are kept by reference to the per-doc outputs they came from,
+    never copied. Rows whose map call failed are not added.
+    """
+
+    __slots__ = ("keys", "types", "columns", "filenames", "doc_index", "pages",
+                 "confidence", "units", "values", "evidence")
+
+    def __init__(self, inter_spec: Dict[str, Any]):
+        self.keys: List[str] = list(inter_spec.keys())
+        self.types: Dict[str, str] = {
+            k: ((spec or {}).get("type") or "string").lower() for k, spec in inter_spec.items()
+        }
+        self.columns: Dict[str, Any] = {}
+        for k in self.keys:
+            t = self.types[k]
+            self.columns[k] = array("d") if t == "number" else array("b") if t == "boolean" else []
+        self.filenames: List[Optional[str]] = []
+        self.doc_index: List[Optional[int]] = []
+        self.pages: List[Any] = []
+        self.confidence = array("d")
+        self.units: List[Optional[str]] = []
+        self.values: List[Any] = []
+        self.evidence: List[list] = []
+
+    @classmethod
+    def from_per_doc(cls, per_doc_outputs: List[Dict[str, Any]], field_def: Dict[str, Any]) -> "IntermediateTable":
+        ec = (field_def or {}).get("extraction_contract") or {}
+        table = cls(ec.get("intermediate") or {})
+        rv = ec.get("return_value")
+        for r in per_doc_outputs:
+            if r.get("error"):
+                continue
+            table.append(r, rv)
+        return table
+
+    def append(self, r: Dict[str, Any], rv: Any = None) -> None:
+        inter = r.get("intermediate") or {}
+        missing = set(r.get("_missing") or ())
+        for k in self.keys:
+            v = None if k in missing else inter.get(k)
+            col, t = self.columns[k], self.types[k]
+            if t == "number":
+                col.append(float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else math.nan)
+            elif t == "boolean":
+                col.append(_MISSING_BOOL if v is None else int(bool(v)))
+            else:
+                col.append(None if v in (None, "") else str(v))
+        v = r.get("value")
+        if v is None and isinstance(rv, str):
+            v = inter.get(rv)
+        self.values.append(v)
+        self.filenames.append(r.get("_filename"))
+        self.doc_index.append(r.get("_doc_index"))
+        self.pages.append(r.get("_page"))
+        self.confidence.append(float(r.get("confidence") or 0.0))
+        self.units.append(r.get("unit"))
+        self.evidence.append(r.get("evidence") or [])
+
+    def __len__(self) -> int:
+        return len(self.filenames)
+
+    # ---- column views -------------------------------------------------
+
+    def present(self, key: str) -> List[int]:
+        """Row indexes where ``key`` was actually found in the document."""
+        col, t = self.columns[key], self.types[key]
+        if t == "number":
+            return [i for i, x in enumerate(col) if x == x]
+        if t == "boolean":
+            return [i for i, x in enumerate(col) if x != _MISSING_BOOL]
+        return [i for i, x in enumerate(col) if x is not None]
+
+    def column(self, key: str) -> List[Any]:
+        """Decoded column: floats/bools/strings with None for missing."""
+        col, t = self.columns[key], self.types[key]
+        if t == "number":
+            return [x if x == x else None for x in col]
+        if t == "boolean":
+            return [None if x == _MISSING_BOOL else bool(x) for x in col]
+        return list(col)
+
+    # ---- reductions ---------------------------------------------------
+
+    def mean(self, key: str) -> Optional[float]:
+        np = _np()
+        if np is not None:
+            a = np.frombuffer(self.columns[key], dtype=np.float64)
+            a = a[~np.isnan(a)]
+            return float(a.mean()) if a.size else None
+        vals = [x for x in self.columns[key] if x == x]
+        return math.fsum(vals) / len(vals) if vals else None
+
+    def weighted_average(self, key: str, weight_key: str) -> Optional[float]:
+        np = _np()
+        if np is not None:
+            v = np.frombuffer(self.columns[key], dtype=np.float64)
+            w = np.frombuffer(self.columns[weight_key], dtype=np.float64)
+            ok = ~np.isnan(v) & ~np.isnan(w)
+            den = float(w[ok].sum())
+            return float((v[ok] * w[ok]).sum()) / den if den else None
+        pairs = [(v, w) for v, w in zip(self.columns[key], self.columns[weight_key]) if v == v and w == w]
+        den = math.fsum(w for _, w in pairs)
+        return math.fsum(v * w for v, w in pairs) / den if den else None
+
+    def _present_values(self, key: str) -> List[Any]:
+        col = self.column(key)
+        return [col[i] for i in self.present(key)]
+
+    def take_max(self, key: str) -> Any:
+        vals = self._present_values(key)
+        return max(vals) if vals else None
+
+    def take_min(self, key: str) -> Any:
+        vals = self._present_values(key)
+        return min(vals) if vals else None
+
+    def majority_vote(self, key: str) -> Any:
+        vals = self._present_values(key)
+        if not vals:
+            return None
+        # Ties go to the value seen first, so the result does not depend on hash order
+        counts = Counter(vals)
+        best = max(counts.values())
+        return next(v for v in vals if counts[v] == best)
+
+    def any_true(self, key: str) -> Optional[bool]:
+        rows = self.present(key)
+        return any(self.columns[key][i] == 1 for i in rows) if rows else None
+
+    def any_false(self, key: str) -> Optional[bool]:
+        rows = self.present(key)
+        return any(self.columns[key][i] == 0 for i in rows) if rows else None
+
+    def all_true(self, key: str) -> Optional[bool]:
+        rows = self.present(key)
+        return all(self.columns[key][i] == 1 for i in rows) if rows else None
+
+    def max_confidence(self, key: str) -> Any:
+        rows = self.present(key)
+        if not rows:
+            return None
+        col = self.column(key)
+        return col[max(rows, key=lambda i: (self.confidence[i], -i))]
+
+    def reduce(self, key: str, rule: Optional[str]) -> Any:
+        op = {
+            "any_true": self.any_true,
+            "any_false": self.any_false,
+            "all_true": self.all_true,
+            "take_max": self.take_max,
+            "take_min": self.take_min,
+            "majority_vote": self.majority_vote,
+            "mean": self.mean,
+            "average": self.mean,
+        }.get(rule or "", self.max_confidence)
+        return op(key)
+
+    def best_row(self) -> Optional[int]:
+        if not len(self):
+            return None
+        return max(range(len(self)), key=lambda i: (self.confidence[i], -i))
+
+    # ---- row views ----------------------------------------------------
+
+    def candidates(self) -> List[Dict[str, Any]]:
+        """Reducer-prompt rows; evidence lists are the per-doc objects themselves."""
+        cols = {k: self.column(k) for k in self.keys}
+        out = []
+        for i in range(len(self)):
+            out.append({
+                "value": self.values[i],
+                "unit": self.units[i],
+                "intermediate": {k: cols[k][i] for k in self.keys},
+                "evidence": self.evidence[i],
+                "confidence": self.confidence[i],
+                "page": self.pages[i],
+                "filename": self.filenames[i],
+            })
+        return out
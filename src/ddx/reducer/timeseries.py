@@ -0,0 +1,290 @@
+from __future__ import annotations
+import math
+import re
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from ddx.reducer.table import IntermediateTable
+from ddx.reducer.units import compile_field_conversion, target_unit
+
+_MONTHS = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4, "mayo": 5, "junio": 6, "julio": 7,
+    "agosto": 8, "septiembre": 9, "setiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12,
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6, "july": 7,
+    "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+    "ene": 1, "feb": 2, "mar": 3, "abr": 4, "jun": 6, "jul": 7, "ago": 8, "sep": 9, "sept": 9,
+    "set": 9, "oct": 10, "nov": 11, "dic": 12, "jan": 1, "apr": 4, "aug": 8, "dec": 12,
+}
+_MONTH_ALT = "|".join(sorted(_MONTHS, key=len, reverse=True))
+_ISO_RE = re.compile(r"\b(\d{4})[-/.](\d{1,2})(?:[-/.](\d{1,2}))?\b")
+_DMY_RE = re.compile(r"\b(\d{1,2})[-/.](\d{1,2})[-/.](\d{2,4})\b")
+_NAMED_RE = re.compile(
+    rf"\b(?:(\d{{1,2}})\s+(?:de\s+)?)?({_MONTH_ALT})\.?,?\s+(?:de\s+|del\s+)?(\d{{4}})\b", re.I
+)
+
+# Two bills for the same period whose kWh (or cost) differ by less than this are the same bill
+_DUP_KWH_TOLERANCE = 0.005
+
+
+def parse_date(s: Any) -> Optional[date]:
+    """Dates as printed on bills: ISO, dd/mm/yyyy (day first), "15 de enero de 2025",
+    "Enero 2025" (first of month) and "2025-01"."""
+    if not isinstance(s, str) or not s.strip():
+        return None
+    m = _ISO_RE.search(s)
+    if m:
+        y, mo, d = int(m.group(1)), int(m.group(2)), int(m.group(3) or 1)
+        return _safe_date(y, mo, d)
+    m = _DMY_RE.search(s)
+    if m:
+        d, mo, y = int(m.group(1)), int(m.group(2)), int(m.group(3))
+        if y < 100:
+            y += 2000
+        if mo > 12 and d <= 12:
+            d, mo = mo, d
+        return _safe_date(y, mo, d)
+    m = _NAMED_RE.search(s)
+    if m:
+        return _safe_date(int(m.group(3)), _MONTHS[m.group(2).lower()], int(m.group(1) or 1))
+    return None
+
+
+def _safe_date(y: int, mo: int, d: int) -> Optional[date]:
+    try:
+        return date(y, mo, d)
+    except ValueError:
+        return None
+
+
+def _month_index(d: date) -> int:
+    return d.year * 12 + d.month - 1
+
+
+def _month_label(idx: int) -> str:
+    return f"{idx // 12:04d}-{idx % 12 + 1:02d}"
+
+
+def _month_index_label(label: str) -> int:
+    y, m = label.split("-")
+    return int(y) * 12 + int(m) - 1
+
+
+class _Bill:
+    __slots__ = ("row", "doc", "start", "end", "month", "kwh", "cost", "rate", "confidence")
+
+    def __init__(self, row, doc, start, end, month, kwh, cost, rate, confidence):
+        self.row, self.doc, self.start, self.end, self.month = row, doc, start, end, month
+        self.kwh, self.cost, self.rate, self.confidence = kwh, cost, rate, confidence
+
+    def overlap_ratio(self, other: "_Bill") -> float:
+        if not (self.start and self.end and other.start and other.end):
+            return 0.0
+        lo, hi = max(self.start, other.start), min(self.end, other.end)
+        shorter = min((self.end - self.start).days, (other.end - other.start).days) + 1
+        return max(0, (hi - lo).days + 1) / max(1, shorter)
+
+
+def _bill_month(start: Optional[date], end: Optional[date], doc: Optional[str]) -> Optional[int]:
+    if start and end and end >= start:
+        # A bill belongs to the month holding most of its period
+        return _month_index(start + timedelta(days=(end - start).days // 2))
+    if end or start:
+        return _month_index(end or start)
+    d = parse_date(doc or "")
+    return _month_index(d) if d else None
+
+
+def _cell(col: Optional[List[Any]], i: int) -> Any:
+    return col[i] if col is not None else None
+
+
+def _collect_bills(table: IntermediateTable, keys: Dict[str, Optional[str]]) -> List[_Bill]:
+    cols = {name: (table.column(k) if k and k in table.columns else None) for name, k in keys.items()}
+    bills = []
+    for i in range(len(table)):
+        start = parse_date(_cell(cols["start"], i))
+        end = parse_date(_cell(cols["end"], i))
+        kwh, cost, rate = _cell(cols["kwh"], i), _cell(cols["cost"], i), _cell(cols["rate"], i)
+        if not kwh and rate is None and cost is None:
+            continue
+        bills.append(_Bill(i, table.filenames[i], start, end, _bill_month(start, end, table.filenames[i]),
+                           kwh, cost, rate, table.confidence[i]))
+    return bills
+
+
+def _close(x: float, y: float) -> bool:
+    return abs(x - y) <= _DUP_KWH_TOLERANCE * max(abs(x), abs(y))
+
+
+def _same_period(a: _Bill, b: _Bill) -> bool:
+    return a.overlap_ratio(b) > 0.5 or (a.month is not None and a.month == b.month)
+
+
+def _same_amounts(a: _Bill, b: _Bill) -> bool:
+    if a.kwh and b.kwh:
+        return _close(a.kwh, b.kwh)
+    if a.cost is not None and b.cost is not None:
+        return _close(a.cost, b.cost)
+    return False
+
+
+def _dedupe(bills: List[_Bill]) -> Tuple[List[_Bill], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """(kept bills, dropped duplicates, conflicts).
+
+    A bill is a duplicate when it covers the same period as a kept one with the same kWh (or
+    cost). Same-period bills with different amounts (a second meter or account) are both
+    kept and reported as conflicts.
+    """
+    # Highest confidence first so the kept copy is the best-read one; ties keep document order
+    kept: List[_Bill] = []
+    dropped: List[Dict[str, Any]] = []
+    conflicts: List[Dict[str, Any]] = []
+    for b in sorted(bills, key=lambda x: (-x.confidence, x.row)):
+        same = [k for k in kept if _same_period(k, b)]
+        twin = next((k for k in same if _same_amounts(k, b)), None)
+        month = _month_label(b.month) if b.month is not None else None
+        if twin is not None:
+            dropped.append({"doc": b.doc, "duplicate_of": twin.doc, "month": month})
+            continue
+        kept.append(b)
+        conflicts += [{"doc": b.doc, "conflicts_with": k.doc, "month": month, "kwh": [b.kwh, k.kwh],
+                       "cost": [b.cost, k.cost]} for k in same]
+    kept.sort(key=lambda x: (x.month if x.month is not None else math.inf, x.row))
+    return kept, dropped, conflicts
+
+
+def _bill_cost(b: _Bill) -> Optional[float]:
+    if b.cost is not None:
+        return b.cost
+    if b.rate is not None and b.kwh:
+        return b.rate * b.kwh
+    return None
+
+
+def _window_stats(bills: List[_Bill]) -> Dict[str, Any]:
+    kwh = math.fsum(b.kwh or 0.0 for b in bills)
+    priced = [(b.kwh, _bill_cost(b)) for b in bills if b.kwh and _bill_cost(b) is not None]
+    p_kwh = math.fsum(k for k, _ in priced)
+    p_cost = math.fsum(c for _, c in priced)
+    months = {b.month for b in bills if b.month is not None}
+    return {
+        "months": len(months),
+        "kwh": kwh,
+        "cost": p_cost if priced else None,
+        # kWh-weighted: sum(cost) / sum(kWh) over bills that carry a price
+        "rate": p_cost / p_kwh if p_kwh else None,
+        "kwh_per_month": kwh / len(months) if months else None,
+    }
+
+
+def rolling_windows(bills: List[_Bill], span: int = 12) -> List[Dict[str, Any]]:
+    dated = [b for b in bills if b.month is not None]
+    out = []
+    for end in sorted({b.month for b in dated}):
+        window = [b for b in dated if end - span < b.month <= end]
+        stats = _window_stats(window)
+        out.append({"start": _month_label(end - span + 1), "end": _month_label(end), **stats})
+    return out
+
+
+def reduce_time_series(table: IntermediateTable, field_def: Dict[str, Any], span: int = 12) -> Optional[Dict[str, Any]]:
+    """Deterministic billing-period reducer for ``weighted_average`` and dated ``average`` fields.
+
+    Bills are placed on the month holding most of their period (or the month named in the
+    filename), de-duplicated, and reduced over the latest ``span``-month window: kWh-weighted
+    rate for ``weighted_average``, kWh per covered month for ``average``. Months missing in
+    that window are flagged against ``min_documents``. Returns None when no bill has the
+    values the strategy needs.
+    """
+    pol = field_def.get("reducer_policy") or {}
+    strategy = pol.get("strategy")
+    rv = (field_def.get("extraction_contract") or {}).get("return_value")
+    sk = pol.get("source_keys") or {}
+    keys = {
+        "kwh": sk.get("kwh") or (sk.get("values") if strategy == "average" else None) or "monthly_kwh",
+        "cost": sk.get("cost"),
+        "rate": sk.get("rate") or (rv if strategy == "weighted_average" else None),
+        "start": sk.get("period_start"),
+        "end": sk.get("period_end"),
+    }
+    bills, duplicates, conflicts = _dedupe(_collect_bills(table, keys))
+    if not bills:
+        return None
+
+    windows = rolling_windows(bills, span)
+    latest = windows[-1] if windows else None
+    lo = _month_index_label(latest["start"]) if latest else None
+    in_window = [b for b in bills if b.month is not None and b.month >= lo] if latest else []
+    undated = [b for b in bills if b.month is None]
+    used = in_window + undated if in_window else bills
+    stats = _window_stats(used)
+
+    if strategy == "weighted_average":
+        raw, key = stats["rate"], keys["rate"] or rv
+    else:
+        raw, key = stats["kwh_per_month"] if stats["months"] else stats["kwh"] / len(used), keys["kwh"]
+    if raw is None:
+        return None
+    conv = compile_field_conversion(field_def, key) if key else None
+    dst = target_unit(field_def)
+    if conv is None and dst is not None:
+        return None
+    value = conv.apply(raw) if conv is not None else raw
+
+    missing: List[str] = []
+    if latest:
+        have = {b.month for b in in_window}
+        first = min(have)
+        # Don't report months before the first bill as missing for short histories
+        missing = [_month_label(m) for m in range(max(lo, first), _month_index_label(latest["end"]) + 1)
+                   if m not in have]
+    need = int(field_def.get("min_documents") or 0)
+    covered = stats["months"] or len(used)
+    sufficient = covered >= need if need else True
+
+    notes = [f"Deterministic {strategy} over {len(used)} bill(s) covering {covered} month(s)."]
+    if duplicates:
+        notes.append(f"Dropped {len(duplicates)} duplicate bill(s).")
+    for c in conflicts:
+        notes.append(f"{c['doc']} and {c['conflicts_with']} cover the same period with different amounts "
+                     f"(kWh {c['kwh'][0]} vs {c['kwh'][1]}); both were kept.")
+    if undated:
+        notes.append(f"{len(undated)} bill(s) without a billing period were included undated.")
+    if missing:
+        notes.append(f"Missing months: {', '.join(missing)}.")
+    if not sufficient:
+        notes.append(f"Only {covered} month(s) of bills; min_documents is {need}.")
+    if conv is not None and conv.factor != 1.0:
+        notes.append(f"Converted {conv.src} -> {conv.dst} (x{conv.factor:g}).")
+
+    confidence = sum(b.confidence for b in used) / len(used)
+    if need and not sufficient:
+        confidence *= covered / need
+    if strategy == "weighted_average":
+        how = f"sum(cost)/sum(kWh) = {stats['cost']:.6g} / {math.fsum(b.kwh or 0 for b in used if _bill_cost(b) is not None):.6g}"
+    else:
+        how = f"{stats['kwh']:.6g} kWh over {covered} month(s)"
+    period = f"{latest['start']}..{latest['end']}" if latest else "undated bills"
+    return {
+        "value": round(value, 6),
+        "unit": dst,
+        "justification": f"{strategy} over {period}: {how}.",
+        "evidence": [e for b in used for e in table.evidence[b.row]],
+        "confidence": round(confidence, 4),
+        "notes": notes,
+        "time_series": {
+            "window": {"start": latest["start"], "end": latest["end"]} if latest else None,
+            "bills": [
+                {"doc": b.doc, "month": _month_label(b.month) if b.month is not None else None,
+                 "period_start": b.start.isoformat() if b.start else None,
+                 "period_end": b.end.isoformat() if b.end else None,
+                 "kwh": b.kwh, "cost": b.cost, "rate": b.rate}
+                for b in bills
+            ],
+            "duplicates": duplicates,
+            "conflicts": conflicts,
+            "missing_months": missing,
+            "rolling": windows,
+            "coverage": {"months": covered, "min_documents": need, "sufficient": sufficient},
+        },
+    }
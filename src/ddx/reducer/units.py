@@ -0,0 +1,220 @@
+from __future__ import annotations
+import math
+import os
+import re
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# unit -> (dimension, factor to the dimension's base unit)
+# Bases: energy Wh, power W, currency USD, time month, area m2, voltage V, length m.
+_BASE_UNITS: Dict[str, Tuple[str, float]] = {
+    "wh": ("energy", 1.0),
+    "kwh": ("energy", 1e3),
+    "mwh": ("energy", 1e6),
+    "gwh": ("energy", 1e9),
+    "w": ("power", 1.0),
+    "kw": ("power", 1e3),
+    "mw": ("power", 1e6),
+    "wp": ("power", 1.0),
+    "kwp": ("power", 1e3),
+    "mwp": ("power", 1e6),
+    "v": ("voltage", 1.0),
+    "kv": ("voltage", 1e3),
+    "usd": ("currency", 1.0),
+    "$": ("currency", 1.0),
+    "us$": ("currency", 1.0),
+    "day": ("time", 12.0 / 365.25),
+    "days": ("time", 12.0 / 365.25),
+    "month": ("time", 1.0),
+    "months": ("time", 1.0),
+    "mo": ("time", 1.0),
+    "year": ("time", 12.0),
+    "years": ("time", 12.0),
+    "yr": ("time", 12.0),
+    "m2": ("area", 1.0),
+    "ha": ("area", 1e4),
+    "km2": ("area", 1e6),
+    "m": ("length", 1.0),
+    "km": ("length", 1e3),
+    "%": ("ratio", 0.01),
+    "percent": ("ratio", 0.01),
+}
+
+# contract-key token -> unit, for intermediates whose unit is only implied by their name
+_KEY_UNITS = {
+    "wh": "Wh", "kwh": "kWh", "mwh": "MWh", "gwh": "GWh",
+    "kw": "kW", "mw": "MW", "kwp": "kWp", "mwp": "MWp",
+    "usd": "USD", "years": "years", "months": "months", "ha": "ha", "m2": "m2",
+}
+
+
+def _norm_unit(u: str) -> str:
+    return (u or "").strip().lower().replace("²", "2").replace(" ", "")
+
+
+def parse_unit(unit: Optional[str]) -> Optional[Tuple[str, float]]:
+    """(dimension, factor-to-base) for a simple or ``a/b`` compound unit, or None."""
+    if not unit or unit in ("None",):
+        return None
+    u = _norm_unit(unit)
+    if "/" in u:
+        num, _, den = u.partition("/")
+        a, b = parse_unit(num), parse_unit(den)
+        if a is None or b is None:
+            return None
+        return f"{a[0]}/{b[0]}", a[1] / b[1]
+    return _BASE_UNITS.get(u)
+
+
+def conversion_factor(src: Optional[str], dst: Optional[str]) -> Optional[float]:
+    if not src or not dst:
+        return None
+    a, b = parse_unit(src), parse_unit(dst)
+    if a is None or b is None or a[0] != b[0]:
+        return None
+    return a[1] / b[1]
+
+
+def infer_unit_from_key(key: str) -> Optional[str]:
+    """Unit implied by a contract key, e.g. ``monthly_kwh`` -> ``kWh/month``."""
+    toks = (key or "").lower().split("_")
+    unit = None
+    if len(toks) >= 3 and toks[-2] == "per" and toks[-3] in _KEY_UNITS and toks[-1] in _KEY_UNITS:
+        unit = f"{_KEY_UNITS[toks[-3]]}/{_KEY_UNITS[toks[-1]]}"
+    elif toks and toks[-1] in _KEY_UNITS:
+        unit = _KEY_UNITS[toks[-1]]
+    if unit and toks[0] == "monthly" and "/" not in unit:
+        # One value per billing month
+        unit += "/month"
+    return unit
+
+
+class Conversion:
+    """A precompiled linear conversion ``value * factor`` from ``src`` to ``dst``."""
+
+    __slots__ = ("src", "dst", "factor")
+
+    def __init__(self, src: str, dst: str, factor: float):
+        self.src, self.dst, self.factor = src, dst, factor
+
+    def apply(self, x: Optional[float]) -> Optional[float]:
+        if x is None or (isinstance(x, float) and math.isnan(x)):
+            return None
+        return x * self.factor
+
+    def apply_column(self, col: Iterable[float]) -> array:
+        """Convert a float column (NaN stays NaN) in one pass."""
+        f = self.factor
+        if not isinstance(col, array):
+            col = array("d", (math.nan if v is None else float(v) for v in col))
+        try:
+            import numpy as np  # type: ignore
+        except Exception:
+            return array("d", (v * f for v in col))
+        out = array("d", bytes(len(col) * 8))
+        np.multiply(np.frombuffer(col, dtype=np.float64), f, out=np.frombuffer(out, dtype=np.float64))
+        return out
+
+    def __repr__(self) -> str:
+        return f"Conversion({self.src!r} -> {self.dst!r}, x{self.factor:g})"
+
+
+# id(field_def) -> (field_def, {key: Conversion|None})
+_CONVERSIONS: Dict[int, tuple] = {}
+
+
+def source_unit(field_def: Dict[str, Any], key: str) -> Optional[str]:
+    spec = ((field_def.get("extraction_contract") or {}).get("intermediate") or {}).get(key) or {}
+    return spec.get("unit") or infer_unit_from_key(key)
+
+
+def target_unit(field_def: Dict[str, Any]) -> Optional[str]:
+    pol = field_def.get("reducer_policy") or {}
+    u = pol.get("expected_unit") if "expected_unit" in pol else field_def.get("unit")
+    return None if u in (None, "None") else u
+
+
+def compile_field_conversion(field_def: Dict[str, Any], key: Optional[str] = None) -> Optional[Conversion]:
+    """Conversion from intermediate ``key`` (default: the scalar return_value) to the field's
+    expected unit, compiled once per field. None when either unit is unknown or incompatible."""
+    if key is None:
+        rv = (field_def.get("extraction_contract") or {}).get("return_value")
+        if not isinstance(rv, str):
+            return None
+        key = rv
+    slot = _CONVERSIONS.get(id(field_def))
+    if slot is None or slot[0] is not field_def:
+        slot = (field_def, {})
+        _CONVERSIONS[id(field_def)] = slot
+    if key not in slot[1]:
+        src, dst = source_unit(field_def, key), target_unit(field_def)
+        factor = conversion_factor(src, dst)
+        slot[1][key] = Conversion(src, dst, factor) if factor is not None else None
+    return slot[1][key]
+
+
+# ---- locale-aware number parsing ---------------------------------------------
+
+DEFAULT_NUMBER_LOCALE = os.getenv("DDX_NUMBER_LOCALE", "")
+# Locales writing "1.234,56"; the rest are treated as "1,234.56"
+_COMMA_DECIMAL = {"es", "pt", "fr", "de", "it", "nl"}
+_NUM_RE = re.compile(r"[-+]?\(?[\d.,\s']*\d[\d.,\s']*\)?")
+
+
+def _comma_decimal(locale: Optional[str]) -> Optional[bool]:
+    loc = (locale or DEFAULT_NUMBER_LOCALE or "").lower().replace("-", "_").split("_")[0]
+    if not loc:
+        return None
+    return loc in _COMMA_DECIMAL
+
+
+def parse_number(x: Any, locale: Optional[str] = None) -> Optional[float]:
+    """Parse numbers as printed on bills and datasheets.
+
+    Handles currency/unit decorations ("$ 1.234,56 kWh"), grouping spaces, accounting
+    negatives "(12.5)" and both "1,234.56" and "1.234,56". When a lone separator is
+    ambiguous ("1.234", "1,234") the locale decides: comma-decimal locales such as
+    ``es`` read them as 1234 and 1.234, other locales as 1.234 and 1234. Without a
+    locale both are read as decimals.
+    """
+    if x is None:
+        return None
+    if isinstance(x, (int, float)):
+        return float(x)
+    if not isinstance(x, str):
+        return None
+    m = _NUM_RE.search(x)
+    if not m:
+        return None
+    s = m.group(0).strip()
+    neg = s.startswith("-") or (s.startswith("(") and s.endswith(")"))
+    s = re.sub(r"[\s'()+\-]", "", s)
+    if not s:
+        return None
+    comma_dec = _comma_decimal(locale)
+    n_comma, n_dot = s.count(","), s.count(".")
+    if n_comma and n_dot:
+        # Whichever separator comes last is the decimal point
+        if s.rfind(",") > s.rfind("."):
+            s = s.replace(".", "").replace(",", ".")
+        else:
+            s = s.replace(",", "")
+    elif n_comma:
+        head, _, tail = s.rpartition(",")
+        if n_comma > 1 or (len(tail) == 3 and comma_dec is False):
+            s = s.replace(",", "")
+        else:
+            s = head.replace(",", "") + "." + tail
+    elif n_dot:
+        head, _, tail = s.rpartition(".")
+        if n_dot > 1 or (len(tail) == 3 and comma_dec is True):
+            s = s.replace(".", "")
+    try:
+        v = float(s)
+    except ValueError:
+        return None
+    return -v if neg else v
+
+
+def parse_numbers(values: Iterable[Any], locale: Optional[str] = None) -> List[Optional[float]]:
+    return [parse_number(v, locale) for v in values]
@@ -0,0 +1,94 @@
+from __future__ import annotations
+import json, os, threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+CHECKPOINT_VERSION = 1
+
+
+def checkpoint_path(store_dir: Path, project_id: str, run_id: str) -> Path:
+    return Path(store_dir) / "runs" / project_id / f"{run_id}.checkpoint.jsonl"
+
+
+def docs_signature(shas: Dict[str, Optional[str]]) -> List[List[Optional[str]]]:
+    """The document set a field result was computed over, as sorted [name, sha256] pairs."""
+    return [[name, shas[name]] for name in sorted(shas)]
+
+
+class RunCheckpoint:
+    """Append-only JSONL log of a run's finished work, so a crashed run can be resumed.
+
+    Lines are ``{"kind": "run", ...}`` (fields and settings, written once),
+    ``{"kind": "map", "field", "doc", "sha256", "output"}`` per mapped (field, document)
+    and ``{"kind": "field", "field", "docs", "result"}`` per reduced field. Every line is
+    flushed as soon as it is written; a line cut short by a crash is ignored on load.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.run: Optional[Dict[str, Any]] = None
+        self._maps: Dict[tuple, Dict[str, Any]] = {}
+        self._fields: Dict[str, Dict[str, Any]] = {}
+        self.resumed = {"maps": 0, "fields": 0}
+        if self.path.exists():
+            self._load()
+
+    def _load(self) -> None:
+        with self.path.open("r", encoding="utf-8") as fp:
+            for line in fp:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                kind = rec.get("kind")
+                if kind == "run":
+                    self.run = rec
+                elif kind == "map":
+                    self._maps[(rec["field"], rec["doc"], rec.get("sha256"))] = rec["output"]
+                elif kind == "field":
+                    self._fields[rec["field"]] = rec
+
+    def _append(self, rec: Dict[str, Any]) -> None:
+        line = json.dumps(rec, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as fp:
+                fp.write(line)
+                fp.flush()
+                os.fsync(fp.fileno())
+
+    def start(self, fields: List[str], settings: Dict[str, Any]) -> None:
+        """Record the run's fields and settings, unless resuming a run that has them."""
+        if self.run is None:
+            self.run = {"kind": "run", "version": CHECKPOINT_VERSION, "fields": list(fields), "settings": settings}
+            self._append(self.run)
+
+    def save_map(self, field: str, doc: str, sha256: Optional[str], output: Dict[str, Any]) -> None:
+        # Failed answers are not kept: a resumed run retries them
+        if output.get("error"):
+            return
+        self._maps[(field, doc, sha256)] = output
+        self._append({"kind": "map", "field": field, "doc": doc, "sha256": sha256, "output": output})
+
+    def save_field(self, field: str, docs: List[List[Optional[str]]], result: Dict[str, Any]) -> None:
+        rec = {"kind": "field", "field": field, "docs": docs, "result": result}
+        self._fields[field] = rec
+        self._append(rec)
+
+    def map_output(self, field: str, doc: str, sha256: Optional[str]) -> Optional[Dict[str, Any]]:
+        """A checkpointed map output for this document content, if any."""
+        out = self._maps.get((field, doc, sha256))
+        if out is not None:
+            with self._lock:
+                self.resumed["maps"] += 1
+        return out
+
+    def field_result(self, field: str, docs: List[List[Optional[str]]]) -> Optional[Dict[str, Any]]:
+        """A checkpointed result for ``field`` computed over exactly these documents, if any."""
+        rec = self._fields.get(field)
+        if rec is None or rec.get("docs") != docs:
+            return None
+        with self._lock:
+            self.resumed["fields"] += 1
+        return rec["result"]
@@ -3,6 +3,23 @@ import json, re
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+from ddx.ingestion.discovery import manifest_summary, write_manifest
+from ddx.utils.stages import timed_stage
+
+def _slug(s: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", (s or "").lower()).strip("_")
+
+def _write_latest(out_dir: Path, name: str, rid: str, record: Dict[str, Any]) -> Dict[str, str]:
+    """Overwrite ``<slug>.latest.json`` and append to ``<slug>.history.jsonl``; returns both paths."""
+    slug = _slug(name)
+    latest_path = out_dir / f"{slug}.latest.json"
+    history_path = out_dir / f"{slug}.history.jsonl"
+    latest_path.write_text(json.dumps({"run_id": rid, **record}, indent=2), encoding="utf-8")
+    with history_path.open("a", encoding="utf-8") as fp:
+        fp.write(json.dumps({"run_id": rid, **record}) + "\n")
+    return {"latest": str(latest_path), "history": str(history_path)}
+
+@timed_stage("store")
 def save_json_outputs(out: Dict[str, Any],
                       store_dir: Path,
                       project_id: str,
@@ -16,23 +33,49 @@ def save_json_outputs(out: Dict[str, Any],
     run_path = run_dir / f"{rid}.json"
 
     snapshot = {"meta": {"run_id": rid, **args_meta}, "results": out["results"]}
+    if out.get("llm_usage"):
+        snapshot["llm_usage"] = out["llm_usage"]
+    if out.get("batch"):
+        snapshot["batch"] = out["batch"]
+    manifest_path = None
+    if out.get("manifest"):
+        manifest_path = write_manifest(out["manifest"], run_dir / f"{rid}.manifest.json")
+        snapshot["manifest"] = {**manifest_summary(out["manifest"]), "path": str(manifest_path)}
     run_path.write_text(json.dumps(snapshot, indent=2), encoding="utf-8")
 
     fields_dir = store_dir / "fields" / project_id
     fields_dir.mkdir(parents=True, exist_ok=True)
 
-    def _slug(s: str) -> str:
-        return re.sub(r"[^a-z0-9]+", "_", (s or "").lower()).strip("_")
-
     stored_fields = []
     for r in out["results"]:
         key = r.get("key", "")
-        slug = _slug(key)
-        latest_path = fields_dir / f"{slug}.latest.json"
-        history_path = fields_dir / f"{slug}.history.jsonl"
-        latest_path.write_text(json.dumps({"run_id": rid, **r}, indent=2), encoding="utf-8")
-        with history_path.open("a", encoding="utf-8") as fp:
-            fp.write(json.dumps({"run_id": rid, **r}) + "\n")
-        stored_fields.append({"key": key, "latest": str(latest_path), "history": str(history_path)})
-
-    return {"run_json": str(run_path), "fields": stored_fields, "store_dir": str(store_dir)}
+        stored_fields.append({"key": key, **_write_latest(fields_dir, key, rid, r)})
+
+    stored = {"run_json": str(run_path), "fields": stored_fields, "store_dir": str(store_dir)}
+    if manifest_path is not None:
+        stored["manifest"] = str(manifest_path)
+    return stored
+
+def save_brand_evaluations(batch: Dict[str, Any],
+                           store_dir: Path,
+                           project_id: str,
+                           run_id: Optional[str],
+                           args_meta: Dict[str, Any]) -> Dict[str, Any]:
+    from datetime import datetime, timezone
+    rid = run_id or datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+
+    run_dir = store_dir / "brands" / "runs" / project_id
+    run_dir.mkdir(parents=True, exist_ok=True)
+    run_path = run_dir / f"{rid}.json"
+    snapshot = {"meta": {"run_id": rid, **args_meta}, **batch}
+    run_path.write_text(json.dumps(snapshot, indent=2), encoding="utf-8")
+
+    stored = []
+    for kind, name_key in (("solar_panels", "brand"), ("inverters", "inverter_brand")):
+        kind_dir = store_dir / "brands" / kind / project_id
+        kind_dir.mkdir(parents=True, exist_ok=True)
+        for r in batch.get(kind) or []:
+            name = (r.get(name_key) or {}).get("name", "")
+            stored.append({"kind": kind, "brand": name, **_write_latest(kind_dir, name, rid, r)})
+
+    return {"run_json": str(run_path), "brands": stored, "store_dir": str(store_dir)}
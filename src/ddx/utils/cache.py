@@ -0,0 +1,94 @@
+from __future__ import annotations
+import hashlib, json, os, threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Content-addressed cache shared by ingestion stages. Entries live in memory for the
+# lifetime of the process and as JSON under <cache_dir>/<namespace>/<key>.json.
+
+_CACHE_DIR: Optional[Path] = None
+_ENABLED = True
+_MEM: Dict[str, Dict[str, Any]] = {}
+_SHA_BY_STAT: Dict[tuple, str] = {}
+_LOCK = threading.Lock()
+
+
+def configure_cache(cache_dir: Optional[Path] = None, enabled: bool = True) -> None:
+    global _CACHE_DIR, _ENABLED
+    _CACHE_DIR = Path(cache_dir) if cache_dir else None
+    _ENABLED = enabled
+
+
+def get_cache_dir() -> Path:
+    if _CACHE_DIR is not None:
+        return _CACHE_DIR
+    env = os.getenv("DDX_CACHE_DIR")
+    if env:
+        return Path(env)
+    return Path.home() / ".cache" / "ddx"
+
+
+def cache_enabled() -> bool:
+    return _ENABLED
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    st = os.stat(path)
+    stat_key = (str(Path(path).resolve()), st.st_size, st.st_mtime_ns)
+    sha = _SHA_BY_STAT.get(stat_key)
+    if sha is None:
+        sha = _sha256_stream(path, chunk_size)
+        _SHA_BY_STAT[stat_key] = sha
+    return sha
+
+
+def _sha256_stream(path: Path, chunk_size: int) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _disk_path(namespace: str, key: str) -> Path:
+    return get_cache_dir() / namespace / f"{key}.json"
+
+
+def cache_get(namespace: str, key: str) -> Optional[Any]:
+    if not _ENABLED:
+        return None
+    with _LOCK:
+        mem = _MEM.get(namespace)
+        if mem is not None and key in mem:
+            return mem[key]
+    p = _disk_path(namespace, key)
+    try:
+        val = json.loads(p.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    with _LOCK:
+        _MEM.setdefault(namespace, {})[key] = val
+    return val
+
+
+def cache_put(namespace: str, key: str, value: Any) -> None:
+    if not _ENABLED:
+        return
+    with _LOCK:
+        _MEM.setdefault(namespace, {})[key] = value
+    p = _disk_path(namespace, key)
+    try:
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(value, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(p)
+    except Exception:
+        pass
+
+
+def cache_clear_memory(namespace: Optional[str] = None) -> None:
+    with _LOCK:
+        if namespace is None:
+            _MEM.clear()
+        else:
+            _MEM.pop(namespace, None)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+import threading
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, wait
+from typing import Dict, Optional
+
+# Seconds a single stage may take per document or call; None or 0 disables a limit
+DEFAULT_STAGE_TIMEOUTS: Dict[str, Optional[float]] = {
+    "parse": 120.0,  # PDF text + table extraction, in a killable worker process
+    "ocr": 900.0,    # added to "parse" when OCR is enabled
+    "llm": 120.0,    # one provider call
+}
+
+# How often a wait without a deadline wakes to notice cancel() (Ctrl-C)
+_CANCEL_POLL_SECONDS = 0.25
+
+
+class Deadline:
+    """Wall-clock budget for a whole run plus a cooperative cancellation flag.
+
+    Stages poll ``expired()`` before starting new work and bound their waits with
+    ``remaining()``; in-flight work is abandoned or killed, never waited on past the deadline.
+    """
+
+    __slots__ = ("seconds", "_t0", "_cancelled")
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds if seconds and seconds > 0 else None
+        self._t0 = time.monotonic()
+        self._cancelled = threading.Event()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (0 once expired or cancelled), or None without a deadline."""
+        if self._cancelled.is_set():
+            return 0.0
+        if self.seconds is None:
+            return None
+        return max(0.0, self.seconds - (time.monotonic() - self._t0))
+
+    def expired(self) -> bool:
+        left = self.remaining()
+        return left is not None and left <= 0.0
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cap(self, timeout: Optional[float]) -> Optional[float]:
+        """``timeout`` shortened to the time left; None when neither bounds it."""
+        left = self.remaining()
+        if left is None:
+            return timeout
+        return left if timeout is None else min(timeout, left)
+
+    def wait(self, fs, return_when: str = ALL_COMPLETED) -> tuple:
+        """``concurrent.futures.wait`` that also returns once the deadline expires or the run
+        is cancelled; returns (done, not_done)."""
+        while True:
+            done, not_done = wait(fs, timeout=self.cap(_CANCEL_POLL_SECONDS), return_when=return_when)
+            if not not_done or self.expired() or (done and return_when == FIRST_COMPLETED):
+                return done, not_done
@@ -0,0 +1,64 @@
+from __future__ import annotations
+import cProfile
+import io
+import pstats
+import tracemalloc
+from pathlib import Path
+from typing import Dict, Optional
+
+# Rows kept in the text summaries written next to the raw profile
+_TOP_FUNCTIONS = 40
+_TOP_ALLOCATIONS = 30
+_TRACEMALLOC_FRAMES = 25
+
+
+class RunProfiler:
+    """cProfile and tracemalloc around a block (``with RunProfiler() as prof: ...``).
+
+    cProfile sees the thread that entered the block; work on pool threads shows up there
+    as waits, so pair it with a trace for where that time went. tracemalloc sees every thread.
+    """
+
+    __slots__ = ("_profile", "_snapshot", "peak_bytes")
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self.peak_bytes = 0
+
+    def __enter__(self) -> "RunProfiler":
+        tracemalloc.start(_TRACEMALLOC_FRAMES)
+        self._profile.enable()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._profile.disable()
+        self._snapshot = tracemalloc.take_snapshot()
+        self.peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    def save(self, run_dir: Path, run_id: str) -> Dict[str, str]:
+        """Write ``<run_id>.prof`` (pstats, for snakeviz/pstats), ``<run_id>.profile.txt``
+        (top functions by cumulative time) and ``<run_id>.tracemalloc.txt`` (peak and top
+        allocation sites) under ``run_dir``; returns their paths."""
+        run_dir = Path(run_dir)
+        run_dir.mkdir(parents=True, exist_ok=True)
+        prof_path = run_dir / f"{run_id}.prof"
+        self._profile.dump_stats(str(prof_path))
+
+        buf = io.StringIO()
+        pstats.Stats(self._profile, stream=buf).sort_stats("cumulative").print_stats(_TOP_FUNCTIONS)
+        summary_path = run_dir / f"{run_id}.profile.txt"
+        summary_path.write_text(buf.getvalue(), encoding="utf-8")
+
+        lines = [f"peak traced memory: {self.peak_bytes / 2**20:.1f} MiB", ""]
+        if self._snapshot is not None:
+            snapshot = self._snapshot.filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ])
+            for stat in snapshot.statistics("lineno")[:_TOP_ALLOCATIONS]:
+                lines.append(str(stat))
+        mem_path = run_dir / f"{run_id}.tracemalloc.txt"
+        mem_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return {"profile": str(prof_path), "profile_summary": str(summary_path), "tracemalloc": str(mem_path)}
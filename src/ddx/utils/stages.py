@@ -0,0 +1,53 @@
+from __future__ import annotations
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from ddx.utils import trace
+
+# Wall-clock samples per pipeline stage ("discovery", "ingest", "ocr", "map", "prompt",
+# "llm", "normalize", "reduce", "store"). Nothing is recorded unless ``collect_stages()``
+# or tracing is active, so the hooks cost two global lookups in normal runs. Stages nest:
+# "map" includes its "prompt", "llm" and "normalize", "reduce" its "llm" call, "ingest"
+# the "ocr" of its pages.
+
+_LOCK = threading.Lock()
+_SAMPLES: Optional[Dict[str, List[float]]] = None
+
+
+def record_stage(name: str, seconds: float) -> None:
+    samples = _SAMPLES
+    if samples is None:
+        return
+    with _LOCK:
+        samples.setdefault(name, []).append(seconds)
+
+
+@contextmanager
+def timed_stage(name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """Time the block (or, as a decorator, each call) as one sample of ``name``.
+
+    While tracing, the block is also a span carrying ``attrs``; yields the attributes so
+    the block can add to them.
+    """
+    if _SAMPLES is None and trace.active_tracer() is None:
+        yield attrs
+        return
+    t0 = time.perf_counter()
+    try:
+        with trace.span(name, attrs):
+            yield attrs
+    finally:
+        record_stage(name, time.perf_counter() - t0)
+
+
+@contextmanager
+def collect_stages() -> Iterator[Dict[str, List[float]]]:
+    """Record stage samples from every thread until the block exits; yields {stage: [seconds]}."""
+    global _SAMPLES
+    previous, _SAMPLES = _SAMPLES, {}
+    try:
+        yield _SAMPLES
+    finally:
+        _SAMPLES = previous
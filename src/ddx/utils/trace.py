@@ -0,0 +1,135 @@
+from __future__ import annotations
+import contextvars
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Spans are recorded only while a Tracer is active (``start_tracing()``); the pipeline's
+# stage hooks (``ddx.utils.stages.timed_stage``) open them. Each span keeps its thread,
+# so a Chrome trace shows ingestion and map workers on their own tracks.
+
+TRACE_FORMATS = ("chrome", "otel")
+
+_TRACER: Optional["Tracer"] = None
+_PARENT: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("ddx_span_parent", default=None)
+
+
+class Tracer:
+    __slots__ = ("spans", "trace_id", "_lock", "_perf0", "_wall0")
+
+    def __init__(self):
+        self.spans: List[Dict[str, Any]] = []
+        self.trace_id = secrets.token_hex(16)
+        self._lock = threading.Lock()
+        self._perf0 = time.perf_counter_ns()
+        self._wall0 = time.time_ns()
+
+    def _add(self, rec: Dict[str, Any]) -> None:
+        with self._lock:
+            self.spans.append(rec)
+
+    def to_chrome(self) -> Dict[str, Any]:
+        """Trace Event Format ("X" complete events), loadable in chrome://tracing or Perfetto."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": s["name"], "cat": "ddx", "ph": "X", "pid": pid, "tid": s["tid"],
+                "ts": (s["start"] - self._perf0) / 1000.0, "dur": (s["end"] - s["start"]) / 1000.0,
+                "args": s["attrs"],
+            }
+            for s in self.spans
+        ]
+        threads = {s["tid"]: s["thread"] for s in self.spans}
+        events += [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def to_otel(self) -> Dict[str, Any]:
+        """OTLP/JSON ``resourceSpans``, as accepted by an OpenTelemetry collector's file receiver."""
+        spans = []
+        for s in self.spans:
+            attrs = dict(s["attrs"], **{"thread.name": s["thread"]})
+            span = {
+                "traceId": self.trace_id,
+                "spanId": s["id"],
+                "name": s["name"],
+                "kind": 1,
+                "startTimeUnixNano": str(self._wall0 + s["start"] - self._perf0),
+                "endTimeUnixNano": str(self._wall0 + s["end"] - self._perf0),
+                "attributes": [{"key": k, "value": _otel_value(v)} for k, v in attrs.items()],
+            }
+            if s["parent"]:
+                span["parentSpanId"] = s["parent"]
+            spans.append(span)
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "ddx"}}]},
+            "scopeSpans": [{"scope": {"name": "ddx"}, "spans": spans}],
+        }]}
+
+    def write(self, path: Path, fmt: str = "chrome") -> Path:
+        if fmt not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format: {fmt}")
+        data = self.to_chrome() if fmt == "chrome" else self.to_otel()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data), encoding="utf-8")
+        return path
+
+
+def _otel_value(v: Any) -> Dict[str, Any]:
+    if isinstance(v, bool):
+        return {"boolValue": v}
+    if isinstance(v, int):
+        return {"intValue": str(v)}
+    if isinstance(v, float):
+        return {"doubleValue": v}
+    return {"stringValue": str(v)}
+
+
+def start_tracing() -> Tracer:
+    global _TRACER
+    _TRACER = Tracer()
+    return _TRACER
+
+
+def stop_tracing() -> Optional[Tracer]:
+    global _TRACER
+    tracer, _TRACER = _TRACER, None
+    return tracer
+
+
+def active_tracer() -> Optional[Tracer]:
+    return _TRACER
+
+
+@contextmanager
+def span(name: str, attrs: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """Record the block as a span of the active tracer; yields its (mutable) attributes."""
+    attrs = attrs if attrs is not None else {}
+    tracer = _TRACER
+    if tracer is None:
+        yield attrs
+        return
+    span_id = secrets.token_hex(8)
+    parent = _PARENT.get()
+    token = _PARENT.set(span_id)
+    start = time.perf_counter_ns()
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        end = time.perf_counter_ns()
+        _PARENT.reset(token)
+        thread = threading.current_thread()
+        tracer._add({"name": name, "id": span_id, "parent": parent, "start": start, "end": end,
+                     "tid": thread.ident, "thread": thread.name,
+                     "attrs": {k: v for k, v in attrs.items() if v is not None}})
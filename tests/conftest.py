@@ -0,0 +1,11 @@
+import json
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture(scope="session")
+def field_defs():
+    return json.loads((ROOT / "config" / "fields.json").read_text(encoding="utf-8"))["fields"]
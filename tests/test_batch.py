@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from ddx.llm.batch import BatchTimeout, LocalBatchBackend, build_batch_line, run_batch
+
+
+class _Echo:
+    name = "echo"
+
+    def chat(self, messages, model, response_format=None):
+        return messages[-1]["content"], {"prompt_tokens": 1, "completion_tokens": 1}
+
+
+def _lines(prompt, n=2):
+    return [build_batch_line(f"f0-d{i}", "m", [{"role": "user", "content": f"{prompt} {i}"}]) for i in range(n)]
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return LocalBatchBackend(tmp_path / "backend", _Echo())
+
+
+def _timed_out(backend, lines, work_dir):
+    with pytest.raises(BatchTimeout) as e:
+        run_batch(backend, lines, work_dir, timeout_seconds=0)
+    return e.value.batch_id
+
+
+def test_interrupted_batch_is_resumed(backend, tmp_path):
+    work = tmp_path / "work"
+    first = _timed_out(backend, _lines("pv"), work)
+    out = run_batch(backend, _lines("pv"), work, poll_seconds=0)
+    assert out["batch_id"] == first
+    assert out["results"]["f0-d1"]["content"] == "pv 1"
+
+
+def test_same_ids_with_other_prompts_get_a_new_batch(backend, tmp_path):
+    work = tmp_path / "work"
+    first = _timed_out(backend, _lines("pv"), work)
+    out = run_batch(backend, _lines("scada"), work, poll_seconds=0)
+    assert out["batch_id"] != first
+    assert out["results"]["f0-d0"]["content"] == "scada 0"
+    assert "scada" in (work / "requests.jsonl").read_text(encoding="utf-8")
+    assert json.loads((work / "batch.json").read_text(encoding="utf-8"))["batch_id"] == out["batch_id"]
+
+
+def test_failed_batch_is_resubmitted(backend, tmp_path):
+    work = tmp_path / "work"
+    first = _timed_out(backend, _lines("pv"), work)
+    (backend.root / first / "state.json").write_text(json.dumps({"id": first, "status": "expired"}))
+    assert run_batch(backend, _lines("pv"), work, poll_seconds=0)["batch_id"] != first
@@ -0,0 +1,22 @@
+import contextlib
+import io
+import json
+
+from ddx import bench
+
+
+def test_bench_inverters_case(tmp_path, monkeypatch):
+    # bench.main sets these for the run; monkeypatch puts them back afterwards
+    monkeypatch.delenv("DDX_MOCK_LATENCY_MS", raising=False)
+    monkeypatch.delenv("DDX_MOCK_FAILURE_RATE", raising=False)
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        bench.main(["--cases", "inverters", "--mock-latency-ms", "0", "--store-dir", str(tmp_path)])
+    report = json.loads(buf.getvalue())
+    assert report["config"]["provider"] == "mock"
+    (run,) = report["runs"]
+    (case,) = run["cases"]
+    assert case["case"] == "inverters"
+    assert case["docs"] == 3 and case["fields"] >= 1
+    assert case["failed_docs"] == 0 and case["read_errors"] == 0
+    assert {"discovery", "ingest", "reduce"} <= set(run["stages"])
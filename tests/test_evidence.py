@@ -0,0 +1,37 @@
+from ddx.reducer.evidence import UNVERIFIED_PENALTY, verify_evidence
+
+DOC = (
+    "[Page 1] Ficha técnica del inversor.\n\n"
+    "[Page 2] Garantía estándar del inversor: 10 años desde la fecha de instalación."
+)
+
+
+def test_quote_found_on_another_page_is_moved():
+    j = {"confidence": 0.8, "evidence": [{"page": 1, "snippet": "garantia estandar del inversor: 10 anos"}]}
+    verify_evidence(DOC, j)
+    ev = j["evidence"][0]
+    assert ev["verified"] is True
+    assert ev["page"] == 2 and ev["page_claimed"] == 1
+    assert j["evidence_verified"] == 1.0
+    assert j["confidence"] == 0.8
+
+
+def test_missing_quote_lowers_confidence():
+    j = {
+        "confidence": 0.8,
+        "evidence": [
+            {"page": 2, "snippet": "Garantía estándar del inversor: 10 años"},
+            {"page": 2, "snippet": "Warranty extended to twenty five years for all customers"},
+        ],
+    }
+    verify_evidence(DOC, j)
+    assert [ev["verified"] for ev in j["evidence"]] == [True, False]
+    assert j["evidence_verified"] == 0.5
+    assert j["confidence"] == round(0.8 * (UNVERIFIED_PENALTY + (1 - UNVERIFIED_PENALTY) * 0.5), 4)
+    assert "1 of 2 evidence quote(s)" in j["notes"][-1]
+
+
+def test_no_quotes_leaves_output_alone():
+    j = {"confidence": 0.7, "evidence": [{"page": 1, "snippet": "  "}]}
+    verify_evidence(DOC, j)
+    assert j == {"confidence": 0.7, "evidence": [{"page": 1, "snippet": "  "}]}
@@ -0,0 +1,55 @@
+import pytest
+
+from ddx.reducer.rules import CONFLICT_PENALTY, pre_extract
+
+BILLS = "existing_electrical_system.energy_bills_12_months.average_monthly_consumption"
+INVERTER = "inverters.warranty_certificate.warranty_years"
+PV_PRODUCT = "photovoltaic_modules.warranty_certificate.product"
+
+
+def _candidate(field_def, text, key):
+    return pre_extract(field_def, "[Page 1] " + text)["candidates"].get(key)
+
+
+def test_bill_rules_read_spanish_numbers_and_periods(field_defs):
+    out = pre_extract(field_defs[BILLS], "[Page 1] Periodo de facturación: 01/01/2025 al 31/01/2025\n"
+                                         "Consumo total del periodo 1.234 kWh")
+    c = out["candidates"]
+    assert c["monthly_kwh"]["value"] == 1234.0
+    assert c["period_start"]["value"] == "01/01/2025"
+    assert c["period_end"]["value"] == "31/01/2025"
+    assert out["decisive"] is True
+
+
+@pytest.mark.parametrize(
+    "text, years",
+    [
+        ("Garantía del inversor: 10 años", 10),
+        ("10-year inverter warranty", 10),
+        ("IQ microinverters 25 years commencing on the earlier of", 25),
+        ("Inverters, Backup Interface: 12* years commencing on the earlier of", 12),
+    ],
+)
+def test_inverter_warranty_wordings(field_defs, text, years):
+    assert _candidate(field_defs[INVERTER], text, "warranty_years")["value"] == years
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["12-year Product Warranty", "Limited warranty: 10 years", "Power optimizers: 25 years commencing"],
+)
+def test_inverter_warranty_needs_an_inverter(field_defs, text):
+    assert _candidate(field_defs[INVERTER], text, "warranty_years") is None
+
+
+def test_pv_product_warranty_year_first(field_defs):
+    assert _candidate(field_defs[PV_PRODUCT], "12-year Product  Warranty", "product_warranty_years")["value"] == 12
+
+
+def test_conflicting_matches_are_not_decisive(field_defs):
+    out = pre_extract(field_defs[INVERTER], "[Page 1] Garantía del inversor: 10 años\n"
+                                            "[Page 2] Inverter warranty: 12 years")
+    c = out["candidates"]["warranty_years"]
+    assert c["value"] == 10 and c["conflict"] == 12
+    assert c["confidence"] == pytest.approx(0.9 * CONFLICT_PENALTY)
+    assert out["decisive"] is False
@@ -0,0 +1,71 @@
+import pytest
+
+from ddx.reducer.table import IntermediateTable
+from ddx.reducer.timeseries import reduce_time_series
+
+BILLS = "existing_electrical_system.energy_bills_12_months.average_monthly_consumption"
+
+
+def _bill(n, kwh, start, end, confidence=0.9):
+    return {
+        "_filename": f"bill_{n}.pdf",
+        "_doc_index": n,
+        "confidence": confidence,
+        "intermediate": {"monthly_kwh": kwh, "period_start": start, "period_end": end},
+    }
+
+
+def _reduce(field_def, bills):
+    return reduce_time_series(IntermediateTable.from_per_doc(bills, field_def), field_def)
+
+
+def test_monthly_average_in_mwh(field_defs):
+    fd = field_defs[BILLS]
+    out = _reduce(fd, [
+        _bill(1, 1000, "2025-01-01", "2025-01-31"),
+        _bill(2, 1200, "2025-02-01", "2025-02-28"),
+        _bill(3, 1400, "2025-03-01", "2025-03-31"),
+    ])
+    assert out["value"] == pytest.approx(1.2)
+    assert out["unit"] == "MWh/month"
+    assert [b["month"] for b in out["time_series"]["bills"]] == ["2025-01", "2025-02", "2025-03"]
+    # min_documents is 10: three months are not enough
+    assert out["confidence"] == pytest.approx(0.9 * 3 / 10)
+
+
+def test_same_bill_twice_is_dropped(field_defs):
+    out = _reduce(field_defs[BILLS], [
+        _bill(1, 1000, "2025-01-01", "2025-01-31", confidence=0.8),
+        _bill(2, 1002, "2025-01-01", "2025-01-31", confidence=0.95),
+        _bill(3, 1200, "2025-02-01", "2025-02-28"),
+    ])
+    ts = out["time_series"]
+    assert ts["duplicates"] == [{"doc": "bill_1.pdf", "duplicate_of": "bill_2.pdf", "month": "2025-01"}]
+    assert ts["conflicts"] == []
+    assert out["value"] == pytest.approx((1002 + 1200) / 2 / 1000)
+
+
+def test_same_period_with_different_amounts_keeps_both(field_defs):
+    out = _reduce(field_defs[BILLS], [
+        _bill(1, 1300, "2025-01-01", "2025-01-31"),
+        _bill(2, 900, "2025-01-02", "2025-01-31"),
+    ])
+    ts = out["time_series"]
+    assert len(ts["bills"]) == 2 and ts["duplicates"] == []
+    assert ts["conflicts"][0]["doc"] == "bill_2.pdf"
+    assert ts["conflicts"][0]["conflicts_with"] == "bill_1.pdf"
+    assert any("different amounts" in n for n in out["notes"])
+
+
+def test_missing_months_are_reported(field_defs):
+    out = _reduce(field_defs[BILLS], [
+        _bill(1, 1000, "2025-01-01", "2025-01-31"),
+        _bill(2, 1000, "2025-04-01", "2025-04-30"),
+    ])
+    assert "Missing months: 2025-02, 2025-03." in out["notes"]
+
+
+def test_no_usable_bills(field_defs):
+    fd = field_defs[BILLS]
+    assert _reduce(fd, [{"_filename": "x.pdf", "confidence": 0.9, "intermediate": {}}]) is None
+    assert _reduce(fd, [{"_filename": "x.pdf", "error": "single_doc LLM failed"}]) is None
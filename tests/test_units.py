@@ -0,0 +1,48 @@
+import pytest
+
+from ddx.reducer import units
+from ddx.reducer.units import parse_number
+
+
+@pytest.fixture(autouse=True)
+def _no_default_locale(monkeypatch):
+    monkeypatch.setattr(units, "DEFAULT_NUMBER_LOCALE", "")
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("1.234,56", 1234.56),
+        ("1,234.56", 1234.56),
+        ("$ 1.234,56 kWh", 1234.56),
+        ("1 234,5", 1234.5),
+        ("12,5", 12.5),
+        ("(12.5)", -12.5),
+        ("-3", -3.0),
+        ("1.234.567", 1234567.0),
+    ],
+)
+def test_parse_number_unambiguous(text, expected):
+    assert parse_number(text) == pytest.approx(expected)
+    assert parse_number(text, "es") == pytest.approx(expected)
+    assert parse_number(text, "en") == pytest.approx(expected)
+
+
+@pytest.mark.parametrize(
+    "text, plain, es, en",
+    [
+        ("1.234", 1.234, 1234.0, 1.234),
+        ("1,234", 1.234, 1.234, 1234.0),
+    ],
+)
+def test_parse_number_lone_separator_follows_locale(text, plain, es, en):
+    assert parse_number(text) == pytest.approx(plain)
+    assert parse_number(text, "es") == pytest.approx(es)
+    assert parse_number(text, "en_US") == pytest.approx(en)
+
+
+def test_parse_number_passthrough_and_garbage():
+    assert parse_number(7) == 7.0
+    assert parse_number(None) is None
+    assert parse_number("n/a") is None
+    assert parse_number(["1"]) is None